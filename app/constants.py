@@ -32,13 +32,118 @@ PROFILE_LEVEL_MIN_WIDTH = 100
 # Отображение имён в таблице
 MAX_DISPLAY_NAME_LENGTH = 25
 
+# Шаблон имени выходного файла (поля: {name}, {preset}, {codec}, {container}, {resolution});
+# переопределяется ключом "output_name_template" в app_config.json
+OUTPUT_NAME_TEMPLATE = "{name}_converted"
+
 # Таймеры (мс)
 VIDEO_UPDATE_INTERVAL_MS = 100
-PROCESS_NEXT_DELAY_MS = 500
+PRESET_EDITOR_APPLY_DELAY_MS = 50  # пакетное применение правок редактора к выделенным файлам
+
+# Фоновые проверки файловой системы
+FS_WORKER_COUNT = 4
+FS_STAT_CACHE_TTL_SEC = 2.0  # сколько считать свежим результат stat/listdir
+
+# Очередь: сколько следующих элементов готовить заранее, пока кодируется текущий
+JOB_PREFETCH_COUNT = 3
+# Ожидающие элементы с тем же входным файлом и той же обрезкой кодируются одним запуском ffmpeg
+QUEUE_MERGE_DUPLICATE_INPUTS = True
+QUEUE_VALIDATION_MAX_LISTED = 10  # сколько отклонённых при проверке команд файлов перечислять в сообщении
+# Пробный прогон очереди: секунд кодирования каждого элемента в null, лимит времени на элемент, хвост stderr
+PREFLIGHT_SECONDS = 2
+PREFLIGHT_TIMEOUT_SEC = 60
+PREFLIGHT_STDERR_TAIL = 8000
+PREFLIGHT_DETAIL_MAX = 200  # длина строки-причины в сводке
+# Сторож зависаний очереди: нет продвижения time= дольше N с — процесс убивается и перезапускается
+# с паузой WATCHDOG_RETRY_DELAY_SEC, удваиваемой с каждой попыткой; после WATCHDOG_MAX_RETRIES — ошибка.
+# Переопределяются ключами "watchdog_stall_sec" (0 — выключить) и "watchdog_max_retries" в app_config.json
+WATCHDOG_STALL_SEC = 180
+WATCHDOG_MAX_RETRIES = 2
+WATCHDOG_RETRY_DELAY_SEC = 15
+WATCHDOG_CHECK_INTERVAL_MS = 5000
+# Неудачный запуск очереди перезапускается с запасной стратегией, подобранной по хвосту stderr
+QUEUE_AUTO_FALLBACKS = True
+QUEUE_STDERR_TAIL = 16000
+FALLBACK_PIX_FMT = "yuv420p"
+# Проверка выхода после успешного кодирования (в пуле потоков, параллельно со следующим файлом):
+# длительность должна совпадать с ожидаемой с точностью max(секунд, доли длительности)
+VERIFY_OUTPUTS = True
+VERIFY_DURATION_TOLERANCE_SEC = 1.0
+VERIFY_DURATION_TOLERANCE_RATIO = 0.02
+# Таймаут ffprobe при проверке выхода (файл может лежать на медленном сетевом диске); не ответил — «не проверено»
+VERIFY_PROBE_TIMEOUT_SEC = 60
+# Хэши содержимого: выборочный — размер + HASH_SAMPLE_COUNT фрагментов между началом и концом файла;
+# полный SHA-256 — в отдельном пуле HASH_WORKER_COUNT потоков (при подготовке — если HASH_FULL_IN_BACKGROUND)
+HASH_SAMPLE_BYTES = 256 * 1024
+HASH_SAMPLE_COUNT = 8
+HASH_FULL_CHUNK_BYTES = 4 * 1024 * 1024
+HASH_WORKER_COUNT = 1
+HASH_FULL_IN_BACKGROUND = False
+# Временная папка для выходов (быстрый локальный диск): ffmpeg пишет туда, готовый и проверенный файл
+# переносится на место целиком. "" — писать сразу на место; переопределяется ключом "staging_dir" в app_config.json
+STAGING_DIR = ""
+# Упреждающее чтение входов очереди с медленного диска: "" — выключено, "copy" — копия следующих
+# INPUT_PREFETCH_COUNT входов на локальный диск (не больше INPUT_PREFETCH_BUDGET_GB, давно использованные
+# вытесняются), "fadvise" — подсказка ОС прочитать файл заранее. Ключи app_config.json: "input_prefetch_mode",
+# "input_prefetch_count", "input_prefetch_dir" (копии лежат в его подпапке INPUT_PREFETCH_DIR_NAME, по умолчанию — во временной), "input_prefetch_budget_gb"
+INPUT_PREFETCH_MODE = ""
+INPUT_PREFETCH_COUNT = 2
+INPUT_PREFETCH_BUDGET_GB = 20
+INPUT_PREFETCH_DIR_NAME = "ffmpeg_gui_inputs"
+# Проверка свободного места перед запуском элемента очереди: при нехватке запуск ждёт (повтор через
+# DISK_SPACE_RETRY_SEC), а не падает посреди кодирования. На каждом диске остаётся запас DISK_SPACE_RESERVE_MB
+DISK_SPACE_CHECK = True
+DISK_SPACE_RESERVE_MB = 512
+DISK_SPACE_RETRY_SEC = 30
+# Сколько раз элемент перезапускается после «No space left on device» посреди кодирования
+DISK_FULL_MAX_RETRIES = 3
+# Оценка размера выхода: запас к оценке, битрейт аудио, если он не задан (кбит/с), степень сжатия без истории
+# (выход / вход) и вес нового запуска в средней степени сжатия пресета
+DISK_ESTIMATE_MARGIN = 1.15
+DISK_ESTIMATE_AUDIO_KBPS = 192
+DISK_ESTIMATE_DEFAULT_RATIO = 1.0
+DISK_ESTIMATE_HISTORY_ALPHA = 0.3
+# Метрики запусков очереди: период опроса процесса ffmpeg (/proc) и сколько последних запусков показывать
+# в «Статистике» (в CSV выгружается вся история)
+METRICS_SAMPLE_INTERVAL_MS = 1000
+METRICS_HISTORY_VIEW_LIMIT = 500
+# Прогноз времени по истории запусков (models.throughput_model): сколько последних запусков читать при старте,
+# сколько запусков группы достаточно для прогноза и сколько последних хранить в группе
+THROUGHPUT_HISTORY_ROWS = 5000
+THROUGHPUT_MIN_SAMPLES = 2
+THROUGHPUT_MAX_SAMPLES = 50
+# Кэш результатов: элемент не перекодируется, если вход, команда и версия ffmpeg те же, а проверенный выход цел
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_MAX_ENTRIES = 50000
+RESULT_CACHE_SAVE_INTERVAL_SEC = 10
+# Контейнеры, доступные для дополнительных мест сохранения (tee)
+DESTINATION_CONTAINERS = ("mp4", "mkv", "mov", "avi")
+# Значения -preset, которые принимают libx264/libx265 (проверка команды до запуска очереди)
+X26X_PRESETS = (
+    "ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow", "placebo",
+)
+# Видеокодеки, которые контейнер принимает без перекодирования (remux: -c:v copy, если настройки не меняют видео)
+REMUX_VIDEO_CODECS = {
+    "mp4": {"h264", "hevc", "av1", "vp9", "mpeg4", "mpeg2video"},
+    "m4v": {"h264", "hevc", "mpeg4"},
+    "mov": {"h264", "hevc", "mpeg4", "prores", "mjpeg"},
+    "mkv": {"h264", "hevc", "av1", "vp8", "vp9", "mpeg4", "mpeg2video", "prores", "mjpeg", "theora"},
+    "webm": {"vp8", "vp9", "av1"},
+    "avi": {"h264", "mpeg4", "msmpeg4v3", "mjpeg", "mpeg2video"},
+}
+
+# Планировщик запусков ffmpeg
+SCHEDULER_MAX_JOBS = 0             # общий лимит одновременных процессов ffmpeg (0 — по числу ядер)
+SCHEDULER_INTERACTIVE_CORES = 2    # ядра, которые очередь оставляет свободными для одиночных конвертаций
+AUDIO_JOB_CORES = 1                # аудиокодеки практически однопоточны
 
 # ETA
 ETA_DELAY_SECONDS = 4
 ETA_SMOOTHING_ALPHA = 0.15
+# Поправка прогноза по истории: отношение фактической скорости к прогнозу, сглаженное по завершённым файлам
+ETA_CALIBRATION_ALPHA = 0.5
+# Пауза перед пересчётом прогноза, пока ffprobe пачкой читает только что добавленные файлы
+ETA_REFRESH_DELAY_MS = 300
 
 # Прогресс (0–100)
 PROGRESS_MAX = 100
@@ -96,6 +201,10 @@ CONFIG_CUSTOM_OPTIONS = "presets/custom_options.json"
 CONFIG_SAVED_COMMANDS = "presets/saved_commands.json"
 CONFIG_APP_CONFIG = "app_config.json"
 CONFIG_PRESETS_XML = "presets/presets.xml"
+CONFIG_FFMPEG_CAPABILITIES = "presets/ffmpeg_capabilities.json"  # кэш опроса возможностей ffmpeg
+CONFIG_RESULT_CACHE = "presets/result_cache.json"  # кэш результатов кодирования
+CONFIG_OUTPUT_SIZE_HISTORY = "presets/output_size_history.json"  # средняя степень сжатия пресетов
+CONFIG_METRICS_HISTORY = "presets/metrics_history.sqlite3"  # история запусков (время, ЦП, память, размеры)
 
 # Аудио: соответствие формата и кодека FFmpeg (общее для «Видео в аудио» и «Аудио конвертер»)
 AUDIO_CODEC_MAP = {
@@ -106,9 +215,22 @@ AUDIO_CODEC_MAP = {
     "ogg": "libvorbis",
 }
 
+# Кодеки источника, которые контейнер принимает без перекодирования (качество «Текущего файла» → -c:a copy)
+AUDIO_COPY_COMPATIBLE = {
+    "mp3": {"mp3"},
+    "wav": {"pcm_s16le"},
+    "m4a": {"aac", "alac"},
+    "flac": {"flac"},
+    "ogg": {"vorbis", "opus"},
+}
+
 # Форматы «Видео в аудио» / «Аудио конвертер» (label, ext)
 AUDIO_FORMATS = [("MP3", "mp3"), ("WAV", "wav"), ("M4A", "m4a"), ("FLAC", "flac"), ("OGG", "ogg")]
 
+# Входные расширения страниц «Видео в аудио» / «Аудио конвертер»
+V2A_INPUT_EXTS = {".mp4", ".mkv", ".avi", ".mov", ".flv", ".wmv", ".webm"}
+A2A_INPUT_EXTS = {".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus"}
+
 # Варианты качества (label, value)
 AUDIO_QUALITY_OPTIONS = [
     ("Текущего файла", "copy"),
@@ -1,31 +1,49 @@
 import os
 import sys
+import platform
 import logging
 from app.constants import (
     WINDOW_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT,
     HEIGHT_PRESET_EDITOR_CONTAINER, HEIGHT_PRESET_EDITOR_LAYOUT, HEIGHT_BUTTON_PRESET,
     STYLE_RUN_BUTTON, STYLE_ABORT_BUTTON,
-    VIDEO_UPDATE_INTERVAL_MS,
+    VIDEO_UPDATE_INTERVAL_MS, PRESET_EDITOR_APPLY_DELAY_MS,
     ETA_DELAY_SECONDS, ETA_SMOOTHING_ALPHA,
-    CONFIG_CUSTOM_OPTIONS, CONFIG_SAVED_COMMANDS, CONFIG_APP_CONFIG,
+    CONFIG_CUSTOM_OPTIONS, CONFIG_SAVED_COMMANDS, CONFIG_APP_CONFIG, CONFIG_FFMPEG_CAPABILITIES, CONFIG_RESULT_CACHE,
+    CONFIG_OUTPUT_SIZE_HISTORY, CONFIG_METRICS_HISTORY,
+    OUTPUT_NAME_TEMPLATE, WATCHDOG_STALL_SEC, WATCHDOG_MAX_RETRIES, HASH_WORKER_COUNT, STAGING_DIR,
+    INPUT_PREFETCH_MODE, INPUT_PREFETCH_COUNT, INPUT_PREFETCH_BUDGET_GB,
 )
-from PySide6.QtWidgets import QMainWindow, QMessageBox, QSpinBox, QComboBox, QTabWidget
+from PySide6.QtWidgets import QMainWindow, QMessageBox, QSpinBox, QComboBox, QTabWidget, QPushButton
 from PySide6.QtCore import QProcess, QTimer, QEvent, QUrl
 from PySide6.QtGui import QGuiApplication, QCloseEvent
 from PySide6.QtGui import QDesktopServices
 from ui.ui_mainwindow import Ui_MainWindow  # Сгенерированный из .ui интерфейс
 from models.presetmanager import PresetManager
+from models.output_names import OutputNameAllocator
+from models.async_fs import AsyncFsService
+from models.probe_store import ProbeStore
+from models.ffmpeg_capabilities import FFmpegCapabilityCache
+from models.result_cache import ResultCache
+from models.disk_space import OutputSizeHistory
+from models.job_metrics import MetricsHistory
+from models.throughput_model import ThroughputModel
+from models.job_scheduler import Job, JobScheduler
 from mixins.config_warnings import ConfigWarningsMixin
 from mixins.queue_ui import QueueUIMixin
 from mixins.encoding_process import EncodingMixin
+from mixins.disk_space import DiskSpaceMixin
+from mixins.queue_metrics import QueueMetricsMixin
+from mixins.queue_eta import QueueEtaMixin
 from mixins.preset_editor_ui import PresetEditorUIMixin
 from mixins.video_preview import VideoPreviewMixin
 from mixins.audio_pages import AudioPagesMixin
+from mixins.audio_batch import AudioBatchMixin
+from mixins.queue_preflight import QueuePreflightMixin
 
 logger = logging.getLogger(__name__)
 
 
-class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewMixin, AudioPagesMixin, ConfigWarningsMixin, QMainWindow):
+class MainWindow(QueueUIMixin, EncodingMixin, DiskSpaceMixin, QueueMetricsMixin, QueueEtaMixin, QueuePreflightMixin, PresetEditorUIMixin, VideoPreviewMixin, AudioPagesMixin, AudioBatchMixin, ConfigWarningsMixin, QMainWindow):
     def __init__(self):
         super().__init__()
         self.ui = Ui_MainWindow()
@@ -66,7 +84,9 @@ class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewM
                 btn.setMaximumHeight(HEIGHT_BUTTON_PRESET)
                 btn.setStyleSheet("padding: 4px 10px;")
 
+        # Процесс текущего элемента очереди; между запусками — неактивная заглушка (запуски идут через планировщик)
         self.ffmpegProcess = QProcess(self)
+        self._idleFfmpegProcess = self.ffmpegProcess
         # Корень приложения: при деплое (frozen) — папка с exe, иначе — корень проекта
         if getattr(sys, "frozen", False):
             self._appDir = os.path.dirname(sys.executable)
@@ -94,6 +114,47 @@ class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewM
         
         # Очередь файлов
         self.queue = []  # Список QueueItem
+        # Проверки диска — в фоне, чтобы медленный сетевой диск не подвешивал интерфейс
+        self._fs = AsyncFsService(parent=self)
+        self._fs.directoryListed.connect(self._onDirectoryListed)
+        QGuiApplication.instance().aboutToQuit.connect(self._fs.shutdown)
+        self._hashFs = AsyncFsService(workers=HASH_WORKER_COUNT, parent=self)  # пул полных хэшей: не занимает потоки stat/ffprobe
+        QGuiApplication.instance().aboutToQuit.connect(self._hashFs.shutdown)
+        self._prefetchFs = AsyncFsService(workers=1, parent=self)  # копирование входов с медленного диска
+        QGuiApplication.instance().aboutToQuit.connect(self._prefetchFs.shutdown)
+        self._outputNames = OutputNameAllocator(lister=self._fs.cachedListdir)  # Кэш папок и резервирование выходных имён
+        self._probeStore = ProbeStore()  # Кэш ffprobe по (путь, размер, mtime)
+        # Возможности ffmpeg (кодеры, муксеры, фильтры, pix_fmt) — для проверки команд до запуска очереди
+        self._capabilityCache = FFmpegCapabilityCache(os.path.join(self._appDir, CONFIG_FFMPEG_CAPABILITIES))
+        self._ffmpegCaps = None
+        self._resultCache = ResultCache(os.path.join(self._appDir, CONFIG_RESULT_CACHE))
+        self._sizeHistory = OutputSizeHistory(os.path.join(self._appDir, CONFIG_OUTPUT_SIZE_HISTORY))
+        self._metricsHistory = MetricsHistory(os.path.join(self._appDir, CONFIG_METRICS_HISTORY))
+        self._queueMetrics = None  # JobMetricsRecorder текущего запуска очереди
+        self._metricsTimer = None
+        self._throughput = ThroughputModel(platform.node())  # заменяется моделью из истории (_loadThroughputModel)
+        self._ffmpegCapsWaiters = None
+        self._preparingItems = {}  # id(QueueItem) -> колбэки, ожидающие подготовки элемента
+        # Все запуски ffmpeg (очередь и страницы аудио) — через один планировщик
+        self._scheduler = JobScheduler(parent=self)
+        QGuiApplication.instance().aboutToQuit.connect(self._scheduler.shutdown)
+        self._queueJob = None
+        self._mergedQueueItems = []  # элементы с тем же входом, кодируемые вместе с текущим
+        self._queueStderrTail = ""  # хвост stderr текущего запуска очереди
+        self._verifyGeneration = 0  # номер запуска очереди: устаревшие итоги проверки выходов отбрасываются
+        self._audioBatchPages = {}  # ключ страницы ("v2a"/"a2a") -> пакетный список файлов
+        self._preflightPending = set()  # id(QueueItem), ожидающих итога пробного прогона
+        self._preflightFailures = []
+        self._preflightTotal = 0
+        self._outputNameTemplate = OUTPUT_NAME_TEMPLATE
+        self._watchdogStallSec = WATCHDOG_STALL_SEC
+        self._watchdogMaxRetries = WATCHDOG_MAX_RETRIES
+        self._stagingDir = STAGING_DIR
+        self._inputPrefetchMode = INPUT_PREFETCH_MODE
+        self._inputPrefetchCount = INPUT_PREFETCH_COUNT
+        self._inputPrefetchBudgetGb = INPUT_PREFETCH_BUDGET_GB
+        self._inputPrefetchDir = ""
+        self._inputPrefetch = None  # InputPrefetchCache, создаётся при первом использовании
         self.currentQueueIndex = -1  # Индекс текущего обрабатываемого файла
         self.selectedQueueIndex = -1  # Индекс выделенного файла в таблице
         
@@ -112,11 +173,19 @@ class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewM
         self._queueProgressTimer = QTimer(self)
         self._queueProgressTimer.timeout.connect(self._tickQueueProgress)
         self._suppressPresetEditorUpdates = False
+        self._pendingPresetEditorItems = []
+        self._presetEditorApplyTimer = QTimer(self)
+        self._presetEditorApplyTimer.setSingleShot(True)
+        self._presetEditorApplyTimer.setInterval(PRESET_EDITOR_APPLY_DELAY_MS)
+        self._presetEditorApplyTimer.timeout.connect(self._onPresetEditorApplyTimeout)
         self._etaDelaySeconds = ETA_DELAY_SECONDS
         self._etaSmoothingAlpha = ETA_SMOOTHING_ALPHA
         self._etaStartTs = None
         self._emaSpeed = None
         self._speedSampleCount = 0
+        self._etaCalibration = 1.0  # фактическая скорость / прогноз по истории в текущем запуске очереди
+        self._etaRefreshPending = False
+        self._lastEtaForecast = ""
         
         # Переменные для прогресса кодирования
         self.encodingProgress = 0
@@ -179,6 +248,33 @@ class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewM
             self.ui.QueueUp.clicked.connect(self.moveQueueItemUp)
         if hasattr(self.ui, 'QueueDown'):
             self.ui.QueueDown.clicked.connect(self.moveQueueItemDown)
+        if hasattr(self.ui, 'queueButtonsLayout'):
+            self._renditionsButton = QPushButton("Лесенка...")
+            self._renditionsButton.setToolTip(
+                "Несколько выходов выделенного файла из разных пресетов (например, 1080p/720p/480p) за одно декодирование."
+            )
+            self._renditionsButton.clicked.connect(self.editQueueItemRenditions)
+            self.ui.queueButtonsLayout.insertWidget(2, self._renditionsButton, 2)
+            self._destinationsButton = QPushButton("Куда ещё...")
+            self._destinationsButton.setToolTip(
+                "Дополнительные папки (и контейнеры) для результата выделенного файла: кодирование одно, запись во все места сразу."
+            )
+            self._destinationsButton.clicked.connect(self.editQueueItemDestinations)
+            self.ui.queueButtonsLayout.insertWidget(3, self._destinationsButton, 2)
+            self._preflightButton = QPushButton("Пробный прогон")
+            self._preflightButton.setToolTip(
+                "Параллельно прогоняет команду каждого файла несколько секунд без записи результата "
+                "и собирает ошибки до запуска настоящего кодирования."
+            )
+            self._preflightButton.clicked.connect(self.startQueuePreflight)
+            self.ui.queueButtonsLayout.insertWidget(4, self._preflightButton, 2)
+            self._statsButton = QPushButton("Статистика...")
+            self._statsButton.setToolTip(
+                "Время, скорость, загрузка ЦП, память и размеры последнего запуска выделенного файла "
+                "и история всех запусков с экспортом в CSV."
+            )
+            self._statsButton.clicked.connect(lambda: self.showQueueItemStats())
+            self.ui.queueButtonsLayout.insertWidget(5, self._statsButton, 2)
         
         # Кнопки управления командой
         if hasattr(self.ui, 'commandDisplay'):
@@ -251,11 +347,6 @@ class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewM
         if hasattr(self.ui, 'pauseResumeButton'):
             self.ui.pauseResumeButton.clicked.connect(self.togglePauseEncoding)
 
-        self.ffmpegProcess.readyReadStandardOutput.connect(self.readProcessOutput)
-        self.ffmpegProcess.readyReadStandardError.connect(self.readProcessOutput)
-        self.ffmpegProcess.finished.connect(self.processFinished)
-        self.ffmpegProcess.errorOccurred.connect(self.onProcessError)
-        
         # Таймер для обновления времени видео
         self.videoUpdateTimer = QTimer(self)
         self.videoUpdateTimer.timeout.connect(self.updateVideoTime)
@@ -280,75 +371,56 @@ class MainWindow(QueueUIMixin, EncodingMixin, PresetEditorUIMixin, VideoPreviewM
 
         self._warnIfConfigPathNotWritable()
         self._checkToolsAvailability()
+        self._loadFfmpegCapabilities()
+        self._loadThroughputModel()
 
     def closeEvent(self, event: QCloseEvent):
-        """При закрытии во время кодирования — предупреждение и удаление битого файла при подтверждении."""
+        """При закрытии во время кодирования — предупреждение и удаление битых файлов при подтверждении."""
         self._saveAppConfig()
-        v2a = getattr(self, "_v2aProcess", None)
-        if v2a and v2a.state() != QProcess.NotRunning:
-            reply = QMessageBox.question(
-                self,
-                "Завершить программу?",
-                "Идёт конвертация «Видео в аудио». Вы уверены, что хотите завершить программу?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            if reply == QMessageBox.Yes:
-                v2a.kill()
-                path = getattr(self, "_v2aLastOutputPath", "")
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                event.accept()
-            else:
-                event.ignore()
-            return
-        a2a = getattr(self, "_a2aProcess", None)
-        if a2a and a2a.state() != QProcess.NotRunning:
-            reply = QMessageBox.question(
-                self,
-                "Завершить программу?",
-                "Идёт конвертация «Аудио конвертер». Вы уверены, что хотите завершить программу?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            if reply == QMessageBox.Yes:
-                a2a.kill()
-                path = getattr(self, "_a2aLastOutputPath", "")
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                event.accept()
-            else:
-                event.ignore()
+        self._resultCache.flush()
+        self._sizeHistory.flush()
+        labels = [job.label for job in self._scheduler.activeJobs() if job.label]
+        queue_active = 0 <= self.currentQueueIndex < len(self.queue)
+        if queue_active and not self._scheduler.activeJobs(Job.LANE_QUEUE):
+            labels.append("кодирование очереди")
+        if not labels:
+            self._clearInputPrefetch()
+            event.accept()
             return
-        if self.currentQueueIndex >= 0 and self.currentQueueIndex < len(self.queue):
-            reply = QMessageBox.question(
-                self,
-                "Завершить программу?",
-                "У вас ещё перекодируются файлы. Вы уверены, что хотите завершить программу?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            if reply == QMessageBox.Yes:
-                self._closingApp = True
-                if self.ffmpegProcess.state() == QProcess.Running:
-                    self.ffmpegProcess.kill()
-                item = self.queue[self.currentQueueIndex]
-                try:
-                    if item.output_file and os.path.exists(item.output_file):
-                        os.remove(item.output_file)
-                except Exception:
-                    pass
-                event.accept()
-            else:
-                event.ignore()
+        labels = list(dict.fromkeys(labels))
+        if labels == ["кодирование очереди"]:
+            text = "У вас ещё перекодируются файлы. Вы уверены, что хотите завершить программу?"
         else:
-            event.accept()
+            text = "Ещё выполняется: " + ", ".join(labels) + ".\nВы уверены, что хотите завершить программу?"
+        reply = QMessageBox.question(
+            self,
+            "Завершить программу?",
+            text,
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            event.ignore()
+            return
+        self._closingApp = True
+        running = self._scheduler.runningJobs()
+        self._scheduler.shutdown()
+        for job in running:
+            for path in job.output_paths:
+                self._removeOutputFile(path)
+        self._clearInputPrefetch()
+        event.accept()
+
+    def _clearInputPrefetch(self):
+        """Удаляет локальные копии входов очереди (упреждающее чтение)."""
+        if self._inputPrefetch is not None:
+            self._inputPrefetch.setInUse([])
+            self._inputPrefetch.clear()
+
+    def _onDirectoryListed(self, directory, names):
+        """Содержимое папки прочитано в фоне — передаём его в кэш выходных имён."""
+        if names is not None:
+            self._outputNames.primeDirectory(directory, names)
 
     def updateStatus(self, status_text):
         """Обновляет статус в статусбаре"""
@@ -1,17 +1,27 @@
 # -*- coding: utf-8 -*-
-"""Миксины главного окна: очередь, кодирование, пресеты, предпросмотр, аудио-страницы, конфиг."""
+"""Миксины главного окна: очередь, кодирование, свободное место, метрики запусков, прогноз времени, пробный прогон, пресеты, предпросмотр, аудио-страницы, пакетное аудио, конфиг."""
 from mixins.queue_ui import QueueUIMixin
 from mixins.encoding_process import EncodingMixin
+from mixins.disk_space import DiskSpaceMixin
+from mixins.queue_metrics import QueueMetricsMixin
+from mixins.queue_eta import QueueEtaMixin
+from mixins.queue_preflight import QueuePreflightMixin
 from mixins.preset_editor_ui import PresetEditorUIMixin
 from mixins.video_preview import VideoPreviewMixin
 from mixins.audio_pages import AudioPagesMixin
+from mixins.audio_batch import AudioBatchMixin
 from mixins.config_warnings import ConfigWarningsMixin
 
 __all__ = [
     "QueueUIMixin",
     "EncodingMixin",
+    "DiskSpaceMixin",
+    "QueueMetricsMixin",
+    "QueueEtaMixin",
+    "QueuePreflightMixin",
     "PresetEditorUIMixin",
     "VideoPreviewMixin",
     "AudioPagesMixin",
+    "AudioBatchMixin",
     "ConfigWarningsMixin",
 ]
@@ -0,0 +1,386 @@
+"""Миксин: пакетная конвертация на страницах «Видео в аудио» и «Аудио конвертер» (несколько файлов или папка)."""
+
+import os
+from PySide6.QtWidgets import (
+    QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QProgressBar, QFileDialog, QMessageBox,
+)
+from PySide6.QtCore import QProcess
+
+from app.constants import STYLE_CONVERT_BUTTON, PROGRESS_MIN, PROGRESS_MAX, AUDIO_JOB_CORES
+from models.queueitem import QueueItem
+from models.job_scheduler import Job, limitThreads
+
+
+def _scanAudioInputs(paths, exts):
+    """Выполняется в рабочем потоке: раскрывает папки (рекурсивно) и оставляет файлы с расширениями exts."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in exts:
+                        found.append(os.path.join(root, name))
+        elif os.path.isfile(path) and os.path.splitext(path)[1].lower() in exts:
+            found.append(path)
+    return found
+
+
+class AudioBatchEntry:
+    """Файл пакетной конвертации. status принимает значения QueueItem.STATUS_*."""
+
+    def __init__(self, input_path):
+        self.input_path = input_path
+        self.output_path = ""
+        self.output_paths = []  # все выходы (несколько — при извлечении всех дорожек)
+        self.status = QueueItem.STATUS_WAITING
+        self.progress = 0
+        self.duration = 0.0  # по ffprobe; 0 — неизвестна
+        self.preparing = False  # выходное имя выдано, ждём ffprobe перед постановкой задания
+        self.error_message = ""
+        self.last_error = ""
+        self.job = None
+
+
+class _AudioBatchPage:
+    """Состояние пакетного режима одной страницы: файлы и виджеты."""
+
+    def __init__(self, key, title, exts):
+        self.key = key
+        self.title = title
+        self.exts = {ext.lower() for ext in exts}
+        self.entries = []
+        self.running = False
+        self.table = None
+        self.progressBar = None
+        self.summaryLabel = None
+        self.convertBtn = None
+        self.cancelBtn = None
+        self.editButtons = []
+
+
+class AudioBatchMixin:
+    """Миксин: список входных файлов на страницах аудио и их параллельная конвертация через планировщик.
+
+    Формат и качество берутся с той же страницы (_v2aGetFormat/_a2aGetFormat и т.д.); каждое
+    задание занимает AUDIO_JOB_CORES ядер, поэтому число одновременных конвертаций растёт с числом ядер.
+    """
+
+    def _createAudioBatchSection(self, key, title, exts, parent):
+        batch = _AudioBatchPage(key, title, exts)
+        self._audioBatchPages[key] = batch
+
+        box = QGroupBox("Несколько файлов или папка", parent)
+        layout = QVBoxLayout(box)
+
+        add_row = QHBoxLayout()
+        add_files_btn = QPushButton("Добавить файлы...")
+        add_files_btn.clicked.connect(lambda: self._audioBatchBrowseFiles(key))
+        add_row.addWidget(add_files_btn)
+        add_folder_btn = QPushButton("Добавить папку...")
+        add_folder_btn.clicked.connect(lambda: self._audioBatchBrowseFolder(key))
+        add_row.addWidget(add_folder_btn)
+        clear_btn = QPushButton("Очистить список")
+        clear_btn.clicked.connect(lambda: self._audioBatchClear(key))
+        add_row.addWidget(clear_btn)
+        add_row.addStretch()
+        layout.addLayout(add_row)
+        batch.editButtons = [add_files_btn, add_folder_btn, clear_btn]
+
+        table = QTableWidget(0, 2, box)
+        table.setHorizontalHeaderLabels(["Файл", "Статус"])
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.cellDoubleClicked.connect(lambda row, _col: self._audioBatchOpenResult(key, row))
+        layout.addWidget(table)
+        batch.table = table
+
+        progress_row = QHBoxLayout()
+        batch.progressBar = QProgressBar()
+        batch.progressBar.setRange(PROGRESS_MIN, PROGRESS_MAX)
+        batch.progressBar.setValue(PROGRESS_MIN)
+        progress_row.addWidget(batch.progressBar)
+        batch.summaryLabel = QLabel("")
+        progress_row.addWidget(batch.summaryLabel)
+        layout.addLayout(progress_row)
+
+        btn_row = QHBoxLayout()
+        batch.convertBtn = QPushButton("Конвертировать все")
+        batch.convertBtn.setStyleSheet(STYLE_CONVERT_BUTTON)
+        batch.convertBtn.clicked.connect(lambda: self._audioBatchStart(key))
+        btn_row.addWidget(batch.convertBtn)
+        batch.cancelBtn = QPushButton("Отменить")
+        batch.cancelBtn.setEnabled(False)
+        batch.cancelBtn.clicked.connect(lambda: self._audioBatchCancel(key))
+        btn_row.addWidget(batch.cancelBtn)
+        btn_row.addStretch()
+        layout.addLayout(btn_row)
+
+        self._audioBatchRefresh(key)
+        return box
+
+    # --- Список файлов ---
+
+    def _audioBatchBrowseFiles(self, key):
+        batch = self._audioBatchPages[key]
+        patterns = " ".join("*" + ext for ext in sorted(batch.exts))
+        files, _ = QFileDialog.getOpenFileNames(self, "Выберите файлы", "", f"Файлы ({patterns});;Все файлы (*.*)")
+        if files:
+            self._audioBatchAddPaths(key, files)
+
+    def _audioBatchBrowseFolder(self, key):
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку")
+        if folder:
+            self._audioBatchAddPaths(key, [folder])
+
+    def _audioBatchAddPaths(self, key, paths):
+        """Добавляет файлы и содержимое папок; обход папок — в фоне."""
+        batch = self._audioBatchPages[key]
+        paths = [p for p in paths if p]
+        if not paths:
+            return
+        batch.summaryLabel.setText("Поиск файлов...")
+        self._fs.submit(_scanAudioInputs, paths, batch.exts, callback=lambda found: self._audioBatchOnScanned(key, found))
+
+    def _audioBatchOnScanned(self, key, found):
+        batch = self._audioBatchPages[key]
+        known = {os.path.normcase(os.path.normpath(e.input_path)) for e in batch.entries}
+        for path in found or []:
+            norm = os.path.normcase(os.path.normpath(path))
+            if norm in known:
+                continue
+            known.add(norm)
+            batch.entries.append(AudioBatchEntry(path))
+        self._audioBatchRefresh(key)
+
+    def _audioBatchClear(self, key):
+        batch = self._audioBatchPages[key]
+        if batch.running:
+            return
+        for entry in batch.entries:
+            self._outputNames.release(entry)
+        batch.entries = []
+        self._audioBatchRefresh(key)
+
+    def _audioBatchOpenResult(self, key, row):
+        batch = self._audioBatchPages[key]
+        if 0 <= row < len(batch.entries):
+            entry = batch.entries[row]
+            if entry.status == QueueItem.STATUS_SUCCESS and entry.output_path:
+                self._openFolderOrSelectFile(entry.output_path)
+
+    def _audioBatchRefresh(self, key):
+        """Перерисовывает таблицу, общий прогресс и доступность кнопок."""
+        batch = self._audioBatchPages[key]
+        table = batch.table
+        table.setUpdatesEnabled(False)
+        try:
+            table.setRowCount(len(batch.entries))
+            for row, entry in enumerate(batch.entries):
+                self._audioBatchSetRow(batch, row, entry)
+        finally:
+            table.setUpdatesEnabled(True)
+        self._audioBatchUpdateProgress(key)
+        for btn in batch.editButtons:
+            btn.setEnabled(not batch.running)
+        batch.convertBtn.setEnabled(not batch.running and bool(batch.entries))
+        batch.cancelBtn.setEnabled(batch.running)
+
+    def _audioBatchSetRow(self, batch, row, entry):
+        texts = (
+            os.path.basename(entry.input_path),
+            self._audioBatchStatusText(entry),
+        )
+        tooltips = (entry.input_path, entry.error_message or "\n".join(entry.output_paths or [entry.output_path]))
+        for col, (text, tooltip) in enumerate(zip(texts, tooltips)):
+            cell = batch.table.item(row, col)
+            if cell is None:
+                cell = QTableWidgetItem()
+                batch.table.setItem(row, col, cell)
+            if cell.text() != text:
+                cell.setText(text)
+            if cell.toolTip() != (tooltip or ""):
+                cell.setToolTip(tooltip or "")
+
+    def _audioBatchStatusText(self, entry):
+        text = QueueItem.STATUS_LABELS.get(entry.status, entry.status)
+        if entry.status == QueueItem.STATUS_PROCESSING and entry.progress:
+            text += f" {entry.progress}%"
+        return text
+
+    def _audioBatchUpdateProgress(self, key):
+        batch = self._audioBatchPages[key]
+        total = len(batch.entries)
+        if not total:
+            batch.progressBar.setValue(PROGRESS_MIN)
+            batch.summaryLabel.setText("")
+            return
+        done = sum(1 for e in batch.entries if e.status in (QueueItem.STATUS_SUCCESS, QueueItem.STATUS_ERROR))
+        errors = sum(1 for e in batch.entries if e.status == QueueItem.STATUS_ERROR)
+        partial = sum(e.progress for e in batch.entries if e.status == QueueItem.STATUS_PROCESSING) / PROGRESS_MAX
+        batch.progressBar.setValue(int((done + partial) / total * PROGRESS_MAX))
+        summary = f"{done} из {total}"
+        if errors:
+            summary += f", ошибок: {errors}"
+        batch.summaryLabel.setText(summary)
+
+    # --- Конвертация ---
+
+    def _audioBatchStart(self, key):
+        batch = self._audioBatchPages[key]
+        if batch.running or not batch.entries:
+            return
+        if hasattr(self, "_findTool") and not self._findTool("ffmpeg"):
+            QMessageBox.critical(self, batch.title, "Не удалось найти ffmpeg. Положите ffmpeg.exe рядом с приложением или добавьте в PATH.")
+            return
+        pending = [e for e in batch.entries if e.status != QueueItem.STATUS_SUCCESS]
+        if not pending:
+            QMessageBox.information(self, batch.title, "Все файлы списка уже сконвертированы.")
+            return
+        for entry in pending:
+            entry.status = QueueItem.STATUS_WAITING
+            entry.progress = 0
+            entry.error_message = ""
+        batch.running = True
+        self._audioBatchRefresh(key)
+        # Папки вывода читаются в фоне, затем выходные имена выдаются без обращений к диску
+        directories = [os.path.dirname(os.path.normpath(e.input_path)) for e in pending]
+        self._fs.statMany([], lambda _stats: self._audioBatchSubmit(key, pending), directories=directories)
+
+    def _audioBatchSubmit(self, key, entries):
+        batch = self._audioBatchPages[key]
+        if not batch.running:
+            return
+        fmt = getattr(self, f"_{key}GetFormat")()
+        quality = getattr(self, f"_{key}GetQuality")()
+        for entry in entries:
+            entry.output_path = self._computeOutputPathForExtension(entry.input_path, fmt, owner=entry)
+            entry.preparing = True
+            # Кодек источника (для копирования без перекодирования) и длительность (для процентов) — из ffprobe
+            self._probeAudioSource(
+                entry.input_path,
+                lambda info, entry=entry: self._audioBatchSubmitEntry(key, entry, fmt, quality, info),
+            )
+        self._audioBatchRefresh(key)
+
+    def _audioBatchSubmitEntry(self, key, entry, fmt, quality, info):
+        batch = self._audioBatchPages[key]
+        if not entry.preparing or getattr(self, "_closingApp", False):
+            return  # отменено, пока шёл ffprobe
+        entry.preparing = False
+        entry.duration = (info or {}).get("duration", 0.0) or 0.0
+        all_tracks = key == "v2a" and self._v2aAllTracksCheck.isChecked()
+        if all_tracks:
+            outputs = self._planAudioOutputs(entry, entry.input_path, fmt, info, all_tracks=True)
+        else:
+            streams = self._audioStreams(info)
+            outputs = [(streams[0] if streams else None, entry.output_path)]
+        entry.output_paths = [path for _, path in outputs]
+        entry.output_path = entry.output_paths[0]
+        args = self._buildAudioOutputsArgs(entry.input_path, outputs, fmt, quality)
+        ffmpeg_exec = self._getToolPath("ffmpeg") if hasattr(self, "_getToolPath") else "ffmpeg"
+        job = Job(
+            ffmpeg_exec, limitThreads(args, AUDIO_JOB_CORES),
+            lane=Job.LANE_BATCH, cores=AUDIO_JOB_CORES,
+            label=f"пакетная конвертация «{batch.title}»", output_paths=entry.output_paths,
+        )
+        job.on_started = lambda _job: self._audioBatchJobStarted(key, entry)
+        job.on_output = lambda job, out, err: self._audioBatchJobOutput(key, entry, job, err)
+        job.on_finished = lambda _job, code, status: self._audioBatchJobFinished(key, entry, code)
+        job.on_error = lambda _job, error: self._audioBatchJobError(key, entry, error)
+        entry.job = self._scheduler.submit(job)
+
+    def _audioBatchJobStarted(self, key, entry):
+        entry.status = QueueItem.STATUS_PROCESSING
+        entry.last_error = ""
+        self._audioBatchRefreshEntry(key, entry)
+
+    def _audioBatchJobOutput(self, key, entry, job, err):
+        if err:
+            entry.last_error = (entry.last_error + err)[-4000:]
+        percent = self._audioProgressPercent(job, entry.duration)
+        if percent is not None and percent != entry.progress:
+            entry.progress = percent
+            self._audioBatchRefreshEntry(key, entry)
+
+    def _audioBatchJobFinished(self, key, entry, exitCode):
+        if getattr(self, "_closingApp", False):
+            return
+        cancelled = entry.job is not None and entry.job.cancelRequested
+        entry.job = None
+        if cancelled:
+            entry.status = QueueItem.STATUS_WAITING
+            entry.progress = 0
+            for path in entry.output_paths:
+                self._removeOutputFile(path)
+        elif exitCode == 0:
+            entry.status = QueueItem.STATUS_SUCCESS
+            entry.progress = PROGRESS_MAX
+            for path in entry.output_paths:
+                self._outputNames.markExisting(path)
+        else:
+            entry.status = QueueItem.STATUS_ERROR
+            lines = [line for line in (entry.last_error or "").strip().splitlines() if line.strip()]
+            entry.error_message = lines[-1] if lines else f"Код завершения: {exitCode}"
+            for path in entry.output_paths:
+                self._removeOutputFile(path)
+        self._audioBatchRefreshEntry(key, entry)
+        self._audioBatchCheckDone(key)
+
+    def _audioBatchJobError(self, key, entry, error):
+        if getattr(self, "_closingApp", False):
+            return
+        if error != QProcess.ProcessError.FailedToStart:
+            return  # остальные ошибки завершатся через finished
+        entry.job = None
+        entry.status = QueueItem.STATUS_ERROR
+        entry.error_message = "Не удалось запустить FFmpeg."
+        self._audioBatchRefreshEntry(key, entry)
+        self._audioBatchCheckDone(key)
+
+    def _audioBatchRefreshEntry(self, key, entry):
+        batch = self._audioBatchPages[key]
+        try:
+            row = batch.entries.index(entry)
+        except ValueError:
+            return
+        self._audioBatchSetRow(batch, row, entry)
+        self._audioBatchUpdateProgress(key)
+
+    def _audioBatchCheckDone(self, key):
+        batch = self._audioBatchPages[key]
+        if not batch.running or any(e.preparing or (e.job is not None and e.job.isActive) for e in batch.entries):
+            return
+        batch.running = False
+        self._audioBatchRefresh(key)
+        done = sum(1 for e in batch.entries if e.status == QueueItem.STATUS_SUCCESS)
+        errors = sum(1 for e in batch.entries if e.status == QueueItem.STATUS_ERROR)
+        if done or errors:
+            msg = f"Конвертация завершена. Успешно: {done}"
+            if errors:
+                msg += f", с ошибкой: {errors} (подробности — в подсказке к статусу)"
+            QMessageBox.information(self, batch.title, msg)
+
+    def _audioBatchCancel(self, key):
+        batch = self._audioBatchPages[key]
+        if not batch.running:
+            return
+        for entry in batch.entries:
+            if entry.preparing:
+                entry.preparing = False
+                continue
+            job = entry.job
+            if job is None:
+                continue
+            was_pending = job.state == Job.STATE_PENDING
+            self._scheduler.cancel(job)
+            if was_pending:
+                entry.job = None
+                entry.status = QueueItem.STATUS_WAITING
+        # Выполняющиеся процессы завершатся через finished и вернут файлы в ожидание
+        self._audioBatchRefresh(key)
+        self._audioBatchCheckDone(key)
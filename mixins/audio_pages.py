@@ -1,64 +1,149 @@
 """Миксин: вкладки «Видео в аудио» и «Аудио конвертер»."""
 
 import os
+import stat
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QFileDialog, QMessageBox, QButtonGroup, QProgressBar,
+    QFileDialog, QMessageBox, QButtonGroup, QProgressBar, QCheckBox,
 )
-from PySide6.QtCore import QProcess
 
 from app.constants import (
-    AUDIO_FORMATS, AUDIO_QUALITY_OPTIONS, AUDIO_CODEC_MAP,
-    STYLE_CONVERT_BUTTON, PROGRESS_MIN, PROGRESS_MAX,
+    AUDIO_FORMATS, AUDIO_QUALITY_OPTIONS, AUDIO_CODEC_MAP, AUDIO_COPY_COMPATIBLE,
+    STYLE_CONVERT_BUTTON, PROGRESS_MIN, PROGRESS_MAX, AUDIO_JOB_CORES,
+    V2A_INPUT_EXTS, A2A_INPUT_EXTS,
 )
+from models.job_scheduler import Job, limitThreads
 from widgets import FileDropArea
 
 
 class AudioPagesMixin:
     """Миксин: страницы «Видео в аудио» и «Аудио конвертер» — один файл, конвертация в аудио."""
 
-    def _probeHasAudioStream(self, input_path):
-        """Проверяет наличие аудиопотока через ffprobe. Возвращает True/False/None."""
-        if not input_path or not os.path.isfile(input_path):
-            return None
-        if not hasattr(self, "_findTool") or not self._findTool("ffprobe"):
-            return None
-        ffprobe_exec = self._getToolPath("ffprobe") if hasattr(self, "_getToolPath") else "ffprobe"
-        args = ["-v", "error", "-show_entries", "stream=codec_type", "-of", "json", os.path.normpath(input_path)]
-        proc = QProcess()
-        proc.start(ffprobe_exec, args)
-        if not proc.waitForFinished(4000):
-            try:
-                proc.kill()
-            except Exception:
-                pass
-            return None
-        if proc.exitStatus() != QProcess.ExitStatus.NormalExit or proc.exitCode() != 0:
-            return None
-        raw = proc.readAllStandardOutput().data()
-        text = raw.decode("utf-8", errors="replace") if raw else ""
-        if not text:
-            return None
-        try:
-            import json
-            data = json.loads(text)
-            streams = data.get("streams") or []
-            return any(s.get("codec_type") == "audio" for s in streams)
-        except Exception:
+    def _probeAudioSource(self, input_path, callback):
+        """Данные ffprobe (длительность, потоки) в фоне через общий ProbeStore; callback(info | None) — в потоке GUI."""
+        if not input_path:
+            callback(None)
+            return
+        self._fs.submit(
+            self._probeStore.probe, self._ffprobeExecutable(), os.path.normpath(input_path), callback=callback
+        )
+
+    def _resetAudioProgress(self, bar, duration):
+        """Готовит полосу прогресса: проценты при известной длительности, иначе — индикатор занятости."""
+        bar.setVisible(True)
+        if duration and duration > 0:
+            bar.setRange(PROGRESS_MIN, PROGRESS_MAX)
+            bar.setValue(PROGRESS_MIN)
+            bar.setFormat("%p%")
+        else:
+            bar.setRange(0, 0)
+
+    def _audioProgressPercent(self, job, duration):
+        """Процент выполнения по out_time из -progress; None, если длительность неизвестна."""
+        if not duration or duration <= 0 or job is None:
             return None
+        return max(PROGRESS_MIN, min(PROGRESS_MAX, int(job.out_time_sec / duration * PROGRESS_MAX)))
 
-    def _computeOutputPathForExtension(self, input_path, ext):
-        """Строит выходной путь: та же папка, то же имя с новым расширением; при коллизии добавляет (1), (2)…"""
+    def _updateAudioProgress(self, bar, job, duration):
+        """Проценты, скорость и оставшееся время конвертации на полосе прогресса страницы."""
+        percent = self._audioProgressPercent(job, duration)
+        if percent is None:
+            return
+        bar.setValue(percent)
+        text = f"{percent}%"
+        if job.speed > 0:
+            remaining = max(0.0, duration - job.out_time_sec) / job.speed
+            text += f" — {job.speed:.1f}x, осталось: {self._formatTime(remaining)}"
+        bar.setFormat(text)
+
+    def _computeOutputPathForExtension(self, input_path, ext, owner=None):
+        """Строит выходной путь: та же папка, то же имя с новым расширением; при коллизии добавляет (1), (2)…
+
+        Имя резервируется за owner (страницей), чтобы его не заняли элементы очереди.
+        """
         if not input_path or not ext:
             return ""
         base = os.path.splitext(os.path.basename(input_path))[0]
         dir_path = os.path.dirname(input_path)
-        out_path = os.path.normpath(os.path.join(dir_path, base + "." + ext))
-        counter = 0
-        while os.path.exists(out_path):
-            counter += 1
-            out_path = os.path.normpath(os.path.join(dir_path, f"{base} ({counter})." + ext))
-        return out_path
+        if owner is not None:
+            self._outputNames.release(owner)
+        return self._outputNames.allocate(owner, dir_path, base, ext, suffix=" ({n})")
+
+    def _audioStreams(self, source_info):
+        """Аудиопотоки из данных ffprobe в порядке следования в файле."""
+        streams = (source_info or {}).get("streams") or []
+        return [st for st in streams if st.get("codec_type") == "audio"]
+
+    def _audioCodecArgs(self, stream, fmt, quality):
+        """-c:a для одного выхода: copy, если кодек потока stream подходит контейнеру fmt и выбрано «copy»."""
+        codec_name = ((stream or {}).get("codec_name") or "").lower()
+        if quality == "copy" and codec_name in AUDIO_COPY_COMPATIBLE.get(fmt, ()):
+            return ["-c:a", "copy"]
+        args = ["-c:a", AUDIO_CODEC_MAP.get(fmt, "libmp3lame")]
+        if quality != "copy":
+            args.extend(["-b:a", quality + "k"])
+        return args
+
+    def _planAudioOutputs(self, owner, input_path, fmt, source_info, all_tracks=False):
+        """Выходы конвертации: список (поток ffprobe | None, путь). Имена резервируются за owner.
+
+        При all_tracks и нескольких аудиопотоках — отдельный файл на каждую дорожку:
+        «имя_track2_eng.ext» (номер дорожки и язык из тегов).
+        """
+        streams = self._audioStreams(source_info)
+        if not all_tracks or len(streams) < 2:
+            return [(streams[0] if streams else None, self._computeOutputPathForExtension(input_path, fmt, owner=owner))]
+        self._outputNames.release(owner)
+        base = os.path.splitext(os.path.basename(input_path))[0]
+        dir_path = os.path.dirname(input_path)
+        outputs = []
+        for number, stream in enumerate(streams, start=1):
+            stem = f"{base}_track{number}"
+            language = ((stream.get("tags") or {}).get("language") or "").strip()
+            if language and language.lower() != "und":
+                stem += f"_{language}"
+            outputs.append((stream, self._outputNames.allocate(owner, dir_path, stem, fmt, suffix=" ({n})")))
+        return outputs
+
+    def _buildAudioArgs(self, input_path, output_path, fmt, quality, source_info=None):
+        """Аргументы ffmpeg для извлечения/перекодирования аудио в формат fmt с качеством quality.
+
+        При качестве «copy» и совместимом кодеке источника (по данным ffprobe source_info)
+        поток копируется как есть: без перекодирования и потери качества.
+        """
+        streams = self._audioStreams(source_info)
+        return self._buildAudioOutputsArgs(input_path, [(streams[0] if streams else None, output_path)], fmt, quality)
+
+    def _buildAudioOutputsArgs(self, input_path, outputs, fmt, quality):
+        """Один запуск ffmpeg на несколько выходов (поток, путь): вход читается и демультиплексируется один раз."""
+        # Машиночитаемый прогресс (out_time=, speed=) — в stdout, в stderr остаются только сообщения и ошибки
+        args = ["-y", "-nostats", "-progress", "pipe:1", "-i", os.path.normpath(input_path)]
+        for stream, output_path in outputs:
+            codec_args = self._audioCodecArgs(stream, fmt, quality)
+            if len(outputs) > 1 and stream is not None:
+                args.extend(["-map", f"0:{stream.get('index')}"])
+            elif codec_args[1] == "copy":
+                # Явно берём тот поток, кодек которого проверили
+                args.extend(["-map", "0:a:0"])
+            args.append("-vn")
+            args.extend(codec_args)
+            args.append(os.path.normpath(output_path))
+        return args
+
+    def _submitAudioJob(self, args, output_paths, label, on_output, on_finished, on_error):
+        """Ставит одиночную конвертацию в планировщик — в приоритетную полосу, на AUDIO_JOB_CORES ядер.
+
+        on_output(job, stdout_text, stderr_text), on_finished(exit_code, exit_status), on_error(error).
+        """
+        ffmpeg_exec = self._getToolPath("ffmpeg") if hasattr(self, "_getToolPath") else "ffmpeg"
+        job = Job(
+            ffmpeg_exec, limitThreads(args, AUDIO_JOB_CORES),
+            lane=Job.LANE_INTERACTIVE, cores=AUDIO_JOB_CORES, label=label, output_paths=list(output_paths),
+        )
+        job.on_output = on_output
+        job.on_finished = lambda _job, code, status: on_finished(code, status)
+        job.on_error = lambda _job, error: on_error(error)
+        return self._scheduler.submit(job)
 
     def _createVideoToAudioPage(self):
         """Создаёт страницу «Перекодировать видео в аудио». Минимальный функционал: один файл, без очереди."""
@@ -70,8 +155,10 @@ class AudioPagesMixin:
         title.setStyleSheet("font-weight: bold; font-size: 14px;")
         layout.addWidget(title)
 
-        v2a_exts = {".mp4", ".mkv", ".avi", ".mov", ".flv", ".wmv", ".webm"}
-        self._v2aDropArea = FileDropArea(self._v2aBrowseInput, self._v2aSetInputPath, v2a_exts, page)
+        self._v2aDropArea = FileDropArea(
+            self._v2aBrowseInput, self._v2aSetInputPath, V2A_INPUT_EXTS, page, fs=self._fs,
+            on_drop_many=lambda paths: self._audioBatchAddPaths("v2a", paths),
+        )
         layout.addWidget(self._v2aDropArea)
 
         input_row = QHBoxLayout()
@@ -122,6 +209,12 @@ class AudioPagesMixin:
         self._v2aQualityGroup.buttonClicked.connect(lambda: self._v2aUpdateOutputPath())
         layout.addLayout(quality_row)
 
+        self._v2aAllTracksCheck = QCheckBox("Все аудиодорожки — отдельный файл на каждую")
+        self._v2aAllTracksCheck.setToolTip(
+            "Если в видео несколько дорожек (например, разные языки), все они извлекаются за один проход по файлу."
+        )
+        layout.addWidget(self._v2aAllTracksCheck)
+
         self._v2aProgressBar = QProgressBar()
         self._v2aProgressBar.setVisible(False)
         layout.addWidget(self._v2aProgressBar)
@@ -139,12 +232,12 @@ class AudioPagesMixin:
         layout.addLayout(btn_row)
 
         self._v2aLastOutputPath = ""
+        self._v2aLastOutputPaths = []  # все выходы последней конвертации (по одному на дорожку)
         self._v2aLastError = ""
-        self._v2aProcess = QProcess(self)
-        self._v2aProcess.finished.connect(self._v2aProcessFinished)
-        self._v2aProcess.errorOccurred.connect(self._v2aProcessError)
-        self._v2aProcess.readyReadStandardError.connect(self._v2aReadProcessOutput)
-        self._v2aProcess.readyReadStandardOutput.connect(self._v2aReadProcessOutput)
+        self._v2aJob = None  # Job планировщика для текущей конвертации
+        self._v2aDuration = 0.0  # длительность входа по ffprobe (0 — неизвестна, прогресс без процентов)
+
+        layout.addWidget(self._createAudioBatchSection("v2a", "Видео в аудио", V2A_INPUT_EXTS, page))
 
         layout.addStretch()
         return page
@@ -176,79 +269,105 @@ class AudioPagesMixin:
         if not path:
             return
         self._v2aInputEdit.setText(path)
-        if hasattr(self, "_v2aInputCheck"):
-            self._v2aInputCheck.setVisible(os.path.isfile(path))
         self._v2aUpdateOutputPath()
         self._v2aOpenFolderBtn.setEnabled(False)
         self._v2aProgressBar.setVisible(False)
 
     def _v2aUpdateOutputPath(self):
         inp = self._v2aInputEdit.text().strip()
-        if not inp or not os.path.isfile(inp):
+        if not inp:
+            self._v2aApplyInputState(inp, None)
+            return
+        # Проверка файла и чтение папки — в фоне; результат применяется, если путь не сменился
+        self._fs.statMany(
+            [inp],
+            lambda stats, inp=inp: self._v2aApplyInputState(inp, stats.get(inp)),
+            directories=[os.path.dirname(inp)],
+        )
+
+    def _v2aApplyInputState(self, inp, st):
+        if inp != self._v2aInputEdit.text().strip():
+            return
+        is_file = st is not None and stat.S_ISREG(st.st_mode)
+        if hasattr(self, "_v2aInputCheck"):
+            self._v2aInputCheck.setVisible(is_file)
+        if not is_file:
             self._v2aOutputEdit.setText("")
-            if hasattr(self, "_v2aInputCheck"):
-                self._v2aInputCheck.setVisible(False)
             return
         ext = self._v2aGetFormat()
-        self._v2aOutputEdit.setText(self._computeOutputPathForExtension(inp, ext))
+        self._v2aOutputEdit.setText(self._computeOutputPathForExtension(inp, ext, owner="v2a"))
 
     def _v2aConvert(self):
         inp = self._v2aInputEdit.text().strip()
-        if not inp or not os.path.isfile(inp):
+        if not inp or self._fs.cachedIsFile(inp) is False:
             QMessageBox.warning(self, "Видео в аудио", "Выберите входной видеофайл.")
             return
         if hasattr(self, "_findTool") and not self._findTool("ffmpeg"):
             QMessageBox.critical(self, "Видео в аудио", "Не удалось найти ffmpeg. Положите ffmpeg.exe рядом с приложением или добавьте в PATH.")
             return
-        has_audio = self._probeHasAudioStream(inp)
-        if has_audio is False:
-            QMessageBox.warning(self, "Видео в аудио", "В выбранном видеофайле нет аудиодорожки.")
-            return
         out = self._v2aOutputEdit.text().strip()
         if not out:
-            self._v2aUpdateOutputPath()
-            out = self._v2aOutputEdit.text().strip()
+            out = self._computeOutputPathForExtension(inp, self._v2aGetFormat(), owner="v2a")
+            self._v2aOutputEdit.setText(out)
         if not out:
             QMessageBox.warning(self, "Видео в аудио", "Не удалось определить выходной файл.")
             return
-        fmt = self._v2aGetFormat()
-        quality = self._v2aGetQuality()
-        codec = AUDIO_CODEC_MAP.get(fmt, "libmp3lame")
-        args = ["-y", "-i", os.path.normpath(inp), "-vn", "-c:a", codec]
-        if quality != "copy":
-            args.extend(["-b:a", quality + "k"])
-        args.append(os.path.normpath(out))
-
         self._v2aConvertBtn.setEnabled(False)
         self._v2aLastError = ""
         self._v2aLastOutputPath = out
-        self._v2aProgressBar.setVisible(True)
-        self._v2aProgressBar.setRange(0, 0)
-        ffmpeg_exec = self._getToolPath("ffmpeg") if hasattr(self, "_getToolPath") else "ffmpeg"
-        self._v2aProcess.start(ffmpeg_exec, args)
+        self._resetAudioProgress(self._v2aProgressBar, 0)
+        # Длительность нужна для процентов и оставшегося времени; ffprobe — в фоне
+        self._probeAudioSource(inp, lambda info, inp=inp, out=out: self._v2aStartJob(inp, out, info))
 
-    def _v2aReadProcessOutput(self):
-        proc = getattr(self, "_v2aProcess", None)
-        if proc and proc == self.sender():
-            data = proc.readAllStandardError().data() + proc.readAllStandardOutput().data()
-            if data:
-                text = data.decode("utf-8", errors="replace")
-                self._v2aLastError = (self._v2aLastError + text)[-4000:]
+    def _v2aStartJob(self, inp, out, info):
+        if getattr(self, "_closingApp", False):
+            return
+        if info is not None and info.get("has_audio") is False:
+            self._v2aConvertBtn.setEnabled(True)
+            self._v2aProgressBar.setVisible(False)
+            QMessageBox.warning(self, "Видео в аудио", "В выбранном видеофайле нет аудиодорожки.")
+            return
+        self._v2aDuration = (info or {}).get("duration", 0.0)
+        fmt = self._v2aGetFormat()
+        if self._v2aAllTracksCheck.isChecked():
+            outputs = self._planAudioOutputs("v2a", inp, fmt, info, all_tracks=True)
+        else:
+            streams = self._audioStreams(info)
+            outputs = [(streams[0] if streams else None, out)]
+        self._v2aLastOutputPaths = [path for _, path in outputs]
+        self._v2aLastOutputPath = self._v2aLastOutputPaths[0]
+        args = self._buildAudioOutputsArgs(inp, outputs, fmt, self._v2aGetQuality())
+        self._resetAudioProgress(self._v2aProgressBar, self._v2aDuration)
+        self._v2aJob = self._submitAudioJob(
+            args, self._v2aLastOutputPaths, "конвертация «Видео в аудио»",
+            self._v2aReadProcessOutput, self._v2aProcessFinished, self._v2aProcessError,
+        )
+
+    def _v2aReadProcessOutput(self, job, out_text, err_text):
+        # stdout занят прогрессом -progress, для сообщения об ошибке храним только stderr
+        if err_text:
+            self._v2aLastError = (self._v2aLastError + err_text)[-4000:]
+        self._updateAudioProgress(self._v2aProgressBar, job, getattr(self, "_v2aDuration", 0.0))
 
     def _v2aProcessFinished(self, exitCode, exitStatus):
+        if getattr(self, "_closingApp", False):
+            return
         self._v2aConvertBtn.setEnabled(True)
         self._v2aProgressBar.setRange(PROGRESS_MIN, PROGRESS_MAX)
         self._v2aProgressBar.setValue(PROGRESS_MAX if exitCode == 0 else PROGRESS_MIN)
+        self._v2aProgressBar.setFormat("%p%")
         if exitCode == 0:
+            for path in self._v2aLastOutputPaths:
+                self._outputNames.markExisting(path)
             self._v2aOpenFolderBtn.setEnabled(True)
-            QMessageBox.information(self, "Видео в аудио", "Конвертация завершена.")
+            msg = "Конвертация завершена."
+            if len(self._v2aLastOutputPaths) > 1:
+                msg += f" Извлечено дорожек: {len(self._v2aLastOutputPaths)}."
+            QMessageBox.information(self, "Видео в аудио", msg)
         else:
             self._v2aOpenFolderBtn.setEnabled(False)
-            try:
-                if self._v2aLastOutputPath and os.path.exists(self._v2aLastOutputPath):
-                    os.remove(self._v2aLastOutputPath)
-            except Exception:
-                pass
+            for path in self._v2aLastOutputPaths:
+                self._removeOutputFile(path)
             details = (self._v2aLastError or "").strip()
             msg = "Ошибка конвертации."
             if details:
@@ -256,6 +375,8 @@ class AudioPagesMixin:
             QMessageBox.warning(self, "Видео в аудио", msg)
 
     def _v2aProcessError(self, error):
+        if getattr(self, "_closingApp", False):
+            return
         self._v2aConvertBtn.setEnabled(True)
         self._v2aProgressBar.setRange(PROGRESS_MIN, PROGRESS_MAX)
         self._v2aProgressBar.setValue(PROGRESS_MIN)
@@ -290,8 +411,10 @@ class AudioPagesMixin:
         title.setStyleSheet("font-weight: bold; font-size: 14px;")
         layout.addWidget(title)
 
-        a2a_exts = {".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus"}
-        self._a2aDropArea = FileDropArea(self._a2aBrowseInput, self._a2aSetInputPath, a2a_exts, page)
+        self._a2aDropArea = FileDropArea(
+            self._a2aBrowseInput, self._a2aSetInputPath, A2A_INPUT_EXTS, page, fs=self._fs,
+            on_drop_many=lambda paths: self._audioBatchAddPaths("a2a", paths),
+        )
         layout.addWidget(self._a2aDropArea)
 
         input_row = QHBoxLayout()
@@ -361,11 +484,10 @@ class AudioPagesMixin:
 
         self._a2aLastOutputPath = ""
         self._a2aLastError = ""
-        self._a2aProcess = QProcess(self)
-        self._a2aProcess.finished.connect(self._a2aProcessFinished)
-        self._a2aProcess.errorOccurred.connect(self._a2aProcessError)
-        self._a2aProcess.readyReadStandardError.connect(self._a2aReadProcessOutput)
-        self._a2aProcess.readyReadStandardOutput.connect(self._a2aReadProcessOutput)
+        self._a2aJob = None  # Job планировщика для текущей конвертации
+        self._a2aDuration = 0.0  # длительность входа по ffprobe (0 — неизвестна, прогресс без процентов)
+
+        layout.addWidget(self._createAudioBatchSection("a2a", "Аудио конвертер", A2A_INPUT_EXTS, page))
 
         layout.addStretch()
         return page
@@ -397,25 +519,37 @@ class AudioPagesMixin:
         if not path:
             return
         self._a2aInputEdit.setText(path)
-        if hasattr(self, "_a2aInputCheck"):
-            self._a2aInputCheck.setVisible(os.path.isfile(path))
         self._a2aUpdateOutputPath()
         self._a2aOpenFolderBtn.setEnabled(False)
         self._a2aProgressBar.setVisible(False)
 
     def _a2aUpdateOutputPath(self):
         inp = self._a2aInputEdit.text().strip()
-        if not inp or not os.path.isfile(inp):
+        if not inp:
+            self._a2aApplyInputState(inp, None)
+            return
+        # Проверка файла и чтение папки — в фоне; результат применяется, если путь не сменился
+        self._fs.statMany(
+            [inp],
+            lambda stats, inp=inp: self._a2aApplyInputState(inp, stats.get(inp)),
+            directories=[os.path.dirname(inp)],
+        )
+
+    def _a2aApplyInputState(self, inp, st):
+        if inp != self._a2aInputEdit.text().strip():
+            return
+        is_file = st is not None and stat.S_ISREG(st.st_mode)
+        if hasattr(self, "_a2aInputCheck"):
+            self._a2aInputCheck.setVisible(is_file)
+        if not is_file:
             self._a2aOutputEdit.setText("")
-            if hasattr(self, "_a2aInputCheck"):
-                self._a2aInputCheck.setVisible(False)
             return
         ext = self._a2aGetFormat()
-        self._a2aOutputEdit.setText(self._computeOutputPathForExtension(inp, ext))
+        self._a2aOutputEdit.setText(self._computeOutputPathForExtension(inp, ext, owner="a2a"))
 
     def _a2aConvert(self):
         inp = self._a2aInputEdit.text().strip()
-        if not inp or not os.path.isfile(inp):
+        if not inp or self._fs.cachedIsFile(inp) is False:
             QMessageBox.warning(self, "Аудио конвертер", "Выберите входной аудиофайл.")
             return
         if hasattr(self, "_findTool") and not self._findTool("ffmpeg"):
@@ -423,49 +557,49 @@ class AudioPagesMixin:
             return
         out = self._a2aOutputEdit.text().strip()
         if not out:
-            self._a2aUpdateOutputPath()
-            out = self._a2aOutputEdit.text().strip()
+            out = self._computeOutputPathForExtension(inp, self._a2aGetFormat(), owner="a2a")
+            self._a2aOutputEdit.setText(out)
         if not out:
             QMessageBox.warning(self, "Аудио конвертер", "Не удалось определить выходной файл.")
             return
-        fmt = self._a2aGetFormat()
-        quality = self._a2aGetQuality()
-        codec = AUDIO_CODEC_MAP.get(fmt, "libmp3lame")
-        args = ["-y", "-i", os.path.normpath(inp), "-vn", "-c:a", codec]
-        if quality != "copy":
-            args.extend(["-b:a", quality + "k"])
-        args.append(os.path.normpath(out))
-
         self._a2aConvertBtn.setEnabled(False)
         self._a2aLastError = ""
         self._a2aLastOutputPath = out
-        self._a2aProgressBar.setVisible(True)
-        self._a2aProgressBar.setRange(0, 0)
-        ffmpeg_exec = self._getToolPath("ffmpeg") if hasattr(self, "_getToolPath") else "ffmpeg"
-        self._a2aProcess.start(ffmpeg_exec, args)
+        self._resetAudioProgress(self._a2aProgressBar, 0)
+        # Длительность нужна для процентов и оставшегося времени; ffprobe — в фоне
+        self._probeAudioSource(inp, lambda info, inp=inp, out=out: self._a2aStartJob(inp, out, info))
 
-    def _a2aReadProcessOutput(self):
-        proc = getattr(self, "_a2aProcess", None)
-        if proc and proc == self.sender():
-            data = proc.readAllStandardError().data() + proc.readAllStandardOutput().data()
-            if data:
-                text = data.decode("utf-8", errors="replace")
-                self._a2aLastError = (self._a2aLastError + text)[-4000:]
+    def _a2aStartJob(self, inp, out, info):
+        if getattr(self, "_closingApp", False):
+            return
+        self._a2aDuration = (info or {}).get("duration", 0.0)
+        args = self._buildAudioArgs(inp, out, self._a2aGetFormat(), self._a2aGetQuality(), source_info=info)
+        self._resetAudioProgress(self._a2aProgressBar, self._a2aDuration)
+        self._a2aJob = self._submitAudioJob(
+            args, [out], "конвертация «Аудио конвертер»",
+            self._a2aReadProcessOutput, self._a2aProcessFinished, self._a2aProcessError,
+        )
+
+    def _a2aReadProcessOutput(self, job, out_text, err_text):
+        # stdout занят прогрессом -progress, для сообщения об ошибке храним только stderr
+        if err_text:
+            self._a2aLastError = (self._a2aLastError + err_text)[-4000:]
+        self._updateAudioProgress(self._a2aProgressBar, job, getattr(self, "_a2aDuration", 0.0))
 
     def _a2aProcessFinished(self, exitCode, exitStatus):
+        if getattr(self, "_closingApp", False):
+            return
         self._a2aConvertBtn.setEnabled(True)
         self._a2aProgressBar.setRange(PROGRESS_MIN, PROGRESS_MAX)
         self._a2aProgressBar.setValue(PROGRESS_MAX if exitCode == 0 else PROGRESS_MIN)
+        self._a2aProgressBar.setFormat("%p%")
         if exitCode == 0:
+            self._outputNames.markExisting(self._a2aLastOutputPath)
             self._a2aOpenFolderBtn.setEnabled(True)
             QMessageBox.information(self, "Аудио конвертер", "Конвертация завершена.")
         else:
             self._a2aOpenFolderBtn.setEnabled(False)
-            try:
-                if self._a2aLastOutputPath and os.path.exists(self._a2aLastOutputPath):
-                    os.remove(self._a2aLastOutputPath)
-            except Exception:
-                pass
+            self._removeOutputFile(self._a2aLastOutputPath)
             details = (self._a2aLastError or "").strip()
             msg = "Ошибка конвертации."
             if details:
@@ -473,6 +607,8 @@ class AudioPagesMixin:
             QMessageBox.warning(self, "Аудио конвертер", msg)
 
     def _a2aProcessError(self, error):
+        if getattr(self, "_closingApp", False):
+            return
         self._a2aConvertBtn.setEnabled(True)
         self._a2aProgressBar.setRange(PROGRESS_MIN, PROGRESS_MAX)
         self._a2aProgressBar.setValue(PROGRESS_MIN)
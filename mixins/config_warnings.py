@@ -1,4 +1,4 @@
-"""Конфигурация приложения и предупреждения: загрузка/сохранение app_config, проверка ffmpeg/ffprobe, предупреждения о записи."""
+"""Конфигурация приложения и предупреждения: загрузка/сохранение app_config, проверка ffmpeg/ffprobe и их возможностей, предупреждения о записи."""
 
 import os
 import json
@@ -8,6 +8,7 @@ import logging
 from PySide6.QtWidgets import QMessageBox
 
 from app.constants import JSON_ENCODING, JSON_INDENT, CONFIG_APP_CONFIG
+from models.input_prefetch import PREFETCH_MODES
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +61,29 @@ class ConfigWarningsMixin:
                 "Положите ffprobe.exe рядом с приложением или добавьте его в PATH."
             )
 
+    def _loadFfmpegCapabilities(self, callback=None):
+        """Возможности ffmpeg (кодеры, фильтры, pix_fmt…) в фоне: из кэша по бинарнику или один опрос.
+
+        callback(caps) вызывается в потоке GUI; caps = None, если ffmpeg не найден (тогда следующий вызов пробует снова).
+        """
+        if self._ffmpegCaps is not None:
+            if callback is not None:
+                callback(self._ffmpegCaps)
+            return
+        if self._ffmpegCapsWaiters is not None:
+            if callback is not None:
+                self._ffmpegCapsWaiters.append(callback)
+            return
+        self._ffmpegCapsWaiters = [callback] if callback is not None else []
+
+        def _done(caps):
+            self._ffmpegCaps = caps
+            callbacks, self._ffmpegCapsWaiters = self._ffmpegCapsWaiters or [], None
+            for cb in callbacks:
+                cb(caps)
+
+        self._fs.submit(self._capabilityCache.load, self._getToolPath("ffmpeg"), callback=_done)
+
     def _warnIfConfigPathNotWritable(self):
         app_dir = self._appDir
         if not os.access(app_dir, os.W_OK):
@@ -97,6 +121,34 @@ class ConfigWarningsMixin:
         try:
             with open(self._appConfigPath, "r", encoding=JSON_ENCODING) as f:
                 data = json.load(f)
+            if not isinstance(data, dict):
+                return
+            # Сохраняем все ключи, чтобы _saveAppConfig не затирал настройки, заданные вручную
+            self._appConfigData = dict(data)
+            template = data.get("output_name_template")
+            if isinstance(template, str) and template.strip():
+                self._outputNameTemplate = template
+            stall_sec = data.get("watchdog_stall_sec")
+            if isinstance(stall_sec, (int, float)) and stall_sec >= 0:
+                self._watchdogStallSec = stall_sec
+            max_retries = data.get("watchdog_max_retries")
+            if isinstance(max_retries, int) and max_retries >= 0:
+                self._watchdogMaxRetries = max_retries
+            staging_dir = data.get("staging_dir")
+            if isinstance(staging_dir, str):
+                self._stagingDir = os.path.expanduser(staging_dir.strip())
+            prefetch_mode = data.get("input_prefetch_mode")
+            if prefetch_mode in PREFETCH_MODES:
+                self._inputPrefetchMode = prefetch_mode
+            prefetch_count = data.get("input_prefetch_count")
+            if isinstance(prefetch_count, int) and prefetch_count >= 0:
+                self._inputPrefetchCount = prefetch_count
+            prefetch_dir = data.get("input_prefetch_dir")
+            if isinstance(prefetch_dir, str):
+                self._inputPrefetchDir = os.path.expanduser(prefetch_dir.strip())
+            prefetch_budget = data.get("input_prefetch_budget_gb")
+            if isinstance(prefetch_budget, (int, float)) and prefetch_budget > 0:
+                self._inputPrefetchBudgetGb = prefetch_budget
             idx = data.get("last_tab_index")
             if isinstance(idx, int) and hasattr(self, "_tabWidget"):
                 max_idx = self._tabWidget.count() - 1
@@ -108,7 +160,8 @@ class ConfigWarningsMixin:
     def _saveAppConfig(self):
         if not hasattr(self, "_tabWidget"):
             return
-        data = {"last_tab_index": self._tabWidget.currentIndex()}
+        data = dict(getattr(self, "_appConfigData", None) or {})
+        data["last_tab_index"] = self._tabWidget.currentIndex()
         try:
             with open(self._appConfigPath, "w", encoding=JSON_ENCODING) as f:
                 json.dump(data, f, ensure_ascii=False, indent=JSON_INDENT)
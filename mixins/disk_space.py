@@ -0,0 +1,175 @@
+"""Миксин: свободное место на дисках выходов — оценка размера, ожидание места перед запуском, повтор после переполнения."""
+
+import os
+import html
+from PySide6.QtCore import QTimer
+
+from app.constants import (
+    PROGRESS_MIN, DISK_SPACE_RESERVE_MB, DISK_SPACE_RETRY_SEC, DISK_FULL_MAX_RETRIES, DISK_ESTIMATE_MARGIN,
+    DISK_ESTIMATE_AUDIO_KBPS, DISK_ESTIMATE_DEFAULT_RATIO,
+)
+from models.queueitem import QueueItem
+from models.disk_space import admissionShortfalls
+from models.output_verify import AUDIO_ONLY_EXTENSIONS
+from models.ffmpeg_errors import classifyFFmpegError
+
+
+class DiskSpaceMixin:
+    """Запуск элемента очереди ждёт, пока на дисках его выходов не хватает места (с учётом идущих заданий
+    и ещё не перенесённых результатов). Размер выхода оценивается по битрейту или по степени сжатия пресета
+    из прошлых запусков (models.disk_space.OutputSizeHistory).
+    """
+
+    def _sizeHistoryKey(self, item):
+        return f"{item.preset_name}|{item.codec}|{item.container}"
+
+    def _estimateOutputBytes(self, item):
+        """Ожидаемый размер выхода элемента, байт, с запасом DISK_ESTIMATE_MARGIN.
+
+        Задан битрейт — битрейт × оставленная длительность; иначе размер оставленной части входа × средняя
+        степень сжатия пресета (история прошлых запусков, DISK_ESTIMATE_DEFAULT_RATIO — если её нет).
+        """
+        duration = self._expectedOutputDuration(item)
+        input_duration = getattr(item, "video_duration", 0) or 0
+        input_size = item.input_stat.st_size if item.input_stat is not None else 0
+        if input_duration > 0 and duration > 0:
+            input_size *= min(1.0, duration / input_duration)
+        manual = getattr(item, "command_manually_edited", False)
+        drop_audio = "drop_audio" in getattr(item, "fallbacks", ()) or getattr(item, "has_audio", None) is False
+        audio_kbps = 0 if drop_audio else (getattr(item, "audio_bitrate", 0) or DISK_ESTIMATE_AUDIO_KBPS)
+        extension = os.path.splitext(item.output_file or "")[1].lstrip(".").lower()
+        if not manual and duration > 0 and extension in AUDIO_ONLY_EXTENSIONS:
+            estimate = audio_kbps * 1000 / 8 * duration
+        elif not manual and duration > 0 and getattr(item, "bitrate", 0) > 0 and not self._isRemuxItem(item):
+            estimate = (item.bitrate + audio_kbps) * 1000 / 8 * duration
+        else:
+            ratio = None if manual or self._isRemuxItem(item) else self._sizeHistory.ratio(self._sizeHistoryKey(item))
+            estimate = input_size * (ratio or DISK_ESTIMATE_DEFAULT_RATIO)
+        estimate = int(estimate * DISK_ESTIMATE_MARGIN)
+        if getattr(item, "disk_full_retries", 0):
+            estimate = max(estimate, item.output_estimate)  # прошлый запуск переполнил диск — оценка не меньше его
+        return estimate
+
+    def _diskSpaceEntries(self, items):
+        """[(путь, ожидаемый размер, перенос из)] выходов элементов — для admissionShortfalls."""
+        entries = []
+        for it in items:
+            for path in it.outputFiles():
+                staged = it.staged_outputs.get(path)
+                if staged:
+                    entries += [(staged, it.output_estimate, None), (path, it.output_estimate, staged)]
+                else:
+                    entries.append((path, it.output_estimate, None))
+        return entries
+
+    def _admitQueueJob(self, token, index, item, args):
+        """Запускает элемент, если на дисках его выходов хватает места с учётом идущих заданий
+        и ещё не перенесённых результатов; иначе ждёт и проверяет снова через DISK_SPACE_RETRY_SEC."""
+        run_items = self._queueRunItems()
+        targets = self._diskSpaceEntries(run_items)
+        reservations = self._diskSpaceEntries(
+            [it for it in self.queue if it.staged_outputs and it not in run_items]
+        ) + [
+            (path, expected, None)
+            for job in self._scheduler.activeJobs() for path, expected in job.estimated_bytes.items()
+        ]
+        self._fs.submit(
+            admissionShortfalls, targets, reservations, DISK_SPACE_RESERVE_MB * 1024 * 1024,
+            callback=lambda shortfalls: self._onDiskAdmission(token, index, item, args, shortfalls),
+        )
+
+    def _onDiskAdmission(self, token, index, item, args, shortfalls):
+        if token != getattr(self, "_queueLaunchToken", 0) or getattr(self, "_closingApp", False):
+            return
+        if index != self.currentQueueIndex or self.isPaused or getattr(self, "_abortRequested", False):
+            return
+        if shortfalls:
+            if not item.disk_wait:
+                item.disk_wait = True
+                for directory, required, free in shortfalls:
+                    self.ui.logDisplay.append(
+                        f"<b><font color='#FF8C00'>💾 Мало места в {html.escape(directory)}: нужно "
+                        f"~{required / 1024 ** 3:.1f} ГБ, свободно {free / 1024 ** 3:.1f} ГБ. "
+                        f"Запуск ждёт, пока место освободится.</font></b>"
+                    )
+                self.updateQueueTable()
+                self.updateStatus("Ожидание места на диске")
+            QTimer.singleShot(
+                DISK_SPACE_RETRY_SEC * 1000, lambda: self._retryDiskAdmission(token, index, item, args)
+            )
+            self._prefetchQueueJobs()
+            return
+        if item.disk_wait:
+            item.disk_wait = False
+            self.ui.logDisplay.append("<font color='green'>Место на диске освободилось — запуск продолжается</font>")
+            self.updateQueueTable()
+            self.updateStatus(f"Обработка файла {self.currentQueueIndex + 1} из {len(self.queue)}")
+        self._startQueueJob(item, args)
+
+    def _retryDiskAdmission(self, token, index, item, args):
+        if token != getattr(self, "_queueLaunchToken", 0) or index != self.currentQueueIndex:
+            return
+        self._admitQueueJob(token, index, item, args)
+
+    def _retryAfterDiskFull(self, item, run_items):
+        """Диск переполнился посреди кодирования: оценка размера поднимается до фактической (по уже записанному)
+        и элемент перезапускается — проверка места дождётся, пока его хватит. True — перезапуск запланирован."""
+        category, label, _ = classifyFFmpegError(self._queueStderrTail)
+        if category != "disk_full" or item.disk_full_retries >= DISK_FULL_MAX_RETRIES:
+            return False
+        duration = self._expectedOutputDuration(item)
+        done = self._queueJob.out_time_sec if self._queueJob is not None else 0.0
+        for run_item in run_items:
+            written = 0
+            for path in run_item.outputFiles():
+                try:
+                    written = max(written, os.stat(run_item.staged_outputs.get(path, path)).st_size)
+                except OSError:
+                    pass
+            if written and done > 0 and duration > done:
+                written = int(written * duration / done * DISK_ESTIMATE_MARGIN)
+            run_item.output_estimate = max(run_item.output_estimate * 2, written)
+            run_item.disk_full_retries += 1
+            self._removeItemOutputs(run_item)
+            run_item.status = QueueItem.STATUS_WAITING
+            run_item.progress = 0
+            run_item.error_message = f"{label}; повтор после освобождения места"
+        self._mergedQueueItems = []
+        self.ui.logDisplay.append(
+            f"<br><b><font color='#FF8C00'>💾 {html.escape(os.path.basename(item.file_path))}: "
+            f"{html.escape(label)} — запуск повторится, когда на диске хватит места</font></b>"
+        )
+        if hasattr(self.ui, 'encodingProgressBar'):
+            self.ui.encodingProgressBar.setValue(PROGRESS_MIN)
+        self.updateQueueTable()
+        self.updateTotalQueueProgress()
+        QTimer.singleShot(0, self.processNextInQueue)
+        return True
+
+    def _recordOutputSize(self, item):
+        """Запоминает степень сжатия пресета по проверенному выходу (для оценки размера следующих запусков)."""
+        if getattr(item, "command_manually_edited", False) or item.from_cache or item.input_stat is None:
+            return
+        if self._isRemuxItem(item) or getattr(item, "bitrate", 0) > 0:
+            return
+        input_duration = getattr(item, "video_duration", 0) or 0
+        duration = self._expectedOutputDuration(item)
+        kept_input = item.input_stat.st_size
+        if input_duration > 0 and duration > 0:
+            kept_input *= min(1.0, duration / input_duration)
+        if kept_input <= 0:
+            return
+        paths = [item.staged_outputs.get(item.output_file, item.output_file), item.output_file]
+        key = self._sizeHistoryKey(item)
+
+        def _record():
+            # Перенос из временной папки может идти параллельно — берём файл там, где он сейчас
+            for path in paths:
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    continue
+                self._sizeHistory.record(key, size / kept_input)
+                return
+
+        self._fs.submit(_record)
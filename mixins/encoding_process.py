@@ -3,24 +3,35 @@
 import os
 import platform
 import shlex
+import html
 import re
-import json
 import time
+import tempfile
 import logging
 from PySide6.QtWidgets import QMessageBox
 from PySide6.QtCore import QProcess, QTimer
 
 from app.constants import (
-    PROGRESS_MAX, PROGRESS_MIN, PROCESS_NEXT_DELAY_MS,
-    ETA_DELAY_SECONDS, ETA_SMOOTHING_ALPHA,
+    PROGRESS_MAX, PROGRESS_MIN, JOB_PREFETCH_COUNT, SCHEDULER_INTERACTIVE_CORES, QUEUE_MERGE_DUPLICATE_INPUTS,
+    REMUX_VIDEO_CODECS, QUEUE_VALIDATION_MAX_LISTED, INPUT_PREFETCH_DIR_NAME, WATCHDOG_RETRY_DELAY_SEC, QUEUE_AUTO_FALLBACKS,
+    QUEUE_STDERR_TAIL, FALLBACK_PIX_FMT,
+    DISK_SPACE_CHECK, VERIFY_OUTPUTS, RESULT_CACHE_ENABLED, HASH_FULL_IN_BACKGROUND, ETA_DELAY_SECONDS, ETA_SMOOTHING_ALPHA, OUTPUT_NAME_TEMPLATE,
 )
 from models.queueitem import QueueItem
+from models.output_names import renderOutputNameTemplate
+from models.job_scheduler import Job, limitThreads
+from models.ffmpeg_capabilities import validateFFmpegArgs
+from models.input_prefetch import InputPrefetchCache, warmFile, PREFETCH_MODE_OFF, PREFETCH_MODE_COPY, PREFETCH_MODE_FADVISE
+from models.output_staging import stagingPathFor, commitStagedFiles
+from models.result_cache import ResultCache, commandTemplate
+from models.output_verify import verifyOutputs, AUDIO_ONLY_EXTENSIONS
+from models.ffmpeg_errors import classifyFFmpegError, nextFallback, FALLBACK_LABELS, FALLBACK_STRATEGIES
 
 logger = logging.getLogger(__name__)
 
 
 class EncodingMixin:
-    """Миксин: generateFFmpegCommand, _getFFmpegArgs, процесс очереди, readProcessOutput, processFinished, ETA, пауза."""
+    """Миксин: generateFFmpegCommand, _getFFmpegArgs, процесс очереди, _onQueueJobOutput, processFinished, ETA, пауза."""
 
     def _quotePath(self, path):
         """Оборачивает путь в кавычки для безопасности."""
@@ -35,41 +46,14 @@ class EncodingMixin:
         item = self.getSelectedQueueItem()
         if not item:
             return "ffmpeg"
+        if item.renditions or item.extra_destinations:
+            return self._argsToCommand(self._getLadderArgs(item))
         input_file = item.file_path
         input_file_normalized = os.path.normpath(input_file)
-        container = item.container or "current"
-        if container in ("default", "current", "", None):
-            container_ext = os.path.splitext(input_file_normalized)[1].lstrip(".")
-        else:
-            container_ext = container
-        if item.output_file:
-            output_base = os.path.splitext(item.output_file)[0]
-            final_output = output_base + "." + container_ext
-            final_output = os.path.normpath(final_output)
-            item.output_renamed = False
-            if os.path.exists(final_output):
-                counter = 1
-                while os.path.exists(final_output):
-                    final_output = output_base + "_" + str(counter) + "." + container_ext
-                    final_output = os.path.normpath(final_output)
-                    counter += 1
-                item.output_renamed = True
-            item.output_file = final_output
-        else:
-            input_path = os.path.dirname(input_file_normalized)
-            input_base = os.path.splitext(os.path.basename(input_file_normalized))[0]
-            base_output = os.path.join(input_path, input_base + "_converted")
-            output_file = base_output + "." + container_ext
-            counter = 1
-            final_output = output_file
-            while os.path.exists(final_output):
-                final_output = base_output + "_" + str(counter) + "." + container_ext
-                counter += 1
-            final_output = os.path.normpath(final_output)
-            item.output_file = final_output
-            item.output_renamed = False
+        container_ext = self._containerExtForItem(item)
+        final_output = self._resolveOutputPathForItem(item, container_ext)
         self.lastOutputFile = final_output
-        codec = item.codec or "current"
+        codec = "copy" if self._isRemuxItem(item) else (item.codec or "current")
         codec_args = []
         if codec not in ("default", "current", ""):
             codec_args = ["-c:v", codec]
@@ -144,8 +128,8 @@ class EncodingMixin:
         extra_args = self._filterExtraArgsList(extra_args, item)
         cmd_parts = ["ffmpeg"]
         if len(segments) == 1:
-            start_sec, end_sec = segments[0]
-            cmd_parts += ["-ss", str(start_sec), "-i", self._quotePath(input_file_normalized), "-to", str(end_sec)]
+            start_sec = segments[0][0]
+            cmd_parts += ["-ss", str(start_sec), "-i", self._quotePath(input_file_normalized), "-t", self._trimLengthArg(segments[0])]
             cmd_parts += vf_args + codec_args + video_extra + audio_args
             if apply_tag_hvc1:
                 cmd_parts += ["-tag:v", "hvc1"]
@@ -179,30 +163,75 @@ class EncodingMixin:
         cmd_parts.append(self._quotePath(final_output))
         return " ".join(cmd_parts)
 
-    def _generateOutputFileForItem(self, queue_item):
-        """Генерирует выходной файл для элемента очереди."""
-        if not queue_item or queue_item.output_file:
-            return
-        input_file = queue_item.file_path
-        input_file_normalized = os.path.normpath(input_file)
+    def _containerExtForItem(self, queue_item):
+        """Расширение выходного контейнера: выбранный контейнер или расширение входного файла."""
         container = queue_item.container or "current"
         if container in ("default", "current", "", None):
-            container_ext = os.path.splitext(input_file_normalized)[1].lstrip(".")
+            return os.path.splitext(os.path.normpath(queue_item.file_path))[1].lstrip(".")
+        return container
+
+    def _resolveOutputPathForItem(self, queue_item, container_ext):
+        """Приводит output_file к расширению контейнера и резервирует свободное имя за элементом.
+
+        Если файл уже есть на диске или имя занято другим элементом очереди, добавляется _1, _2, …
+        """
+        if not queue_item.output_file:
+            self._generateOutputFileForItem(queue_item)
+            queue_item.output_renamed = False
         else:
-            container_ext = container
-        input_path = os.path.dirname(input_file_normalized)
-        input_base = os.path.splitext(os.path.basename(input_file_normalized))[0]
-        base_output = os.path.join(input_path, input_base + "_converted")
-        output_file = base_output + "." + container_ext
-        counter = 1
-        final_output = output_file
-        while os.path.exists(final_output):
-            final_output = base_output + "_" + str(counter) + "." + container_ext
-            counter += 1
-        final_output = os.path.normpath(final_output)
-        queue_item.output_file = final_output
+            output_dir, output_name = os.path.split(os.path.splitext(queue_item.output_file)[0])
+            self._outputNames.release(queue_item)
+            final_output = self._outputNames.allocate(queue_item, output_dir, output_name, container_ext)
+            queue_item.output_renamed = os.path.normcase(final_output) != os.path.normcase(
+                os.path.normpath(os.path.join(output_dir, output_name + "." + container_ext))
+            )
+            queue_item.output_file = final_output
+        return queue_item.output_file
+
+    def _generateOutputFileForItem(self, queue_item):
+        """Генерирует выходной файл для элемента очереди по шаблону имени (OUTPUT_NAME_TEMPLATE)."""
+        if not queue_item or queue_item.output_file:
+            return
+        input_file_normalized = os.path.normpath(queue_item.file_path)
+        container_ext = self._containerExtForItem(queue_item)
+        stem = self._outputStemForItem(queue_item)
+        self._outputNames.release(queue_item)
+        queue_item.output_file = self._outputNames.allocate(
+            queue_item, os.path.dirname(input_file_normalized), stem, container_ext
+        )
         queue_item.output_chosen_by_user = False
 
+    def _outputStemForItem(self, queue_item):
+        """Имя выходного файла без расширения и без суффикса уникальности — по шаблону имени."""
+        input_base = os.path.splitext(os.path.basename(os.path.normpath(queue_item.file_path)))[0]
+        return renderOutputNameTemplate(
+            getattr(self, "_outputNameTemplate", OUTPUT_NAME_TEMPLATE),
+            name=input_base,
+            preset=queue_item.preset_name,
+            codec=queue_item.codec,
+            container=self._containerExtForItem(queue_item),
+            resolution=queue_item.resolution,
+        )
+
+    def _removeOutputFile(self, path):
+        """Удаляет (частично записанный) выходной файл и обновляет кэш имён."""
+        if not path:
+            return
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
+        self._outputNames.forgetExisting(path)
+
+    def _removeItemOutputs(self, queue_item):
+        """Удаляет все (частично записанные) выходы элемента, включая выходы лесенки и копии во временной папке."""
+        for path in queue_item.outputFiles():
+            self._removeOutputFile(path)
+        for path in queue_item.staged_outputs.values():
+            self._removeOutputFile(path)
+        queue_item.staged_outputs = {}
+
     def _getTrimSegments(self, queue_item):
         """Возвращает список областей обрезки (start_sec, end_sec)."""
         out = list(getattr(queue_item, "keep_segments", []) or [])
@@ -212,6 +241,12 @@ class EncodingMixin:
             out.append((start, end))
         return out
 
+    def _trimLengthArg(self, segment):
+        """Значение -t для одного фрагмента. -ss перед -i обнуляет отсчёт времени выхода,
+        поэтому -to с концом фрагмента дал бы файл длиной до конца фрагмента, а не сам фрагмент."""
+        start, end = segment
+        return str(round(end - start, 3))
+
     def _buildTrimConcatFilter(self, segments, scale_filter, include_audio=True):
         """Строит filter_complex для обрезки/склейки. Возвращает (filter_string, map_v, map_a)."""
         parts = []
@@ -238,50 +273,8 @@ class EncodingMixin:
             map_v = "[v]"
         return ";".join(parts), map_v, map_a
 
-    def _getFFmpegArgs(self, queue_item=None):
-        """Возвращает список аргументов для запуска FFmpeg (без кавычек вокруг путей)."""
-        if queue_item is None:
-            queue_item = self.getSelectedQueueItem()
-        if not queue_item:
-            return []
-        input_file = queue_item.file_path
-        input_file_normalized = os.path.normpath(input_file)
-        container = queue_item.container or "current"
-        if container in ("default", "current", "", None):
-            container_ext = os.path.splitext(input_file_normalized)[1].lstrip(".")
-        else:
-            container_ext = container
-        if queue_item.output_file:
-            output_base = os.path.splitext(queue_item.output_file)[0]
-            final_output = output_base + "." + container_ext
-            final_output = os.path.normpath(final_output)
-            queue_item.output_renamed = False
-            if os.path.exists(final_output):
-                counter = 1
-                while os.path.exists(final_output):
-                    final_output = output_base + "_" + str(counter) + "." + container_ext
-                    final_output = os.path.normpath(final_output)
-                    counter += 1
-                queue_item.output_renamed = True
-            queue_item.output_file = final_output
-        else:
-            input_path = os.path.dirname(input_file_normalized)
-            input_base = os.path.splitext(os.path.basename(input_file_normalized))[0]
-            base_output = os.path.join(input_path, input_base + "_converted")
-            output_file = base_output + "." + container_ext
-            counter = 1
-            final_output = output_file
-            while os.path.exists(final_output):
-                final_output = base_output + "_" + str(counter) + "." + container_ext
-                counter += 1
-            final_output = os.path.normpath(final_output)
-            queue_item.output_file = final_output
-            queue_item.output_renamed = False
-        self.lastOutputFile = final_output
-        codec = queue_item.codec or "current"
-        codec_args = []
-        if codec not in ("default", "current", ""):
-            codec_args = ["-c:v", codec]
+    def _scaleFilterForItem(self, queue_item):
+        """Фильтр scale по разрешению элемента (пустая строка — без масштабирования)."""
         res = queue_item.resolution or "current"
         scale = ""
         if res == "480p":
@@ -305,9 +298,39 @@ class EncodingMixin:
                     scale = scale + ":flags=lanczos"
             else:
                 scale = "scale=iw:ih:flags=lanczos"
-        vf_args = []
-        if scale and codec != "copy":
-            vf_args = ["-vf", scale]
+        return scale
+
+    def _isRemuxItem(self, queue_item, info=None):
+        """Перекодирование видео не нужно: кодек «текущий», настройки не меняют видео, а контейнер
+        принимает исходный видеокодек. Тогда вместо кодера по умолчанию видео копируется (remux).
+
+        info — данные ffprobe входа (по умолчанию media_info элемента); без них remux не выбирается.
+        """
+        if (queue_item.codec or "current") not in ("default", "current"):
+            return False
+        if self._scaleFilterForItem(queue_item) or self._getTrimSegments(queue_item):
+            return False
+        for attr in ("crf", "bitrate", "fps", "keyint"):
+            if getattr(queue_item, attr, 0) > 0:
+                return False
+        if getattr(queue_item, "profile_level", "") or getattr(queue_item, "pixel_format", "") or getattr(queue_item, "tune", ""):
+            return False
+        extra_args = self._filterExtraArgsList(self._getExtraArgsList(getattr(queue_item, "extra_args", "")), queue_item)
+        if any(arg in ("-vf", "-filter:v", "-filter_complex", "-c:v", "-vcodec", "-b:v", "-crf", "-r", "-s", "-pix_fmt")
+               for arg in extra_args):
+            return False
+        info = queue_item.media_info if info is None else info
+        video = next((st for st in (info or {}).get("streams") or [] if st.get("codec_type") == "video"), None)
+        if video is None:
+            return False
+        allowed = REMUX_VIDEO_CODECS.get(self._containerExtForItem(queue_item).lower(), ())
+        return video.get("codec_name", "") in allowed
+
+    def _videoEncodeArgsForItem(self, queue_item, codec, fallbacks=()):
+        """Параметры видеокодера (crf, битрейт, fps, preset, профиль…); для copy — пусто.
+
+        fallbacks — запасные стратегии повторного запуска (см. _tryQueueFallback).
+        """
         video_extra = []
         if codec != "copy":
             if getattr(queue_item, "crf", 0) > 0:
@@ -325,6 +348,8 @@ class EncodingMixin:
                 if len(parts_pl) > 1:
                     video_extra += ["-level", parts_pl[1]]
             pf = getattr(queue_item, "pixel_format", "") or ""
+            if "pix_fmt" in fallbacks:
+                pf = FALLBACK_PIX_FMT
             if pf:
                 video_extra += ["-pix_fmt", pf]
             tune_val = getattr(queue_item, "tune", "") or ""
@@ -334,27 +359,251 @@ class EncodingMixin:
                 video_extra += ["-threads", str(queue_item.threads)]
             if getattr(queue_item, "keyint", 0) > 0:
                 video_extra += ["-g", str(queue_item.keyint)]
+        return video_extra
+
+    def _audioEncodeArgsForItem(self, queue_item, fallbacks=()):
+        if "drop_audio" in fallbacks:
+            return ["-an"]
         ac = getattr(queue_item, "audio_codec", "current") or "current"
         if ac == "current":
             ac = "copy"
+        if ac == "copy" and "reencode_audio" in fallbacks:
+            ac = "aac"
         audio_args = ["-c:a", ac]
         if ac != "copy":
             if getattr(queue_item, "audio_bitrate", 0) > 0:
                 audio_args += ["-b:a", str(queue_item.audio_bitrate) + "k"]
             if getattr(queue_item, "sample_rate", 0) > 0:
                 audio_args += ["-ar", str(queue_item.sample_rate)]
-        tag_hvc1 = getattr(queue_item, "tag_hvc1", False)
+        return audio_args
+
+    def _concatAudioArgsForItem(self, queue_item):
+        """Аудио для склейки сегментов: поток после concat всегда перекодируется в AAC."""
+        audio_args = ["-c:a", "aac"]
+        if getattr(queue_item, "audio_bitrate", 0) > 0:
+            audio_args += ["-b:a", str(queue_item.audio_bitrate) + "k"]
+        if getattr(queue_item, "sample_rate", 0) > 0:
+            audio_args += ["-ar", str(queue_item.sample_rate)]
+        return audio_args
+
+    def _inputFallbackArgs(self, fallbacks):
+        """Опции входа от запасных стратегий (ставятся перед -i)."""
+        return ["-fflags", "+genpts"] if "genpts" in fallbacks else []
+
+    def _tagHvc1Applies(self, queue_item, container_ext, codec):
         container_ext_l = container_ext.lower() if isinstance(container_ext, str) else ""
-        apply_tag_hvc1 = tag_hvc1 and container_ext_l in ("mp4", "mov", "m4v") and (
+        return getattr(queue_item, "tag_hvc1", False) and container_ext_l in ("mp4", "mov", "m4v") and (
             codec in ("libx265", "hevc", "h265", "copy")
         )
+
+    # --- Лесенка качеств: несколько выходов из одного декодирования ---
+
+    def _generateRenditionOutputFile(self, queue_item, rendition):
+        """Имя выхода лесенки: имя основного выхода + разрешение (или имя пресета) варианта."""
+        if rendition.output_file:
+            return
+        container_ext = self._containerExtForItem(rendition)
+        base_output = queue_item.output_file or os.path.normpath(queue_item.file_path)
+        stem = os.path.splitext(os.path.basename(base_output))[0]
+        label = rendition.resolution if rendition.resolution not in ("default", "current", "", None) else rendition.preset_name
+        label = re.sub(r'[\\/:*?"<>|\s]+', "_", str(label or "")).strip("_")
+        if label:
+            stem += "_" + label
+        self._outputNames.release(rendition)
+        rendition.output_file = self._outputNames.allocate(rendition, os.path.dirname(base_output), stem, container_ext)
+
+    # --- Дополнительные места сохранения: один закодированный поток пишется муксером tee в несколько файлов ---
+
+    def _outputCopiesStreams(self, output, concat, info=None):
+        """Копирует ли выход поток без перекодирования (после склейки видео и аудио всегда кодируются)."""
+        if concat:
+            return False
+        if (output.codec or "") == "copy" or self._isRemuxItem(output, info):
+            return True
+        return self._audioEncodeArgsForItem(output)[1] == "copy"
+
+    def _resolveExtraDestinations(self, output, destinations, keep_container=False):
+        """Пути дополнительных мест сохранения выхода: то же имя в каждой папке, со своим контейнером.
+
+        keep_container — выход копирует потоки: tee передаёт им тег кодека входа, который чужой
+        контейнер не примет, поэтому все места получают контейнер основного выхода.
+        """
+        output.extra_output_files = []
+        if not destinations or not output.output_file:
+            return output.extra_output_files
+        stem, main_ext = os.path.splitext(os.path.basename(output.output_file))
+        seen = {os.path.normcase(os.path.normpath(output.output_file))}
+        for destination in destinations:
+            directory = destination.get("dir", "")
+            if not directory:
+                continue
+            ext = main_ext.lstrip(".") if keep_container else (destination.get("container") or main_ext.lstrip("."))
+            path = self._outputNames.allocate(output, os.path.normpath(directory), stem, ext)
+            key = os.path.normcase(os.path.normpath(path))
+            if key in seen:
+                continue  # та же папка и тот же контейнер, что у основного выхода
+            seen.add(key)
+            output.extra_output_files.append(path)
+        return output.extra_output_files
+
+    def _teeEscape(self, path):
+        """Экранирует путь для списка выходов муксера tee (разделитель "|", опции в [])."""
+        return re.sub(r"([\\'|\[\]])", r"\\\1", path)
+
+    def _outputTargetArgs(self, output):
+        """Аргументы выхода: путь файла или муксер tee, если у выхода есть дополнительные места сохранения."""
+        if not output.extra_output_files:
+            return [output.output_file]
+        # onfail=abort: недоступное место сохранения (например, отключённый NAS) — ошибка всего задания
+        slaves = "|".join(
+            "[onfail=abort]" + self._teeEscape(path) for path in [output.output_file] + output.extra_output_files
+        )
+        # Кодировщик не знает контейнеры за tee — заголовки потоков кладутся в extradata для всех
+        return ["-flags", "+global_header", "-f", "tee", slaves]
+
+    def _getLadderArgs(self, queue_item, merged_items=()):
+        """Один запуск ffmpeg на все выходы лесенки: вход демультиплексируется и декодируется один раз,
+        видео делится filter split на ветки со своим scale, каждая ветка кодируется своим пресетом.
+
+        merged_items — другие элементы очереди с тем же входом и той же обрезкой; их выходы
+        (вместе с их вариантами лесенки) добавляются в тот же запуск. Выходы с дополнительными
+        местами сохранения пишутся муксером tee.
+        """
+        segments = self._getTrimSegments(queue_item)
+        concat = len(segments) > 1
+        outputs = []
+        for main in [queue_item] + list(merged_items):
+            output_path = self._resolveOutputPathForItem(main, self._containerExtForItem(main))
+            self._resolveExtraDestinations(
+                main, main.extra_destinations, self._outputCopiesStreams(main, concat, queue_item.media_info)
+            )
+            if main is queue_item:
+                self.lastOutputFile = output_path
+            outputs.append(main)
+            for rendition in main.renditions:
+                self._generateRenditionOutputFile(main, rendition)
+                self._resolveOutputPathForItem(rendition, self._containerExtForItem(rendition))
+                self._resolveExtraDestinations(
+                    rendition, main.extra_destinations,
+                    self._outputCopiesStreams(rendition, concat, queue_item.media_info)
+                )
+                outputs.append(rendition)
+        input_file_normalized = os.path.normpath(queue_item.file_path)
+        probe_args = ["-analyzeduration", "10000000", "-probesize", "10000000"] if segments else []
+        # Запасные стратегии общие для всего запуска: у объединённых элементов тот же вход
+        fallbacks = set(getattr(queue_item, "fallbacks", ())).union(*(getattr(main, "fallbacks", ()) for main in merged_items))
+        probe_args = self._inputFallbackArgs(fallbacks) + probe_args
+        include_audio = getattr(queue_item, "has_audio", None) is not False and "drop_audio" not in fallbacks
+
+        # Метки веток (rs/rv/ra) не пересекаются с метками фильтра склейки (v0, a0, outv…)
+        graph = []
+        video_src = "[0:v]"
+        audio_src = None
+        if concat:
+            filter_concat, video_src, audio_src = self._buildTrimConcatFilter(segments, "", include_audio=include_audio)
+            graph.append(filter_concat)
+        codecs = []
+        for out in outputs:
+            codec = out.codec or "current"
+            if concat and codec in ("default", "current", "", "copy"):
+                codec = "libx264"  # после склейки копировать видео нельзя
+            elif not segments and self._isRemuxItem(out, queue_item.media_info):
+                codec = "copy"
+            codecs.append(codec)
+        # Ветки фильтра нужны выходам с перекодированием; copy берёт поток входа как есть
+        encoded = [i for i, codec in enumerate(codecs) if codec != "copy"]
+        video_maps = {}
+        if encoded:
+            if len(encoded) > 1:
+                graph.append(f"{video_src}split={len(encoded)}" + "".join(f"[rs{i}]" for i in encoded))
+                branch = {i: f"[rs{i}]" for i in encoded}
+            else:
+                branch = {encoded[0]: video_src}
+            for i in encoded:
+                scale = self._scaleFilterForItem(outputs[i])
+                if scale:
+                    graph.append(f"{branch[i]}{scale}[rv{i}]")
+                    video_maps[i] = f"[rv{i}]"
+                elif branch[i] == "[0:v]":
+                    video_maps[i] = "0:v:0"
+                else:
+                    video_maps[i] = branch[i]
+        audio_maps = {}
+        if concat and audio_src:
+            if len(outputs) > 1:
+                graph.append(f"{audio_src}asplit={len(outputs)}" + "".join(f"[ra{i}]" for i in range(len(outputs))))
+                audio_maps = {i: f"[ra{i}]" for i in range(len(outputs))}
+            else:
+                audio_maps = {0: audio_src}
+
+        if len(segments) == 1:
+            start_sec = segments[0][0]
+            args = probe_args + ["-ss", str(start_sec), "-i", input_file_normalized]
+        else:
+            args = probe_args + ["-i", input_file_normalized]
+        if graph:
+            args += ["-filter_complex", ";".join(graph)]
+        for i, out in enumerate(outputs):
+            codec = codecs[i]
+            args += ["-map", video_maps.get(i, "0:v:0")]
+            if concat:
+                if audio_src:
+                    args += ["-map", audio_maps[i]]
+            elif include_audio:
+                args += ["-map", "0:a:0?"]
+            if codec not in ("default", "current", ""):
+                args += ["-c:v", codec]
+            args += self._videoEncodeArgsForItem(out, codec, fallbacks)
+            if concat:
+                if audio_src:
+                    args += self._concatAudioArgsForItem(out)
+            elif include_audio:
+                args += self._audioEncodeArgsForItem(out, fallbacks)
+            if self._tagHvc1Applies(out, self._containerExtForItem(out), codec):
+                args += ["-tag:v", "hvc1"]
+            extra_args = self._filterExtraArgsList(self._getExtraArgsList(getattr(out, "extra_args", "")), out)
+            if extra_args:
+                args += extra_args
+            if len(segments) == 1:
+                args += ["-t", self._trimLengthArg(segments[0])]
+            args += self._outputTargetArgs(out)
+        if any(getattr(out, "output_chosen_by_user", False) for out in outputs):
+            args = ["-y"] + args
+        return args
+
+    def _getFFmpegArgs(self, queue_item=None):
+        """Возвращает список аргументов для запуска FFmpeg (без кавычек вокруг путей)."""
+        if queue_item is None:
+            queue_item = self.getSelectedQueueItem()
+        if not queue_item:
+            return []
+        if queue_item.renditions or queue_item.extra_destinations:
+            return self._getLadderArgs(queue_item)
+        input_file = queue_item.file_path
+        input_file_normalized = os.path.normpath(input_file)
+        container_ext = self._containerExtForItem(queue_item)
+        final_output = self._resolveOutputPathForItem(queue_item, container_ext)
+        self.lastOutputFile = final_output
+        codec = "copy" if self._isRemuxItem(queue_item) else (queue_item.codec or "current")
+        codec_args = []
+        if codec not in ("default", "current", ""):
+            codec_args = ["-c:v", codec]
+        scale = self._scaleFilterForItem(queue_item)
+        vf_args = []
+        if scale and codec != "copy":
+            vf_args = ["-vf", scale]
+        fallbacks = getattr(queue_item, "fallbacks", ())
+        video_extra = self._videoEncodeArgsForItem(queue_item, codec, fallbacks)
+        audio_args = self._audioEncodeArgsForItem(queue_item, fallbacks)
+        apply_tag_hvc1 = self._tagHvc1Applies(queue_item, container_ext, codec)
         extra_args = self._getExtraArgsList(getattr(queue_item, "extra_args", ""))
         extra_args = self._filterExtraArgsList(extra_args, queue_item)
         segments = self._getTrimSegments(queue_item)
         probe_args = ["-analyzeduration", "10000000", "-probesize", "10000000"] if segments else []
+        probe_args = self._inputFallbackArgs(fallbacks) + probe_args
         if len(segments) == 1:
-            start_sec, end_sec = segments[0]
-            args = probe_args + ["-ss", str(start_sec), "-i", input_file_normalized, "-to", str(end_sec)]
+            start_sec = segments[0][0]
+            args = probe_args + ["-ss", str(start_sec), "-i", input_file_normalized, "-t", self._trimLengthArg(segments[0])]
             args += vf_args + codec_args + video_extra + audio_args
             if apply_tag_hvc1:
                 args += ["-tag:v", "hvc1"]
@@ -362,26 +611,21 @@ class EncodingMixin:
                 args += extra_args
             args.append(final_output)
         elif len(segments) > 1:
-            include_audio = getattr(queue_item, "has_audio", None) is not False
+            include_audio = getattr(queue_item, "has_audio", None) is not False and "drop_audio" not in fallbacks
             filter_complex, map_v, map_a = self._buildTrimConcatFilter(segments, scale, include_audio=include_audio)
             codec_val = (queue_item.codec or "libx264") if (queue_item.codec and queue_item.codec not in ("default", "current", "")) else "libx264"
             args = probe_args + ["-i", input_file_normalized, "-filter_complex", filter_complex, "-map", map_v, "-c:v", codec_val]
             args += video_extra
             if include_audio and map_a:
-                audio_args_filter = ["-c:a", "aac"]
-                if getattr(queue_item, "audio_bitrate", 0) > 0:
-                    audio_args_filter += ["-b:a", str(queue_item.audio_bitrate) + "k"]
-                if getattr(queue_item, "sample_rate", 0) > 0:
-                    audio_args_filter += ["-ar", str(queue_item.sample_rate)]
                 args += ["-map", map_a]
-                args += audio_args_filter
+                args += self._concatAudioArgsForItem(queue_item)
             if apply_tag_hvc1:
                 args += ["-tag:v", "hvc1"]
             if extra_args:
                 args += extra_args
             args.append(final_output)
         else:
-            args = ["-i", input_file_normalized]
+            args = probe_args + ["-i", input_file_normalized]
             args += vf_args + codec_args + video_extra + audio_args
             if apply_tag_hvc1:
                 args += ["-tag:v", "hvc1"]
@@ -401,22 +645,21 @@ class EncodingMixin:
             if reply != QMessageBox.Yes:
                 return
             self._abortRequested = True
-            if self.ffmpegProcess.state() == QProcess.Running:
-                self.ffmpegProcess.kill()
+            job = self._queueJob
+            if job is not None and job.state == Job.STATE_RUNNING:
+                self._scheduler.cancel(job)  # сброс выполнит processFinished
             else:
+                self._scheduler.cancel(job)
+                self._queueJob = None
                 self._applyAbortReset()
             return
         self.startQueueProcessing()
 
     def _applyAbortReset(self):
         self._abortRequested = False
-        if self.currentQueueIndex >= 0 and self.currentQueueIndex < len(self.queue):
-            item = self.queue[self.currentQueueIndex]
-            try:
-                if item.output_file and os.path.exists(item.output_file):
-                    os.remove(item.output_file)
-            except Exception:
-                pass
+        for item in self._queueRunItems():
+            self._removeItemOutputs(item)
+        self._mergedQueueItems = []
         for it in self.queue:
             it.status = QueueItem.STATUS_WAITING
             it.progress = 0
@@ -440,9 +683,11 @@ class EncodingMixin:
         if not self.queue:
             QMessageBox.information(self, "Очередь", "Очередь пуста. Добавьте файлы для обработки.")
             return
-        if self.ffmpegProcess.state() != QProcess.NotRunning:
+        if self._scheduler.activeJobs(Job.LANE_QUEUE):
             QMessageBox.information(self, "Ожидание", "Дождитесь завершения текущего кодирования")
             return
+        self._flushPendingPresetEditorUpdates()
+        self._outputNames.invalidate()
         for it in self.queue:
             it.status = QueueItem.STATUS_WAITING
             it.progress = 0
@@ -450,21 +695,83 @@ class EncodingMixin:
             it.output_renamed = False
             it.encoding_duration = 0
             it.processed_frames = 0
+            it.prepared = False
+            it.stall_retries = 0
+            it.fallbacks = []
+            it.verify_state = ""
+            it.result_key = None
+            it.from_cache = False
+            it.staged_outputs = {}
+            it.output_estimate = 0
+            it.disk_wait = False
+            it.disk_full_retries = 0
+        self._etaCalibration = 1.0
+        self._verifyGeneration += 1  # результаты проверок прошлого запуска очереди больше не нужны
         self._queueProgressMaxValue = 0
         self._queueProgressTarget = 0
         if hasattr(self.ui, 'totalQueueProgressBar'):
             self.ui.totalQueueProgressBar.setValue(0)
-        for it in self.queue:
-            self._getVideoDurationForItem(it)
         self.updateQueueTable()
         self.updateTotalQueueProgress()
+        # Команды проверяются по возможностям ffmpeg (обычно уже загружены при старте) до первого запуска
+        self._queueLaunchToken = getattr(self, "_queueLaunchToken", 0) + 1
+        token = self._queueLaunchToken
+        self._loadFfmpegCapabilities(lambda caps: self._startValidatedQueue(token))
+
+    def _itemCommandArgs(self, item):
+        """Аргументы, с которыми элемент будет запущен: отредактированная вручную команда или сгенерированная."""
+        if getattr(item, "command_manually_edited", False) and getattr(item, "command", "").strip():
+            try:
+                return self._substitutePathsInArgs(self._parseCommand(item.command.strip()), item)
+            except Exception:
+                pass  # при запуске в этом случае тоже используется сгенерированная команда
+        return self._getFFmpegArgs(item)
+
+    def _queueItemProblems(self, item):
+        """Что в команде элемента не поддерживает эта сборка ffmpeg (пустой список — можно запускать)."""
+        args = self._itemCommandArgs(item)
+        streams = (item.media_info or {}).get("streams") or []
+        return validateFFmpegArgs(args, self._ffmpegCaps, item.outputFiles(), streams)
+
+    def _startValidatedQueue(self, token):
+        """Отклоняет элементы, которые эта сборка ffmpeg выполнить не сможет, и запускает остальные."""
+        if token != getattr(self, "_queueLaunchToken", 0) or self.currentQueueIndex >= 0 or getattr(self, "_closingApp", False):
+            return
+        rejected = []
+        for row, item in enumerate(self.queue):
+            problems = self._queueItemProblems(item)
+            if not problems:
+                continue
+            item.status = QueueItem.STATUS_ERROR
+            item.error_message = "; ".join(problems)
+            rejected.append(f"{row + 1}. {os.path.basename(item.file_path)}: {item.error_message}")
+        if rejected:
+            self.updateQueueTable()
+            for line in rejected:
+                self.ui.logDisplay.append(f"<b><font color='red'>✗ Отклонён до запуска: {html.escape(line)}</font></b>")
+            shown = rejected[:QUEUE_VALIDATION_MAX_LISTED]
+            if len(rejected) > len(shown):
+                shown.append(f"… и ещё {len(rejected) - len(shown)}")
+            QMessageBox.warning(
+                self, "Проверка команд",
+                "Эти файлы нельзя обработать установленной сборкой ffmpeg, они пропущены:\n\n" + "\n".join(shown)
+            )
+        if all(item.status == QueueItem.STATUS_ERROR for item in self.queue):
+            self.updateStatus("Нет файлов, которые можно обработать")
+            return
         self.isPaused = False
         self._pauseStopRequested = False
         self.pausedQueueIndex = -1
         self.currentQueueIndex = 0
         self.processNextInQueue()
+        self._probeRemainingQueueItems()
 
     def processNextInQueue(self):
+        # Элементы, уже закодированные вместе с предыдущим (тот же входной файл), повторно не запускаются
+        while 0 <= self.currentQueueIndex < len(self.queue) and self.queue[self.currentQueueIndex].status in (
+            QueueItem.STATUS_SUCCESS, QueueItem.STATUS_ERROR
+        ):
+            self.currentQueueIndex += 1
         if self.currentQueueIndex < 0 or self.currentQueueIndex >= len(self.queue):
             self.currentQueueIndex = -1
             if hasattr(self.ui, 'runButton'):
@@ -472,6 +779,7 @@ class EncodingMixin:
                 self.ui.runButton.setStyleSheet(getattr(self, '_runButtonStyleStart', self._runButtonStyleStart))
                 self.ui.runButton.setEnabled(True)
             self.updateStatus("Все файлы обработаны")
+            self._clearInputPrefetch()
             QMessageBox.information(self, "Готово", "Обработка всех файлов завершена!")
             return
         item = self.queue[self.currentQueueIndex]
@@ -479,7 +787,268 @@ class EncodingMixin:
         item.progress = 0
         self.updateQueueTable()
         self.updateStatus(f"Обработка файла {self.currentQueueIndex + 1} из {len(self.queue)}")
-        if getattr(item, "command_manually_edited", False) and getattr(item, "command", "").strip():
+        # Токен отбрасывает результат подготовки, если за это время очередь прервали или перезапустили
+        self._queueLaunchToken = getattr(self, "_queueLaunchToken", 0) + 1
+        token = self._queueLaunchToken
+        index = self.currentQueueIndex
+        if getattr(item, "prepared", False):
+            self._launchQueueItem(token, index, item.input_stat)
+        else:
+            self._prepareQueueItem(item, lambda it: self._launchQueueItem(token, index, it.input_stat))
+
+    def _prepareQueueItem(self, item, callback=None):
+        """Готовит элемент к запуску в фоне: stat входного файла, чтение папки вывода, ffprobe, выходное имя.
+
+        callback(item) вызывается в потоке GUI; повторные запросы для того же элемента ждут первый.
+        """
+        waiting = self._preparingItems.get(id(item))
+        if waiting is not None:
+            if callback is not None:
+                waiting.append(callback)
+            return
+        self._preparingItems[id(item)] = [callback] if callback is not None else []
+        input_path = item.file_path
+        output_dir = os.path.dirname(os.path.normpath(item.output_file or input_path))
+        directories = [output_dir] + [
+            os.path.normpath(d["dir"]) for d in getattr(item, "extra_destinations", []) if d.get("dir")
+        ]
+
+        def _finish(st, info, content_hash=None):
+            callbacks = self._preparingItems.pop(id(item), [])
+            item.input_stat = st
+            item.content_hash = content_hash or ""
+            if content_hash and HASH_FULL_IN_BACKGROUND:
+                self._requestFullHash(item)
+            if info is not None:
+                self._applyProbeInfo(item, info)
+            elif st is not None:
+                item.media_info = {}
+                if self._probeStore.toolMissing:
+                    self._warnFfprobeMissing()
+            if st is not None and not getattr(item, "command_manually_edited", False):
+                # Папка вывода уже прочитана — резервируем итоговое имя заранее
+                self._resolveOutputPathForItem(item, self._containerExtForItem(item))
+            item.prepared = True
+            for cb in callbacks:
+                cb(item)
+
+        def _onStat(stats):
+            st = stats.get(input_path)
+            if st is None:
+                _finish(None, None)
+                return
+            self._fs.submit(
+                self._probeInputWorker, self._ffprobeExecutable(), input_path, st,
+                callback=lambda result: _finish(st, *(result or (None, None))),
+            )
+
+        self._fs.statMany([input_path], _onStat, directories=directories)
+
+    def _probeInputWorker(self, ffprobe_exec, path, st):
+        """Рабочий поток: данные ffprobe и выборочный хэш входа (оба из кэша ProbeStore, если файл не менялся)."""
+        return self._probeStore.probe(ffprobe_exec, path, st), self._probeStore.sampledHash(path, st)
+
+    def _requestFullHash(self, item, callback=None):
+        """Полный SHA-256 входа в отдельном пуле (файлы бывают в десятки ГБ); callback(item) — в потоке GUI."""
+        if item.full_hash:
+            if callback is not None:
+                callback(item)
+            return
+        path, st = item.file_path, item.input_stat
+
+        def _done(value):
+            if value and item.input_stat is st:
+                item.full_hash = value
+            if callback is not None:
+                callback(item)
+
+        self._hashFs.submit(self._probeStore.fullHash, path, st, self._hashFs.isClosed, callback=_done)
+
+    def _prefetchQueueJobs(self):
+        """Готовит следующие JOB_PREFETCH_COUNT ожидающих элементов, пока кодируется текущий."""
+        if self.currentQueueIndex < 0:
+            return
+        count = 0
+        for item in self.queue[self.currentQueueIndex + 1:]:
+            if count >= JOB_PREFETCH_COUNT:
+                break
+            if item.status != QueueItem.STATUS_WAITING:
+                continue
+            count += 1
+            prefetch_input = count <= self._inputPrefetchCount and self._inputPrefetchMode
+            if not getattr(item, "prepared", False):
+                self._prepareQueueItem(item, self._prefetchInput if prefetch_input else None)
+            elif prefetch_input:
+                self._prefetchInput(item)
+
+    # --- Упреждающее чтение входов с медленного диска ---
+
+    def _inputPrefetchCache(self):
+        """Кэш локальных копий входов или None, если его папка совпадает с временной папкой выходов.
+
+        Копии всегда лежат в собственной подпапке INPUT_PREFETCH_DIR_NAME: removeLeftovers удаляет
+        файлы по шаблону имени, и в общей папке он задел бы выходы, ждущие переноса на место.
+        """
+        if self._inputPrefetch is None:
+            directory = os.path.join(self._inputPrefetchDir or tempfile.gettempdir(), INPUT_PREFETCH_DIR_NAME)
+            staging_dir = getattr(self, "_stagingDir", "") or ""
+            if staging_dir and os.path.normcase(os.path.normpath(directory)) == os.path.normcase(os.path.normpath(staging_dir)):
+                logger.warning("Папка копий входов совпадает с временной папкой выходов, копирование выключено: %s", directory)
+                self._inputPrefetchMode = PREFETCH_MODE_OFF
+                return None
+            self._inputPrefetch = InputPrefetchCache(directory, int(self._inputPrefetchBudgetGb * 1024 ** 3))
+            self._prefetchFs.submit(self._inputPrefetch.removeLeftovers)
+        return self._inputPrefetch
+
+    def _prefetchInput(self, item):
+        """Пока кодируется текущий файл, копирует вход следующего на локальный диск или просит ОС прочитать его."""
+        if item.input_stat is None or item.status != QueueItem.STATUS_WAITING:
+            return
+        if self._inputPrefetchMode == PREFETCH_MODE_COPY:
+            cache = self._inputPrefetchCache()
+            if cache is not None:
+                self._prefetchFs.submit(cache.stage, item.file_path, item.input_stat)
+        elif self._inputPrefetchMode == PREFETCH_MODE_FADVISE:
+            self._prefetchFs.submit(warmFile, item.file_path)
+
+    def _prefetchedInputArgs(self, item, args):
+        """Подставляет вместо входа готовую локальную копию (если она уже скопирована и исходник не менялся)."""
+        if self._inputPrefetchMode != PREFETCH_MODE_COPY:
+            return args
+        cache = self._inputPrefetchCache()
+        if cache is None:
+            return args
+        cache.setInUse([item.file_path])
+        staged = cache.stagedPath(item.file_path, item.input_stat)
+        if staged is None:
+            return args
+        source = os.path.normcase(os.path.normpath(item.file_path))
+        args = list(args)
+        for i in range(1, len(args)):
+            if args[i - 1] == "-i" and os.path.normcase(os.path.normpath(args[i])) == source:
+                args[i] = staged
+        self.ui.logDisplay.append(f"<font color='#666666'>Вход читается из локальной копии: {html.escape(staged)}</font>")
+        return args
+
+    def _probeRemainingQueueItems(self):
+        """По одному пробует элементы без данных ffprobe (для общего прогресса и ETA очереди).
+
+        В пуле одновременно занят не больше одного потока, чтобы не задерживать подготовку ближайших запусков.
+        """
+        if getattr(self, "_backgroundProbeActive", False) or self.currentQueueIndex < 0:
+            return
+        item = next(
+            (it for it in self.queue
+             if it.media_info is None and id(it) not in self._preparingItems and it.status == QueueItem.STATUS_WAITING),
+            None,
+        )
+        if item is None:
+            return
+        self._backgroundProbeActive = True
+
+        def _done(info):
+            self._backgroundProbeActive = False
+            if info is not None:
+                self._applyProbeInfo(item, info)
+                self.updateTotalQueueProgress()
+            else:
+                item.media_info = {}
+            self._probeRemainingQueueItems()
+
+        self._fs.submit(self._probeStore.probe, self._ffprobeExecutable(), item.file_path, callback=_done)
+
+    def _probeItemAsync(self, item, callback):
+        """Данные ffprobe для элемента в фоне; если они уже есть — callback(item) вызывается сразу."""
+        if item.media_info is not None:
+            callback(item)
+            return
+
+        def _done(info):
+            if info is not None:
+                self._applyProbeInfo(item, info)
+            else:
+                item.media_info = {}
+                if self._probeStore.toolMissing:
+                    self._warnFfprobeMissing()
+            callback(item)
+
+        self._fs.submit(self._probeStore.probe, self._ffprobeExecutable(), item.file_path, callback=_done)
+
+    def _ffprobeExecutable(self):
+        return self._getToolPath("ffprobe") if hasattr(self, "_getToolPath") else "ffprobe"
+
+    def _applyProbeInfo(self, item, info):
+        """Переносит результат ProbeStore в поля элемента (длительность, fps, число кадров, наличие аудио)."""
+        if not info:
+            return
+        item.media_info = info
+        if info.get("duration", 0) > 0:
+            item.video_duration = info["duration"]
+        if info.get("streams"):
+            item.has_audio = info.get("has_audio")
+            item.video_fps = info.get("fps", 0.0)
+            if info.get("total_frames", 0) > 0:
+                item.total_frames = info["total_frames"]
+        else:
+            item.has_audio = None
+
+    def _collectMergeableQueueItems(self, index):
+        """Ожидающие элементы после index с тем же входным файлом и той же обрезкой, что у элемента index.
+
+        Их выходы пишутся тем же запуском ffmpeg, поэтому большой файл читается и декодируется один раз.
+        Элементы с вручную отредактированной командой не объединяются. Объединённый запуск берёт
+        только первые видео- и аудиодорожку, поэтому входы, где одиночный запуск выбрал бы потоки
+        иначе (субтитры, несколько дорожек), кодируются отдельными запусками.
+        """
+        if not QUEUE_MERGE_DUPLICATE_INPUTS:
+            return []
+        item = self.queue[index]
+        if getattr(item, "command_manually_edited", False) or not self._hasSimpleStreamLayout(item):
+            return []
+        key = os.path.normcase(os.path.normpath(item.file_path))
+        segments = self._getTrimSegments(item)
+        merged = []
+        for other in self.queue[index + 1:]:
+            if other.status != QueueItem.STATUS_WAITING or getattr(other, "command_manually_edited", False):
+                continue
+            if os.path.normcase(os.path.normpath(other.file_path)) != key:
+                continue
+            if self._getTrimSegments(other) != segments:
+                continue
+            merged.append(other)
+        return merged
+
+    def _hasSimpleStreamLayout(self, item):
+        """Во входе одна видеодорожка, не больше одной аудио и нет других потоков (субтитров, данных, вложений).
+
+        Для такого входа выбор потоков ffmpeg по умолчанию совпадает с -map 0:v:0 -map 0:a:0?.
+        Состав потоков неизвестен (ffprobe не отработал) — False.
+        """
+        kinds = [st.get("codec_type") for st in (item.media_info or {}).get("streams") or []]
+        return kinds.count("video") == 1 and kinds.count("audio") <= 1 and len(kinds) == 1 + kinds.count("audio")
+
+    def _queueRunItems(self):
+        """Элементы, которые кодирует текущий запуск очереди: текущий и объединённые с ним."""
+        items = []
+        if 0 <= self.currentQueueIndex < len(self.queue):
+            items.append(self.queue[self.currentQueueIndex])
+        return items + [it for it in self._mergedQueueItems if it not in items]
+
+    def _launchQueueItem(self, token, index, input_stat):
+        if token != getattr(self, "_queueLaunchToken", 0) or getattr(self, "_closingApp", False):
+            return
+        if index != self.currentQueueIndex or index >= len(self.queue) or self.isPaused:
+            return
+        item = self.queue[index]
+        manual = getattr(item, "command_manually_edited", False) and getattr(item, "command", "").strip()
+        merged = self._collectMergeableQueueItems(index) if input_stat is not None and not manual else []
+        if input_stat is not None:
+            unlisted = self._unlistedOutputDirectories([item] + merged)
+            if unlisted:
+                # Имена выходов выдаются только по прочитанным папкам; читаем их в фоне и возвращаемся
+                self._listOutputDirectories(unlisted, lambda: self._launchQueueItem(token, index, input_stat))
+                return
+        if manual:
             try:
                 cmd_from_item = item.command.strip()
                 args = self._parseCommand(cmd_from_item)
@@ -492,16 +1061,18 @@ class EncodingMixin:
                 )
                 args = self._getFFmpegArgs(item)
         else:
-            args = self._getFFmpegArgs(item)
+            args = self._getLadderArgs(item, merged) if merged else self._getFFmpegArgs(item)
+            self._mergedQueueItems = merged
         if not args:
             QMessageBox.warning(self, "Ошибка", f"Не удалось сгенерировать команду для файла:\n{item.file_path}")
+            self._mergedQueueItems = []
             item.status = QueueItem.STATUS_ERROR
             item.error_message = "Ошибка генерации команды"
             self.currentQueueIndex += 1
             self.processNextInQueue()
             return
         self.updateQueueTable()
-        if not os.path.exists(item.file_path):
+        if input_stat is None:
             QMessageBox.critical(self, "Ошибка", f"Файл не существует:\n{item.file_path}")
             item.status = QueueItem.STATUS_ERROR
             item.error_message = "Файл не существует"
@@ -509,6 +1080,14 @@ class EncodingMixin:
             self.processNextInQueue()
             return
         self.ui.logDisplay.append(f"<br><b>=== Обработка файла {self.currentQueueIndex + 1}: {os.path.basename(item.file_path)} ===</b><br>")
+        for other in self._mergedQueueItems:
+            other.status = QueueItem.STATUS_PROCESSING
+            other.progress = 0
+            self.ui.logDisplay.append(
+                f"<b>+ файл {self.queue.index(other) + 1} (тот же вход, пресет {other.preset_name}) кодируется этим же запуском</b>"
+            )
+        if self._mergedQueueItems:
+            self.updateQueueTable()
         if hasattr(self.ui, 'runButton'):
             self.ui.runButton.setText("Завершить кодирование")
             self.ui.runButton.setStyleSheet(getattr(self, '_runButtonStyleAbort', self._runButtonStyleAbort))
@@ -518,13 +1097,314 @@ class EncodingMixin:
             self.ui.pauseResumeButton.setText("Пауза")
         self.encodingDuration = 0
         self.currentFrame = 0
+        self._queueStderrTail = ""
         item.processed_frames = 0
         self._resetEtaTracking()
         if hasattr(self.ui, 'encodingProgressBar'):
             self.ui.encodingProgressBar.setValue(0)
-        self._getVideoDurationForItem(item)
+        self._getVideoDurationForItem(item, lambda it: self._continueQueueLaunch(token, index, it, args))
+
+    def _continueQueueLaunch(self, token, index, item, args):
+        if token != getattr(self, "_queueLaunchToken", 0) or getattr(self, "_closingApp", False):
+            return
+        if index != self.currentQueueIndex or self.isPaused:
+            return
         self._warnConcatAudioBehavior(item)
-        self.ffmpegProcess.start("ffmpeg", args)
+        if self._resultCacheApplies(item, args):
+            self._lookupCachedResult(token, index, item, args)
+            return
+        self._submitQueueJob(item, args)
+
+    def _unlistedOutputDirectories(self, items):
+        """Папки выходов элементов (включая дополнительные места сохранения), которых ещё нет в кэше имён."""
+        directories = []
+        for it in items:
+            directories.append(os.path.dirname(os.path.normpath(it.output_file or it.file_path)))
+            directories += [os.path.normpath(d["dir"]) for d in getattr(it, "extra_destinations", []) if d.get("dir")]
+        return [d for d in dict.fromkeys(directories) if not self._outputNames.isDirectoryKnown(d)]
+
+    def _listOutputDirectories(self, directories, callback):
+        """Читает папки в пуле потоков и передаёт их в кэш имён; callback() — когда прочитаны все.
+
+        Недоступная папка считается пустой: запуск в неё всё равно завершится ошибкой ffmpeg.
+        """
+        remaining = set(directories)
+
+        def _listed(directory, names):
+            if not self._outputNames.isDirectoryKnown(directory):
+                self._outputNames.primeDirectory(directory, names or ())
+            remaining.discard(directory)
+            if not remaining:
+                callback()
+
+        for directory in directories:
+            self._fs.listdir(directory, lambda names, directory=directory: _listed(directory, names))
+
+    def _submitQueueJob(self, item, args):
+        args = self._prefetchedInputArgs(item, self._stageRunOutputs(args))
+        for run_item in self._queueRunItems():
+            run_item.output_estimate = self._estimateOutputBytes(run_item)
+        if DISK_SPACE_CHECK:
+            self._admitQueueJob(self._queueLaunchToken, self.currentQueueIndex, item, args)
+        else:
+            self._startQueueJob(item, args)
+
+    def _startQueueJob(self, item, args):
+        # Очередь занимает все ядра, кроме оставленных для одиночных конвертаций (если потоки не заданы в пресете)
+        cores = item.threads if getattr(item, "threads", 0) > 0 else max(
+            1, self._scheduler.totalCores - SCHEDULER_INTERACTIVE_CORES
+        )
+        # -nostdin: ffmpeg очереди не должен ждать ответа в консоли (например, на вопрос о перезаписи)
+        if "-nostdin" not in args:
+            args = ["-nostdin"] + list(args)
+        job = Job(
+            "ffmpeg", limitThreads(args, cores), lane=Job.LANE_QUEUE, cores=cores,
+            label="кодирование очереди",
+            output_paths=[
+                it.staged_outputs.get(path, path) for it in self._queueRunItems() for path in it.outputFiles()
+            ],
+        )
+        job.estimated_bytes = {
+            it.staged_outputs.get(path, path): it.output_estimate
+            for it in self._queueRunItems() for path in it.outputFiles()
+        }
+        job.stall_timeout = self._watchdogStallSec
+        job.on_started = self._onQueueJobStarted
+        job.on_output = self._onQueueJobOutput
+        job.on_finished = self._onQueueJobFinished
+        job.on_error = self._onQueueJobError
+        self._queueJob = self._scheduler.submit(job)
+        self._prefetchQueueJobs()
+
+    # --- Временная папка: выходы пишутся на быстрый локальный диск и переносятся на место после проверки ---
+
+    def _stagingDirectory(self):
+        """Временная папка для выходов или "" (режим выключен или папку не создать)."""
+        staging_dir = getattr(self, "_stagingDir", "") or ""
+        if not staging_dir:
+            return ""
+        try:
+            os.makedirs(staging_dir, exist_ok=True)
+        except OSError:
+            logger.warning("Временная папка недоступна, выходы пишутся сразу на место: %s", staging_dir)
+            return ""
+        return staging_dir
+
+    def _stageRunOutputs(self, args):
+        """Подменяет в аргументах выходы запуска путями во временной папке (и внутри спецификации tee).
+
+        Временная папка принадлежит программе, и в ней может остаться файл прошлого запуска с тем же
+        именем (например, не прошедший проверку), поэтому перезапись разрешается (-y).
+        """
+        run_items = self._queueRunItems()
+        for run_item in run_items:
+            run_item.staged_outputs = {}
+        staging_dir = self._stagingDirectory()
+        if not staging_dir:
+            return args
+        mapping = {}
+        for run_item in run_items:
+            for path in run_item.outputFiles():
+                staged = stagingPathFor(staging_dir, path)
+                run_item.staged_outputs[path] = staged
+                mapping[os.path.normcase(os.path.normpath(path))] = (path, staged)
+        staged_args = []
+        for i, arg in enumerate(args):
+            entry = mapping.get(os.path.normcase(os.path.normpath(arg))) if arg and not arg.startswith("-") else None
+            if entry is not None:
+                staged_args.append(entry[1])
+            elif i > 0 and args[i - 1] == "tee" and i > 1 and args[i - 2] == "-f":
+                for path, staged in mapping.values():
+                    arg = arg.replace(self._teeEscape(path), self._teeEscape(staged))
+                staged_args.append(arg)
+            else:
+                staged_args.append(arg)
+        if "-y" not in staged_args:
+            staged_args.insert(0, "-y")
+        return staged_args
+
+    def _commitStagedOutputs(self, item, generation):
+        """Переносит проверенные выходы из временной папки на место в фоне (os.replace на том же диске)."""
+        pairs = [(staged, path) for path, staged in item.staged_outputs.items()]
+        verify_state = item.verify_state
+        item.verify_state = "moving"
+
+        def _done(failed):
+            item.staged_outputs = {}
+            if generation != self._verifyGeneration or item not in self.queue:
+                return
+            if failed is None or failed:
+                item.verify_state = "failed"
+                item.status = QueueItem.STATUS_ERROR
+                item.error_message = "Не удалось перенести результат из временной папки: " + ", ".join(
+                    os.path.basename(path) for path in (failed or [path for _, path in pairs])
+                )
+                self.ui.logDisplay.append(
+                    f"<b><font color='red'>✗ {html.escape(os.path.basename(item.file_path))}: "
+                    f"{html.escape(item.error_message)}</font></b>"
+                )
+                self.updateTotalQueueProgress()
+            else:
+                item.verify_state = verify_state
+                for _, path in pairs:
+                    self._fs.invalidate(path)
+                self._storeCachedResult(item)
+            self.updateQueueTable()
+
+        self._fs.submit(commitStagedFiles, pairs, callback=_done)
+
+    # --- Кэш результатов: элемент с неизменными входом, командой и ffmpeg не перекодируется ---
+
+    def _resultCacheApplies(self, item, args):
+        """Кэш используется для запусков с одним выходом, когда известна версия ffmpeg."""
+        return (
+            RESULT_CACHE_ENABLED and self._ffmpegCaps is not None and bool(args)
+            and not self._mergedQueueItems and len(item.outputFiles()) == 1
+        )
+
+    def _lookupCachedResult(self, token, index, item, args):
+        template = commandTemplate(args, item.file_path, item.outputFiles())
+        path, st, fingerprint, version = item.file_path, item.input_stat, item.content_hash, self._ffmpegCaps.version
+
+        def _find():
+            return self._resultCache.lookup(fingerprint or self._probeStore.sampledHash(path, st), template, version)
+
+        self._fs.submit(
+            _find,
+            callback=lambda found: self._onCachedResultLooked(token, index, item, args, found),
+        )
+
+    def _onCachedResultLooked(self, token, index, item, args, found):
+        if token != getattr(self, "_queueLaunchToken", 0) or getattr(self, "_closingApp", False):
+            return
+        if index != self.currentQueueIndex or self.isPaused:
+            return
+        key, cached_paths = found if found else (None, None)
+        item.result_key = key
+        if not cached_paths:
+            self._submitQueueJob(item, args)
+            return
+        source = cached_paths[0]
+        if self._isOwnCachedOutput(item, source):
+            # Имя выбрано автоматически, а файл прошлого запуска лежит там же под тем же именем — он и есть результат
+            self._outputNames.release(item)
+            item.output_file = source
+            item.output_renamed = False
+            self._onCachedResultReady(token, index, item, args, True)
+            return
+        self._fs.submit(
+            ResultCache.materialize, source, item.output_file,
+            callback=lambda ok: self._onCachedResultReady(token, index, item, args, ok),
+        )
+
+    def _isOwnCachedOutput(self, item, path):
+        """Готовый выход можно оставить на месте: имя элемента автоматическое, папка и имя по шаблону те же,
+        и файл не принадлежит другому элементу очереди (вход с тем же содержимым)."""
+        if getattr(item, "output_chosen_by_user", False) or not item.output_file:
+            return False
+        if os.path.normcase(os.path.dirname(path)) != os.path.normcase(os.path.dirname(os.path.normpath(item.output_file))):
+            return False
+        name, ext = os.path.splitext(os.path.basename(path))
+        if ext.lower() != os.path.splitext(item.output_file)[1].lower() or not name.startswith(self._outputStemForItem(item)):
+            return False
+        key = os.path.normcase(os.path.normpath(path))
+        return not any(
+            key == os.path.normcase(os.path.normpath(other_path))
+            for other in self.queue if other is not item for other_path in other.outputFiles()
+        )
+
+    def _onCachedResultReady(self, token, index, item, args, ok):
+        if token != getattr(self, "_queueLaunchToken", 0) or index != self.currentQueueIndex or self.isPaused:
+            return
+        if not ok:
+            self._submitQueueJob(item, args)
+            return
+        item.from_cache = True
+        self.ui.logDisplay.append(
+            f"<b><font color='green'>⤳ Вход, команда и ffmpeg не менялись — результат взят из кэша: "
+            f"{html.escape(item.output_file)}</font></b>"
+        )
+        self.processFinished(0, QProcess.ExitStatus.NormalExit)
+
+    def _onQueueJobStarted(self, job):
+        self.ffmpegProcess = job.process
+        self._startQueueMetrics(job)
+
+    def _onQueueJobFinished(self, job, exitCode, exitStatus):
+        self._queueJob = None
+        self.ffmpegProcess = self._idleFfmpegProcess
+        run_items = self._queueRunItems()
+        interrupted = getattr(self, '_abortRequested', False) or (self.isPaused and self._pauseStopRequested)
+        if job.stalled and not interrupted:
+            self._onQueueRunStalled(job)
+        else:
+            self.processFinished(exitCode, exitStatus)
+        self._recordQueueMetrics(job, exitCode, run_items, interrupted)
+
+    def _onQueueJobError(self, job, error):
+        if job.stalled:
+            return  # процесс убит сторожем зависаний — итог разберёт _onQueueJobFinished
+        if error == QProcess.ProcessError.FailedToStart:
+            self._queueJob = None
+            self.ffmpegProcess = self._idleFfmpegProcess
+        self.onProcessError(error)
+
+    def _onQueueRunStalled(self, job):
+        """Процесс убит сторожем зависаний: перезапуск с паузой (удваивается с каждой попыткой) или ошибка и следующий файл."""
+        if getattr(self, '_closingApp', False):
+            return
+        if self.currentQueueIndex < 0 or self.currentQueueIndex >= len(self.queue):
+            return
+        item = self.queue[self.currentQueueIndex]
+        run_items = self._queueRunItems()
+        self._mergedQueueItems = []
+        reason = (
+            f"FFmpeg завис: нет прогресса {int(job.stall_timeout)} с "
+            f"(позиция {self._formatTime(job.out_time_sec)}), процесс остановлен"
+        )
+        for run_item in run_items:
+            self._removeItemOutputs(run_item)
+            run_item.progress = 0
+        if hasattr(self.ui, 'encodingProgressBar'):
+            self.ui.encodingProgressBar.setValue(PROGRESS_MIN)
+        if hasattr(self.ui, 'pauseResumeButton'):
+            self.ui.pauseResumeButton.setEnabled(False)
+            self.ui.pauseResumeButton.setText("Пауза")
+        name = html.escape(os.path.basename(item.file_path))
+        if item.stall_retries < self._watchdogMaxRetries:
+            delay = WATCHDOG_RETRY_DELAY_SEC * (2 ** item.stall_retries)
+            attempt = item.stall_retries + 2
+            for run_item in run_items:
+                run_item.stall_retries += 1
+                run_item.status = QueueItem.STATUS_WAITING
+                run_item.error_message = f"{reason}; попытка {attempt}"
+            self.ui.logDisplay.append(
+                f"<br><b><font color='#FF8C00'>⚠ {name}: {html.escape(reason)}. Повтор через {delay} с "
+                f"(попытка {attempt} из {self._watchdogMaxRetries + 1})</font></b>"
+            )
+            self.updateQueueTable()
+            self.updateStatus(f"Файл {self.currentQueueIndex + 1} завис — повтор через {delay} с")
+            # Токен отменяет повтор, если за время паузы очередь прервали или перезапустили
+            self._queueLaunchToken = getattr(self, "_queueLaunchToken", 0) + 1
+            token = self._queueLaunchToken
+            index = self.currentQueueIndex
+            QTimer.singleShot(int(delay * 1000), lambda: self._retryStalledQueueItem(token, index))
+            return
+        for run_item in run_items:
+            run_item.status = QueueItem.STATUS_ERROR
+            run_item.error_message = reason
+        self.ui.logDisplay.append(f"<br><b><font color='red'>✗ {name}: {html.escape(reason)}. Файл пропущен</font></b>")
+        self.updateQueueTable()
+        self.updateTotalQueueProgress()
+        self.currentQueueIndex += 1
+        QTimer.singleShot(0, self.processNextInQueue)
+
+    def _retryStalledQueueItem(self, token, index):
+        if token != getattr(self, "_queueLaunchToken", 0) or getattr(self, "_closingApp", False):
+            return
+        if index != self.currentQueueIndex or self.isPaused:
+            return
+        self.processNextInQueue()
 
     def _splitArgs(self, value):
         if not value:
@@ -572,12 +1452,10 @@ class EncodingMixin:
         message = error_map.get(error, "Ошибка процесса FFmpeg.")
         if error == QProcess.ProcessError.FailedToStart:
             self._ffmpegWarningShown = True
-        item = None
-        if 0 <= self.currentQueueIndex < len(self.queue):
-            item = self.queue[self.currentQueueIndex]
-        if item:
-            item.status = QueueItem.STATUS_ERROR
-            item.error_message = message
+        for run_item in self._queueRunItems():
+            run_item.status = QueueItem.STATUS_ERROR
+            run_item.error_message = message
+        self._mergedQueueItems = []
         if hasattr(self.ui, "logDisplay"):
             self.ui.logDisplay.append(f"<br><b><font color='red'>✗ {message}</font></b>")
         QMessageBox.critical(self, "Ошибка FFmpeg", message)
@@ -668,7 +1546,7 @@ class EncodingMixin:
         flags_with_value = {
             "-i", "-c:v", "-c:a", "-c", "-codec:v", "-codec:a", "-b:v", "-b:a", "-r", "-crf",
             "-preset", "-profile:v", "-level", "-pix_fmt", "-tune", "-threads", "-g", "-vf",
-            "-filter_complex", "-map", "-tag:v", "-ar", "-s", "-ss", "-to"
+            "-filter_complex", "-map", "-tag:v", "-ar", "-s", "-ss", "-to", "-t"
         }
         pairs = []
         i = 0
@@ -721,15 +1599,17 @@ class EncodingMixin:
             args[-1] = output_path
         return args
 
-    def readProcessOutput(self):
-        out = self.ffmpegProcess.readAllStandardOutput().data().decode('utf-8', errors='replace').strip()
-        err = self.ffmpegProcess.readAllStandardError().data().decode('utf-8', errors='replace').strip()
+    def _onQueueJobOutput(self, job, out, err):
+        out = (out or "").strip()
+        err = (err or "").strip()
         if out:
             self._appendLog(out, 'info')
             self._parseProgressFromLog(out)
         if err:
             self._appendLog(err, 'error')
             self._parseProgressFromLog(err)
+            # Хвост stderr — для классификации ошибки, если запуск завершится неудачей
+            self._queueStderrTail = (self._queueStderrTail + err + "\n")[-QUEUE_STDERR_TAIL:]
 
     def _appendLog(self, text, source='info'):
         if not text:
@@ -787,13 +1667,13 @@ class EncodingMixin:
         if item.video_duration > 0 and self.encodingDuration > 0:
             progress = min(PROGRESS_MAX, int((self.encodingDuration / item.video_duration) * PROGRESS_MAX))
             self.encodingProgress = progress
-            item.progress = progress
             if hasattr(self.ui, 'encodingProgressBar'):
                 self.ui.encodingProgressBar.setValue(progress)
-            if hasattr(self.ui, 'queueTableWidget'):
-                table = self.ui.queueTableWidget
-                if self.currentQueueIndex < table.rowCount():
-                    progress_item = table.item(self.currentQueueIndex, 4)
+            for run_item in self._queueRunItems():
+                run_item.progress = progress
+                row = self.queue.index(run_item) if run_item in self.queue else -1
+                if hasattr(self.ui, 'queueTableWidget') and 0 <= row < self.ui.queueTableWidget.rowCount():
+                    progress_item = self.ui.queueTableWidget.item(row, 4)
                     if progress_item:
                         progress_item.setText(f"{progress}%")
             if hasattr(self.ui, 'videoTimelineSlider') and item.video_duration > 0:
@@ -809,19 +1689,10 @@ class EncodingMixin:
                     and self._emaSpeed is not None
                     and self._emaSpeed > 0.01
                 )
-                if eta_ready:
-                    remaining = max(0.0, item.video_duration - self.encodingDuration)
-                    eta_seconds = remaining / self._emaSpeed
-                    eta_text = self._formatTime(eta_seconds)
-                    queue_eta_text = None
-                    if all(getattr(it, "video_duration", 0) > 0 for it in self.queue):
-                        remaining_queue = sum(
-                            getattr(it, "video_duration", 0) or 0
-                            for it in self.queue[self.currentQueueIndex + 1:]
-                        )
-                        remaining_queue += remaining
-                        queue_eta_seconds = remaining_queue / self._emaSpeed
-                        queue_eta_text = self._formatTime(queue_eta_seconds)
+                remaining = max(0.0, item.video_duration - self.encodingDuration)
+                eta = self._remainingEtaTexts(item, remaining, eta_ready)
+                if eta is not None:
+                    eta_text, queue_eta_text = eta
                     base = f"Обработка файла {self.currentQueueIndex + 1} из {len(self.queue)}"
                     if queue_eta_text:
                         self.updateStatus(f"{base} — осталось: {eta_text}, очередь: {queue_eta_text}")
@@ -943,11 +1814,13 @@ class EncodingMixin:
             self.queue[i].error_message = ""
         try:
             if platform.system() == "Windows":
-                self.ffmpegProcess.kill()
+                self._scheduler.cancel(self._queueJob)
             else:
                 import signal
                 try:
                     os.kill(self.ffmpegProcess.processId(), signal.SIGSTOP)
+                    if self._queueJob is not None:
+                        self._queueJob.stall_timeout = 0  # остановлен пользователем — не зависание
                 except (ProcessLookupError, PermissionError) as e:
                     QMessageBox.warning(self, "Ошибка", f"Не удалось приостановить процесс: {str(e)}")
                     self.isPaused = False
@@ -972,12 +1845,9 @@ class EncodingMixin:
             self.isPaused = False
             self._pauseStopRequested = False
             return
-        item = self.queue[self.pausedQueueIndex]
-        if item.output_file and os.path.exists(item.output_file):
-            try:
-                os.remove(item.output_file)
-            except Exception:
-                pass
+        for item in [self.queue[self.pausedQueueIndex]] + list(self._mergedQueueItems):
+            self._removeItemOutputs(item)
+        self._mergedQueueItems = []
         self.isPaused = False
         self._pauseStopRequested = False
         self.currentQueueIndex = self.pausedQueueIndex
@@ -985,81 +1855,158 @@ class EncodingMixin:
             self.ui.pauseResumeButton.setText("Пауза")
         self.processNextInQueue()
 
-    def _getVideoDurationForItem(self, item):
-        if not item or not item.file_path:
+    def _expectedOutputDuration(self, item):
+        """Длительность, которую должен иметь выход: сумма оставленных фрагментов или длительность входа."""
+        duration = getattr(item, "video_duration", 0) or 0
+        segments = self._getTrimSegments(item)
+        if not segments:
+            return duration
+        kept = 0.0
+        for start, end in segments:
+            if duration > 0:
+                start, end = min(start, duration), min(end, duration)
+            kept += max(0.0, end - start)
+        return kept
+
+    def _outputVerifyChecks(self, item):
+        """Что проверять у выходов элемента: [(путь, длительность, есть видео, есть аудио)]."""
+        if getattr(item, "command_manually_edited", False):
+            # Команду меняли вручную — известно только, что файл должен быть и читаться
+            return [(item.staged_outputs.get(path, path), 0.0, None, None) for path in item.outputFiles()]
+        streams = (item.media_info or {}).get("streams") or []
+        input_video = any(st.get("codec_type") == "video" for st in streams) if streams else None
+        input_audio = any(st.get("codec_type") == "audio" for st in streams) if streams else None
+        extra_args = self._getExtraArgsList(getattr(item, "extra_args", ""))
+        expect_audio = input_audio
+        if "drop_audio" in getattr(item, "fallbacks", ()) or "-an" in extra_args:
+            expect_audio = False if input_audio is not None else None
+        # Дополнительные параметры пресета сами ограничивают длительность — ожидаемая неизвестна
+        limits_duration = any(
+            arg in ("-t", "-to", "-ss", "-sseof", "-frames", "-frames:v", "-vframes") for arg in extra_args
+        )
+        expected_duration = 0.0 if limits_duration else self._expectedOutputDuration(item)
+        checks = []
+        for path in item.outputFiles():
+            audio_only = os.path.splitext(path)[1].lstrip(".").lower() in AUDIO_ONLY_EXTENSIONS
+            expect_video = None if audio_only or "-vn" in extra_args else input_video
+            checks.append((item.staged_outputs.get(path, path), expected_duration, expect_video, expect_audio))
+        return checks
+
+    def _verifyQueueItemOutputs(self, item):
+        """Проверяет выходы закодированного элемента в пуле потоков, пока очередь кодирует следующий файл.
+
+        Выходы из временной папки переносятся на место только после проверки.
+        """
+        generation = self._verifyGeneration
+        checks = self._outputVerifyChecks(item) if VERIFY_OUTPUTS else []
+        if not checks:
+            self._onQueueItemVerified(item, generation, None)
             return
-        try:
-            ffprobe_executable = "ffprobe"
-            app_dir = getattr(self, '_appDir', None)
-            if app_dir:
-                if platform.system() == "Windows":
-                    local_ffprobe = os.path.join(app_dir, "ffprobe.exe")
-                else:
-                    local_ffprobe = os.path.join(app_dir, "ffprobe")
-                if os.path.exists(local_ffprobe):
-                    ffprobe_executable = local_ffprobe
-            args = [
-                '-v', 'error',
-                '-show_entries', 'format=duration:stream=codec_type,avg_frame_rate,nb_frames',
-                '-of', 'json',
-                item.file_path
-            ]
-            proc = QProcess()
-            proc.start(ffprobe_executable, args)
-            if not proc.waitForFinished(5000):
-                try:
-                    proc.kill()
-                except Exception:
-                    pass
-                return
-            if proc.exitStatus() != QProcess.ExitStatus.NormalExit or proc.exitCode() != 0:
-                return
-            raw = proc.readAllStandardOutput().data()
-            stdout = raw.decode('utf-8', errors='replace') if raw else ""
-            if stdout:
-                data = {}
-                try:
-                    data = json.loads(stdout)
-                except Exception:
-                    data = {}
-                duration_str = (data.get("format") or {}).get("duration", "") or ""
-                if duration_str:
-                    item.video_duration = float(duration_str)
-                    self.videoDuration = item.video_duration
-                streams = data.get("streams") or []
-                if streams:
-                    item.has_audio = any(s.get("codec_type") == "audio" for s in streams)
-                    stream = next((s for s in streams if s.get("codec_type") == "video"), {}) or {}
-                    fps_str = stream.get("avg_frame_rate", "") or ""
-                    nb_frames_str = stream.get("nb_frames", "") or ""
-                    fps_val = 0.0
-                    if fps_str and fps_str != "0/0":
-                        if "/" in fps_str:
-                            num, den = fps_str.split("/", 1)
-                            try:
-                                fps_val = float(num) / float(den) if float(den) else 0.0
-                            except Exception:
-                                fps_val = 0.0
-                        else:
-                            try:
-                                fps_val = float(fps_str)
-                            except Exception:
-                                fps_val = 0.0
-                    item.video_fps = fps_val
-                    total_frames = 0
-                    if nb_frames_str and str(nb_frames_str).isdigit():
-                        total_frames = int(nb_frames_str)
-                    elif item.video_duration > 0 and fps_val > 0:
-                        total_frames = int(item.video_duration * fps_val)
-                    if total_frames > 0:
-                        item.total_frames = total_frames
-                else:
-                    item.has_audio = None
-        except FileNotFoundError:
-            logger.warning("Не удалось получить длительность видео: ffprobe не найден.")
-            self._warnFfprobeMissing()
-        except Exception:
-            logger.exception("Не удалось получить длительность видео")
+        item.verify_state = "pending"
+        self._fs.submit(
+            verifyOutputs, self._ffprobeExecutable(), checks,
+            callback=lambda problems: self._onQueueItemVerified(item, generation, problems),
+        )
+
+    def _onQueueItemVerified(self, item, generation, problems):
+        if generation != self._verifyGeneration or getattr(self, "_closingApp", False):
+            return
+        if item not in self.queue or item.status != QueueItem.STATUS_SUCCESS:
+            return
+        if problems is None:
+            item.verify_state = ""  # ffprobe недоступен или не ответил — проверка не выполнялась
+        elif not problems:
+            item.verify_state = "ok"
+            self._recordOutputSize(item)
+        else:
+            item.verify_state = "failed"
+            item.status = QueueItem.STATUS_ERROR
+            item.error_message = "Проверка результата: " + "; ".join(problems)
+            if item.staged_outputs:
+                item.error_message += f" (файл оставлен во временной папке {self._stagingDir})"
+                item.staged_outputs = {}
+            self.ui.logDisplay.append(
+                f"<b><font color='red'>✗ {html.escape(os.path.basename(item.file_path))}: "
+                f"{html.escape(item.error_message)}</font></b>"
+            )
+            self.updateTotalQueueProgress()
+        if item.status == QueueItem.STATUS_SUCCESS:
+            if item.staged_outputs:
+                self._commitStagedOutputs(item, generation)
+            elif item.verify_state == "ok":
+                self._storeCachedResult(item)
+        self.updateQueueTable()
+
+    def _storeCachedResult(self, item):
+        """Запоминает проверенный результат в кэше результатов (только если проверка действительно была)."""
+        if getattr(item, "result_key", None) and item.verify_state == "ok":
+            self._fs.submit(self._resultCache.store, item.result_key, item.outputFiles())
+
+    def _fallbackApplies(self, item, key):
+        """Меняет ли стратегия key что-нибудь в команде элемента."""
+        concat = len(self._getTrimSegments(item)) > 1
+        if key == "reencode_audio":
+            return not concat and (getattr(item, "audio_codec", "current") or "current") in ("current", "copy")
+        if key == "pix_fmt":
+            return not self._isRemuxItem(item) and getattr(item, "pixel_format", "") != FALLBACK_PIX_FMT
+        if key == "drop_audio":
+            return getattr(item, "has_audio", None) is not False
+        return True
+
+    def _tryQueueFallback(self, item, run_items):
+        """После неудачного запуска подбирает по stderr запасную стратегию и перезапускает элемент.
+
+        Стратегии (FALLBACK_STRATEGIES) применяются по одной и не повторяются; команды,
+        отредактированные вручную, не меняются. Возвращает True, если перезапуск запланирован.
+        """
+        if not QUEUE_AUTO_FALLBACKS or getattr(item, "command_manually_edited", False):
+            return False
+        stderr_text = self._queueStderrTail
+        category, label, detail = classifyFFmpegError(stderr_text)
+        applied = set(item.fallbacks)
+        applicable = [key for key, _, _, _ in FALLBACK_STRATEGIES if self._fallbackApplies(item, key)]
+        # Склейка с неизвестным наличием аудио падает на concat=a=1 без явной метки аудио в ошибке
+        presumed = ["drop_audio"] if (
+            len(self._getTrimSegments(item)) > 1 and getattr(item, "has_audio", None) is None) else []
+        key = nextFallback(category, stderr_text, applied, applicable, presumed)
+        if key is None:
+            return False
+        for run_item in run_items:
+            self._removeItemOutputs(run_item)
+            if key not in run_item.fallbacks:
+                run_item.fallbacks.append(key)
+            run_item.status = QueueItem.STATUS_WAITING
+            run_item.progress = 0
+            run_item.error_message = f"{label}; повтор: {FALLBACK_LABELS[key]}"
+        self._mergedQueueItems = []
+        self.ui.logDisplay.append(
+            f"<br><b><font color='#FF8C00'>⚠ {html.escape(os.path.basename(item.file_path))}: "
+            f"{html.escape(label)} — повтор: {html.escape(FALLBACK_LABELS[key])}</font></b>"
+        )
+        if detail:
+            self.ui.logDisplay.append(f"<font color='#666666'>{html.escape(detail)}</font>")
+        if hasattr(self.ui, 'encodingProgressBar'):
+            self.ui.encodingProgressBar.setValue(PROGRESS_MIN)
+        self.updateQueueTable()
+        self.updateTotalQueueProgress()
+        QTimer.singleShot(0, self.processNextInQueue)
+        return True
+
+    def _getVideoDurationForItem(self, item, callback):
+        """Заполняет длительность/fps/кадры элемента и вызывает callback(item).
+
+        Если элемент уже пробовался, ffprobe не запускается; иначе он идёт в пуле потоков —
+        холодный вход на сетевом диске не подвешивает интерфейс.
+        """
+        def _done(it):
+            if not it.media_info and self._probeStore.toolMissing:
+                logger.warning("Не удалось получить длительность видео: ffprobe не найден.")
+                self._warnFfprobeMissing()
+            elif it.video_duration > 0:
+                self.videoDuration = it.video_duration
+            callback(it)
+
+        self._probeItemAsync(item, _done)
 
     def processFinished(self, exitCode, exitStatus):
         if getattr(self, '_closingApp', False):
@@ -1071,32 +2018,34 @@ class EncodingMixin:
             return
         item = self.queue[self.currentQueueIndex]
         if self.isPaused and self._pauseStopRequested:
-            try:
-                if item.output_file and os.path.exists(item.output_file):
-                    os.remove(item.output_file)
-            except Exception:
-                pass
+            for run_item in self._queueRunItems():
+                self._removeItemOutputs(run_item)
             self.ui.runButton.setEnabled(True)
             if hasattr(self.ui, 'pauseResumeButton'):
                 self.ui.pauseResumeButton.setEnabled(True)
             self.updateQueueTable()
             self.updateTotalQueueProgress()
             return
+        run_items = self._queueRunItems()
         if exitCode == 0:
-            item.status = QueueItem.STATUS_SUCCESS
-            item.progress = PROGRESS_MAX
-            if getattr(item, "total_frames", 0):
-                item.processed_frames = item.total_frames
+            for run_item in run_items:
+                run_item.status = QueueItem.STATUS_SUCCESS
+                run_item.progress = PROGRESS_MAX
+                for path in run_item.outputFiles():
+                    self._outputNames.markExisting(path)
+                if getattr(run_item, "total_frames", 0):
+                    run_item.processed_frames = run_item.total_frames
+                self._verifyQueueItemOutputs(run_item)
             self.ui.logDisplay.append(f"<br><b><font color='green'>✓ Файл обработан успешно: {os.path.basename(item.file_path)}</font></b>")
         else:
-            item.status = QueueItem.STATUS_ERROR
-            item.error_message = f"Код завершения: {exitCode}"
+            if self._retryAfterDiskFull(item, run_items) or self._tryQueueFallback(item, run_items):
+                return
+            _, label, detail = classifyFFmpegError(self._queueStderrTail)
+            for run_item in run_items:
+                run_item.status = QueueItem.STATUS_ERROR
+                run_item.error_message = f"{label}: {detail} (код завершения: {exitCode})" if detail else f"Код завершения: {exitCode}"
+                self._removeItemOutputs(run_item)
             self.ui.logDisplay.append(f"<br><b><font color='red'>✗ Ошибка обработки файла: {os.path.basename(item.file_path)} (код: {exitCode})</font></b>")
-            try:
-                if item.output_file and os.path.exists(item.output_file):
-                    os.remove(item.output_file)
-            except Exception:
-                pass
         self.updateQueueTable()
         self.updateTotalQueueProgress()
         if hasattr(self.ui, 'encodingProgressBar'):
@@ -1106,8 +2055,10 @@ class EncodingMixin:
             self.ui.pauseResumeButton.setText("Пауза")
         self.isPaused = False
         self.currentQueueIndex += 1
+        self._mergedQueueItems = []
         if self.currentQueueIndex < len(self.queue):
-            QTimer.singleShot(PROCESS_NEXT_DELAY_MS, self.processNextInQueue)
+            # Следующий элемент уже подготовлен заранее — запускаем без паузы
+            QTimer.singleShot(0, self.processNextInQueue)
         else:
             self.currentQueueIndex = -1
             if hasattr(self.ui, 'runButton'):
@@ -1115,5 +2066,6 @@ class EncodingMixin:
                 self.ui.runButton.setStyleSheet(getattr(self, '_runButtonStyleStart', self._runButtonStyleStart))
                 self.ui.runButton.setEnabled(True)
             self.updateStatus("Все файлы обработаны")
+            self._clearInputPrefetch()
             if hasattr(self.ui, 'openOutputFolderButton'):
                 self.ui.openOutputFolderButton.setEnabled(True)
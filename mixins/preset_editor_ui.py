@@ -18,7 +18,7 @@ from app.constants import (
     PRESETS_TABLE_COLUMN_COUNT, PRESETS_TABLE_DELETE_COLUMN_WIDTH, PRESETS_TABLE_BUTTON_HEIGHT,
     FPS_SPIN_MAX, BITRATE_SPIN_STEP, PROFILE_LEVEL_MIN_WIDTH,
     GRID_SPACING, LABEL_MIN_WIDTH, HEIGHT_WARNINGS_EXTRA,
-    GRID_MARGINS_WARNINGS, GRID_SPACING_WARNINGS, CONTAINER_LAYOUT_SPACING, COL0_SPACING,
+    GRID_MARGINS_WARNINGS, GRID_SPACING_WARNINGS, CONTAINER_LAYOUT_SPACING, COL0_SPACING, X26X_PRESETS,
 )
 from models.queueitem import QueueItem
 
@@ -506,7 +506,7 @@ class PresetEditorUIMixin:
         l_preset.setMinimumWidth(label_w)
         grid.addWidget(l_preset, 3, 2)
         self._presetCombo = QComboBox(parent_4)
-        for p in ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow", "placebo"]:
+        for p in X26X_PRESETS:
             self._presetCombo.addItem(p)
         self._presetCombo.setCurrentIndex(5)
         self._presetCombo.setMinimumWidth(PROFILE_LEVEL_MIN_WIDTH)
@@ -739,6 +739,7 @@ class PresetEditorUIMixin:
         table = self.ui.queueTableWidget if hasattr(self.ui, 'queueTableWidget') else None
         if not table:
             return
+        self._flushPendingPresetEditorUpdates()
         selected_rows = table.selectionModel().selectedRows()
         indices = sorted([r.row() for r in selected_rows])
         if not indices:
@@ -1024,15 +1025,51 @@ class PresetEditorUIMixin:
         self.updateCommandFromPresetEditor()
 
     def updateCommandFromPresetEditor(self):
-        """Обновляет команду FFmpeg на основе текущих настроек редактора пресетов."""
+        """Планирует применение настроек редактора к выделенным файлам.
+
+        Правки копятся и применяются одним проходом не чаще раза в PRESET_EDITOR_APPLY_DELAY_MS,
+        поэтому перетаскивание спинбокса при большом выделении не блокирует окно.
+        """
         if getattr(self, "_suppressPresetEditorUpdates", False):
             return
+        timer = getattr(self, "_presetEditorApplyTimer", None)
+        if timer is None:
+            self._applyPresetEditorToItems(self._getSelectedQueueItems())
+            return
+        if timer.isActive():
+            return
+        items = self._getSelectedQueueItems()
+        if not items:
+            return
+        self._pendingPresetEditorItems = items
+        timer.start()
+
+    def _getSelectedQueueItems(self):
+        """Возвращает элементы очереди, выделенные в таблице (в порядке строк)."""
         table = self.ui.queueTableWidget if hasattr(self.ui, 'queueTableWidget') else None
         if not table:
+            return []
+        indices = sorted(r.row() for r in table.selectionModel().selectedRows())
+        return [self.queue[i] for i in indices if 0 <= i < len(self.queue)]
+
+    def _onPresetEditorApplyTimeout(self):
+        items = getattr(self, "_pendingPresetEditorItems", None) or []
+        self._pendingPresetEditorItems = []
+        self._applyPresetEditorToItems(items)
+
+    def _flushPendingPresetEditorUpdates(self):
+        """Немедленно применяет отложенные правки редактора (перед сменой выделения, запуском очереди и т.п.)."""
+        timer = getattr(self, "_presetEditorApplyTimer", None)
+        if timer is None or not timer.isActive():
             return
-        selected_rows = table.selectionModel().selectedRows()
-        indices = sorted([r.row() for r in selected_rows])
-        if not indices:
+        timer.stop()
+        self._onPresetEditorApplyTimeout()
+
+    def _applyPresetEditorToItems(self, items):
+        """Записывает текущие настройки редактора во все переданные элементы и один раз обновляет таблицу."""
+        in_queue = {id(it) for it in self.queue}
+        items = [it for it in items if id(it) in in_queue]
+        if not items:
             return
 
         codec = self._getCodecFromButtons()
@@ -1055,72 +1092,73 @@ class PresetEditorUIMixin:
 
         default_like = ("default", "current", "")
         warned_copy = False
-        for idx in indices:
-            if 0 <= idx < len(self.queue):
-                item = self.queue[idx]
-                item.codec = codec
-                item.container = container
-                item.resolution = resolution
-                item.audio_codec = audio_codec
-                item.crf = crf
-                item.bitrate = bitrate
-                item.fps = fps
-                item.audio_bitrate = audio_bitrate
-                item.sample_rate = sample_rate
-                item.preset_speed = preset_speed
-                item.profile_level = profile_level
-                item.pixel_format = pixel_format
-                item.tune = tune
-                item.threads = threads
-                item.keyint = int(keyint)
-                item.tag_hvc1 = tag_hvc1
-                item.vf_lanczos = vf_lanczos
-
-                if not warned_copy:
-                    if codec == "copy" and (vf_lanczos or resolution not in default_like or crf or bitrate or fps or preset_speed or profile_level or pixel_format or tune or threads or keyint):
-                        if hasattr(self, "updateStatus"):
-                            self.updateStatus("Внимание: при copy видео фильтры/CRF/bitrate/FPS игнорируются.")
-                        warned_copy = True
-                    if audio_codec == "current" and (audio_bitrate or sample_rate):
-                        if hasattr(self, "updateStatus"):
-                            self.updateStatus("Внимание: при copy аудио битрейт/частота игнорируются.")
-                        warned_copy = True
-
-                if resolution == "custom":
-                    item.custom_resolution = self.currentResolutionCustom
-                else:
-                    item.custom_resolution = ""
+        preset_cache = {}
+        for item in items:
+            item.codec = codec
+            item.container = container
+            item.resolution = resolution
+            item.audio_codec = audio_codec
+            item.crf = crf
+            item.bitrate = bitrate
+            item.fps = fps
+            item.audio_bitrate = audio_bitrate
+            item.sample_rate = sample_rate
+            item.preset_speed = preset_speed
+            item.profile_level = profile_level
+            item.pixel_format = pixel_format
+            item.tune = tune
+            item.threads = threads
+            item.keyint = int(keyint)
+            item.tag_hvc1 = tag_hvc1
+            item.vf_lanczos = vf_lanczos
+
+            if not warned_copy:
+                if codec == "copy" and (vf_lanczos or resolution not in default_like or crf or bitrate or fps or preset_speed or profile_level or pixel_format or tune or threads or keyint):
+                    if hasattr(self, "updateStatus"):
+                        self.updateStatus("Внимание: при copy видео фильтры/CRF/bitrate/FPS игнорируются.")
+                    warned_copy = True
+                if audio_codec == "current" and (audio_bitrate or sample_rate):
+                    if hasattr(self, "updateStatus"):
+                        self.updateStatus("Внимание: при copy аудио битрейт/частота игнорируются.")
+                    warned_copy = True
+
+            if resolution == "custom":
+                item.custom_resolution = self.currentResolutionCustom
+            else:
+                item.custom_resolution = ""
 
-                if container not in ("default", "current", ""):
-                    if item.output_file:
-                        base_path = os.path.splitext(item.output_file)[0]
-                        item.output_file = base_path + "." + container
-                    else:
-                        self._generateOutputFileForItem(item)
-                elif not item.output_file:
+            if container not in ("default", "current", ""):
+                if item.output_file:
+                    base_path = os.path.splitext(item.output_file)[0]
+                    item.output_file = base_path + "." + container
+                else:
                     self._generateOutputFileForItem(item)
-
-                if isinstance(item.preset_name, str) and item.preset_name.startswith("cmd:"):
-                    self._applyPathsToSavedCommand(item)
-
-                if isinstance(item.preset_name, str) and item.preset_name.startswith("cmd:"):
+            elif not item.output_file:
+                self._generateOutputFileForItem(item)
+
+            if isinstance(item.preset_name, str) and item.preset_name.startswith("cmd:"):
+                self._applyPathsToSavedCommand(item)
+
+            if isinstance(item.preset_name, str) and item.preset_name.startswith("cmd:"):
+                pass
+            elif item.preset_name and item.preset_name not in ("default", "custom"):
+                if item.preset_name not in preset_cache:
+                    preset_cache[item.preset_name] = self.presetManager.loadPreset(item.preset_name)
+                applied = preset_cache[item.preset_name]
+                if applied and self._presetMatchesItem(applied, item):
                     pass
-                elif item.preset_name and item.preset_name not in ("default", "custom"):
-                    applied = self.presetManager.loadPreset(item.preset_name)
-                    if applied and self._presetMatchesItem(applied, item):
-                        pass
-                    else:
-                        item.preset_name = "custom"
                 else:
-                    default_audio = ("current", "", "default")
-                    if (codec in default_like and container in default_like and resolution in default_like and audio_codec in default_audio):
-                        item.preset_name = "default"
-                    else:
-                        item.preset_name = "custom"
+                    item.preset_name = "custom"
+            else:
+                default_audio = ("current", "", "default")
+                if (codec in default_like and container in default_like and resolution in default_like and audio_codec in default_audio):
+                    item.preset_name = "default"
+                else:
+                    item.preset_name = "custom"
 
         self.commandManuallyEdited = False
         self.updateQueueTable()
-        if len(indices) == 1 and hasattr(self.ui, "commandDisplay"):
+        if len(items) == 1 and items[0] is self.getSelectedQueueItem() and hasattr(self.ui, "commandDisplay"):
             self.updateCommandFromGUI()
         self._updateConflictWarningsFromEditor()
 
@@ -0,0 +1,122 @@
+"""Миксин: прогноз времени кодирования по истории запусков (models.throughput_model) — для элементов и всей очереди."""
+
+from PySide6.QtCore import QTimer
+
+from app.constants import THROUGHPUT_HISTORY_ROWS, ETA_CALIBRATION_ALPHA, ETA_REFRESH_DELAY_MS
+from models.queueitem import QueueItem
+from models.throughput_model import ThroughputModel, resolutionPixels
+
+
+class QueueEtaMixin:
+    """Прогноз времени до запуска: скорость похожих прошлых запусков (кодек, preset_speed, разрешение, fps,
+    компьютер). Во время работы очереди прогноз поправляется на скорость текущего сеанса (_etaCalibration).
+    """
+
+    def _loadThroughputModel(self):
+        """Читает историю запусков в фоне и строит модель скорости — прогноз времени доступен до запуска очереди."""
+        history, host = self._metricsHistory, self._throughput.host
+        self._fs.submit(
+            lambda: ThroughputModel.fromRows(history.rows(THROUGHPUT_HISTORY_ROWS), host),
+            callback=self._onThroughputModelLoaded,
+        )
+
+    def _onThroughputModelLoaded(self, model):
+        if model is None or getattr(self, "_closingApp", False):
+            return
+        self._throughput = model
+        self.updateQueueTable()
+
+    def _throughputKey(self, item):
+        """(кодек, preset_speed, пикселей в кадре выхода, fps входа) — признаки элемента для модели скорости."""
+        codec = "copy" if self._isRemuxItem(item) else item.codec
+        return codec, item.preset_speed, resolutionPixels(self._metricsResolution(item)), item.video_fps or 0.0
+
+    def _predictedSpeed(self, item):
+        """Скорость кодирования элемента по истории (секунд видео за секунду) или None."""
+        if getattr(item, "command_manually_edited", False) or item.media_info is None:
+            return None
+        speed, _ = self._throughput.predictSpeed(*self._throughputKey(item))
+        return speed
+
+    def _predictedEncodeSeconds(self, item, calibration=None):
+        """Прогноз времени кодирования элемента с поправкой на скорость текущего сеанса или None."""
+        duration = self._expectedOutputDuration(item)
+        speed = self._predictedSpeed(item) if duration > 0 else None
+        if not speed:
+            return None
+        return duration / (speed * (calibration or self._etaCalibration))
+
+    def _queueEtaSeconds(self, calibration=None, fallback_speed=None):
+        """Прогноз для ожидающих элементов (кроме кодируемых сейчас). Элемент без прогноза по истории
+        считается со скоростью fallback_speed; если её нет — None (прогноз очереди неизвестен)."""
+        run_items = self._queueRunItems()
+        total = 0.0
+        for it in self.queue:
+            if it.status != QueueItem.STATUS_WAITING or it in run_items:
+                continue
+            seconds = self._predictedEncodeSeconds(it, calibration)
+            if seconds is None:
+                duration = self._expectedOutputDuration(it)
+                if not fallback_speed or duration <= 0:
+                    return None
+                seconds = duration / fallback_speed
+            total += seconds
+        return total
+
+    def _remainingEtaTexts(self, item, remaining, eta_ready):
+        """(осталось по текущему файлу, осталось по очереди или None) для строки состояния; None — прогноза нет.
+
+        Пока скорость запуска не устоялась (eta_ready — False), время считается по истории запусков
+        с поправкой сеанса и показывается с «≈».
+        """
+        predicted_speed = self._predictedSpeed(item)
+        calibration = self._etaCalibration
+        if eta_ready:
+            eta_seconds = remaining / self._emaSpeed
+            if predicted_speed:
+                # Текущий файл уже показал, насколько этот сеанс быстрее или медленнее истории
+                calibration = self._emaSpeed / predicted_speed
+        elif predicted_speed:
+            eta_seconds = remaining / (predicted_speed * calibration)
+        else:
+            return None
+        approx = "" if eta_ready else "≈ "
+        queue_eta_text = None
+        queue_eta_seconds = self._queueEtaSeconds(calibration, self._emaSpeed if eta_ready else None)
+        if queue_eta_seconds is not None:
+            queue_eta_text = approx + self._formatTime(eta_seconds + queue_eta_seconds)
+        return approx + self._formatTime(eta_seconds), queue_eta_text
+
+    def _learnThroughput(self, item, speed):
+        """Завершённый файл: поправка прогноза сеанса (факт / прогноз) и новая точка в модели скорости."""
+        key = self._throughputKey(item)
+        predicted, _ = self._throughput.predictSpeed(*key)
+        if predicted:
+            ratio = min(5.0, max(0.2, speed / predicted))
+            self._etaCalibration += ETA_CALIBRATION_ALPHA * (ratio - self._etaCalibration)
+        self._throughput.observe(*key, speed)
+
+    def _refreshQueueEtaForecast(self):
+        """До запуска очереди: общий прогноз в строке состояния и подсказке общего прогресса."""
+        if self.currentQueueIndex >= 0:
+            return
+        waiting = [it for it in self.queue if it.status == QueueItem.STATUS_WAITING]
+        seconds = self._queueEtaSeconds() if waiting else None
+        text = f"В очереди {len(waiting)} файл(ов), прогноз по истории запусков: ≈ {self._formatTime(seconds)}" if seconds else ""
+        if hasattr(self.ui, 'totalQueueProgressBar'):
+            self.ui.totalQueueProgressBar.setToolTip(text)
+        if text and text != self._lastEtaForecast:
+            self.updateStatus(text)
+        self._lastEtaForecast = text
+
+    def _onQueueItemProbedForEta(self, item):
+        """ffprobe нового элемента завершён — таблица и прогноз обновляются (пачкой, не на каждый файл)."""
+        if self._etaRefreshPending:
+            return
+        self._etaRefreshPending = True
+
+        def _refresh():
+            self._etaRefreshPending = False
+            self.updateQueueTable()
+
+        QTimer.singleShot(ETA_REFRESH_DELAY_MS, _refresh)
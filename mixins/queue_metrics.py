@@ -0,0 +1,118 @@
+"""Миксин: метрики запусков очереди — опрос процесса ffmpeg через /proc и строка в истории запусков (SQLite)."""
+
+import os
+import re
+import time
+import platform
+from PySide6.QtCore import QTimer
+
+from app.constants import METRICS_SAMPLE_INTERVAL_MS
+from models.queueitem import QueueItem
+from models.job_metrics import JobMetricsRecorder
+
+
+class QueueMetricsMixin:
+    """Пока идёт запуск очереди, процесс ffmpeg опрашивается по таймеру (время ЦП, пик памяти, ввод-вывод);
+    по завершении сводка попадает в item.metrics и в историю запусков (models.job_metrics.MetricsHistory).
+    """
+
+    def _startQueueMetrics(self, job):
+        # on_started вызывается до запуска процесса — номер процесса берётся при первом опросе
+        self._queueMetrics = JobMetricsRecorder(job.process.processId if job.process is not None else 0)
+        self._queueMetrics.sample()
+        if self._metricsTimer is None:
+            self._metricsTimer = QTimer(self)
+            self._metricsTimer.setInterval(METRICS_SAMPLE_INTERVAL_MS)
+            self._metricsTimer.timeout.connect(self._sampleQueueMetrics)
+        self._metricsTimer.start()
+
+    def _sampleQueueMetrics(self):
+        if self._queueMetrics is not None:
+            self._queueMetrics.sample()
+
+    def _metricsResolution(self, item):
+        """Разрешение выхода для истории: из фильтра scale или разрешение входа ("1280x720"; "" — неизвестно)."""
+        match = re.match(r"scale=(\d+):(\d+)", self._scaleFilterForItem(item))
+        if match:
+            return f"{match.group(1)}x{match.group(2)}"
+        for stream in (item.media_info or {}).get("streams") or []:
+            if stream.get("codec_type") == "video" and stream.get("width") and stream.get("height"):
+                return f"{stream['width']}x{stream['height']}"
+        return ""
+
+    @staticmethod
+    def _ffmpegVersionTag(version_line):
+        """"ffmpeg version 7.0.2-static https://…" -> "7.0.2-static"."""
+        match = re.search(r"version\s+(\S+)", version_line or "")
+        return match.group(1) if match else (version_line or "")
+
+    def _recordQueueMetrics(self, job, exit_code, run_items, interrupted):
+        """Сводка завершившегося запуска: в item.metrics (просмотр в «Статистике») и строкой в историю запусков."""
+        recorder, self._queueMetrics = self._queueMetrics, None
+        if self._metricsTimer is not None:
+            self._metricsTimer.stop()
+        if recorder is None or not run_items:
+            return
+        recorder.finish()
+        item = run_items[0]
+        if job.stalled and not interrupted:
+            status = "stalled"
+        elif interrupted:
+            status = "interrupted"
+        elif item.status == QueueItem.STATUS_SUCCESS:
+            status = "success"
+        elif item.status == QueueItem.STATUS_ERROR:
+            status = "error"
+        else:
+            status = "retry"  # перезапуск с запасной стратегией или после переполнения диска
+        media_sec = job.out_time_sec or (self._expectedOutputDuration(item) if status == "success" else 0.0)
+        row = recorder.summary(media_sec, getattr(item, "processed_frames", 0))
+        if status == "success" and row["avg_speed"] and not getattr(item, "command_manually_edited", False):
+            self._learnThroughput(item, row["avg_speed"])
+        caps = getattr(self, "_ffmpegCaps", None)
+        row.update({
+            "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "host": platform.node(),
+            "preset": item.preset_name,
+            "codec": "copy" if self._isRemuxItem(item) else item.codec,
+            "preset_speed": item.preset_speed,
+            "resolution": self._metricsResolution(item),
+            "source_fps": item.video_fps or None,
+            "container": os.path.splitext(item.output_file or "")[1].lstrip(".").lower(),
+            "input_path": item.file_path,
+            "status": status,
+            "exit_code": exit_code,
+            "threads": job.cores,
+            "media_sec": round(media_sec, 3) if media_sec else None,
+            "input_bytes": item.input_stat.st_size if item.input_stat is not None else None,
+            "ffmpeg_version": self._ffmpegVersionTag(caps.version if caps is not None else ""),
+        })
+        # Выход мог уже переехать из временной папки — размер берётся там, где файл сейчас
+        outputs = [
+            (it.staged_outputs.get(path, path), path) for it in run_items for path in it.outputFiles()
+        ] if status == "success" else []
+
+        def _record():
+            total = 0
+            for candidates in outputs:
+                for path in candidates:
+                    try:
+                        total += os.stat(path).st_size
+                        break
+                    except OSError:
+                        continue
+            if total:
+                row["output_bytes"] = total
+                if row["input_bytes"]:
+                    row["compression_ratio"] = round(total / row["input_bytes"], 4)
+            self._metricsHistory.record(row)
+            return row
+
+        def _done(recorded):
+            if recorded is not None:
+                for it in run_items:
+                    it.metrics = recorded
+
+        for it in run_items:
+            it.metrics = row
+        self._fs.submit(_record, callback=_done)
@@ -0,0 +1,161 @@
+"""Миксин: пробный прогон очереди — настоящие команды элементов на несколько секунд в null, параллельно."""
+
+import os
+import html
+from PySide6.QtWidgets import QMessageBox
+from PySide6.QtCore import QProcess, QTimer
+
+from app.constants import (
+    PREFLIGHT_SECONDS, PREFLIGHT_TIMEOUT_SEC, PREFLIGHT_STDERR_TAIL, PREFLIGHT_DETAIL_MAX,
+    QUEUE_VALIDATION_MAX_LISTED,
+)
+from models.ffmpeg_errors import classifyFFmpegError
+from models.job_scheduler import Job, limitThreads
+
+
+class QueuePreflightMixin:
+    """Пробный прогон: каждый элемент очереди кодируется PREFLIGHT_SECONDS секунд в null-муксер
+    той же командой, что и при настоящем запуске. Ошибки (потоки, фильтры, контейнер, повреждённый вход)
+    собираются и классифицируются до долгого ночного кодирования.
+    """
+
+    def _preflightArgs(self, item):
+        """Команда элемента, в которой каждый выход (и tee) заменён на -t N -f null -."""
+        args = self._itemCommandArgs(item)
+        outputs = {os.path.normcase(os.path.normpath(path)) for path in item.outputFiles()}
+        null_output = ["-t", str(PREFLIGHT_SECONDS), "-f", "null", "-"]
+        result = ["-hide_banner", "-nostdin", "-v", "error"]
+        i = 0
+        while i < len(args):
+            token = args[i]
+            if token == "-f" and i + 2 < len(args) and args[i + 1] == "tee":
+                result += null_output
+                i += 3
+                continue
+            if token and not token.startswith("-") and os.path.normcase(os.path.normpath(token)) in outputs:
+                result += null_output
+            else:
+                result.append(token)
+            i += 1
+        return result
+
+    def startQueuePreflight(self):
+        """Запускает пробный прогон всех элементов очереди параллельно (через общий планировщик)."""
+        if not self.queue:
+            QMessageBox.information(self, "Пробный прогон", "Очередь пуста. Добавьте файлы для проверки.")
+            return
+        if self._preflightPending:
+            QMessageBox.information(self, "Пробный прогон", "Пробный прогон уже выполняется.")
+            return
+        if 0 <= self.currentQueueIndex < len(self.queue):
+            QMessageBox.information(self, "Пробный прогон", "Дождитесь завершения кодирования очереди.")
+            return
+        if not self._findTool("ffmpeg"):
+            QMessageBox.critical(self, "Пробный прогон", "FFmpeg не найден.")
+            return
+        self._flushPendingPresetEditorUpdates()
+        items = list(self.queue)
+        self._preflightPending = {id(item) for item in items}
+        self._preflightFailures = []
+        self._preflightTotal = len(items)
+        if hasattr(self, "_preflightButton"):
+            self._preflightButton.setEnabled(False)
+        self.ui.logDisplay.append(
+            f"<br><b>=== Пробный прогон: {len(items)} файл(ов), по {PREFLIGHT_SECONDS} с каждого ===</b>"
+        )
+        self.updateStatus(f"Пробный прогон: 0 из {len(items)}")
+        for item in items:
+            # Подготовка (stat, ffprobe, выходное имя) та же, что перед настоящим запуском
+            self._prepareQueueItem(item, self._preflightSubmit)
+
+    def _preflightSubmit(self, item):
+        if id(item) not in self._preflightPending:
+            return
+        if item.input_stat is None:
+            self._preflightRecord(item, "Файл не найден", item.file_path)
+            return
+        args = self._preflightArgs(item)
+        if not args:
+            self._preflightRecord(item, "Не удалось сгенерировать команду", "")
+            return
+        stderr_tail = []
+        timed_out = []
+        job = Job("ffmpeg", limitThreads(args, 1), lane=Job.LANE_PREFLIGHT, cores=1, label="пробный прогон")
+        job.on_output = lambda job, out, err: self._preflightCollect(stderr_tail, err)
+        job.on_finished = lambda job, code, status: self._preflightJobFinished(
+            item, code, "".join(stderr_tail), bool(timed_out)
+        )
+        job.on_error = lambda job, error: self._preflightJobError(item, error)
+        job.on_started = lambda job: QTimer.singleShot(
+            PREFLIGHT_TIMEOUT_SEC * 1000, lambda: self._preflightTimeout(job, timed_out)
+        )
+        self._scheduler.submit(job)
+
+    def _preflightCollect(self, stderr_tail, err):
+        if err:
+            stderr_tail.append(err)
+            text = "".join(stderr_tail)
+            if len(text) > PREFLIGHT_STDERR_TAIL:
+                stderr_tail[:] = [text[-PREFLIGHT_STDERR_TAIL:]]
+
+    def _preflightTimeout(self, job, timed_out):
+        if job.isActive:
+            timed_out.append(True)
+            self._scheduler.cancel(job)
+
+    def _preflightJobFinished(self, item, code, stderr_text, timed_out):
+        if timed_out:
+            self._preflightRecord(
+                item, f"Не уложился в {PREFLIGHT_TIMEOUT_SEC} с", "кодирование очень медленное или процесс завис"
+            )
+        elif code == 0:
+            self._preflightRecord(item, "", "")
+        else:
+            _, label, detail = classifyFFmpegError(stderr_text)
+            self._preflightRecord(item, label, detail or f"код завершения {code}")
+
+    def _preflightJobError(self, item, error):
+        # Остальные ошибки процесса завершаются сигналом finished
+        if error == QProcess.ProcessError.FailedToStart:
+            self._preflightRecord(item, "FFmpeg не запустился", "")
+
+    def _preflightRecord(self, item, label, detail):
+        """Итог пробного прогона элемента; после последнего — сводка."""
+        if id(item) not in self._preflightPending:
+            return
+        self._preflightPending.discard(id(item))
+        name = os.path.basename(item.file_path)
+        if len(detail) > PREFLIGHT_DETAIL_MAX:
+            detail = detail[:PREFLIGHT_DETAIL_MAX] + "…"
+        item.preflight_error = f"{label}: {detail}" if label else ""
+        if label:
+            self._preflightFailures.append(f"{name}: {item.preflight_error}")
+            self.ui.logDisplay.append(
+                f"<b><font color='red'>✗ Пробный прогон — {html.escape(name)}: {html.escape(item.preflight_error)}</font></b>"
+            )
+        else:
+            self.ui.logDisplay.append(f"<font color='green'>✓ Пробный прогон — {html.escape(name)}</font>")
+        done = self._preflightTotal - len(self._preflightPending)
+        self.updateStatus(f"Пробный прогон: {done} из {self._preflightTotal}")
+        self.updateQueueTable()
+        if not self._preflightPending:
+            self._preflightFinished()
+
+    def _preflightFinished(self):
+        if hasattr(self, "_preflightButton"):
+            self._preflightButton.setEnabled(True)
+        failures = self._preflightFailures
+        ok_count = self._preflightTotal - len(failures)
+        self.updateStatus(f"Пробный прогон завершён: без ошибок {ok_count} из {self._preflightTotal}")
+        if not failures:
+            QMessageBox.information(
+                self, "Пробный прогон", f"Все файлы ({self._preflightTotal}) прошли пробный прогон без ошибок."
+            )
+            return
+        shown = failures[:QUEUE_VALIDATION_MAX_LISTED]
+        if len(failures) > len(shown):
+            shown.append(f"… и ещё {len(failures) - len(shown)}")
+        QMessageBox.warning(
+            self, "Пробный прогон",
+            f"Без ошибок: {ok_count} из {self._preflightTotal}. Ошибки:\n\n" + "\n".join(shown)
+        )
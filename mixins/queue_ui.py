@@ -12,8 +12,10 @@ from app.constants import (
     QUEUE_TABLE_COLUMN_WIDTHS_WITH_ROWS,
     QUEUE_TABLE_COLUMN_WIDTHS_EMPTY,
     MAX_DISPLAY_NAME_LENGTH,
+    METRICS_HISTORY_VIEW_LIMIT,
 )
 from models.queueitem import QueueItem
+from widgets import PresetChecklistDialog, OutputDestinationsDialog, JobStatsDialog
 
 
 class QueueUIMixin:
@@ -84,12 +86,14 @@ class QueueUIMixin:
                 if event.mimeData().hasUrls():
                     event.acceptProposedAction()
                     urls = event.mimeData().urls()
+                    paths = []
                     for url in urls:
                         file_path = url.toLocalFile()
-                        if os.path.isfile(file_path):
-                            ext = os.path.splitext(file_path)[1].lower()
-                            if ext in ['.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv']:
-                                self.main_window.addFileToQueue(file_path)
+                        ext = os.path.splitext(file_path)[1].lower()
+                        if file_path and ext in ['.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv']:
+                            paths.append(file_path)
+                    # Существование файлов проверяется в фоне
+                    self.main_window._enqueueFiles(paths)
                 else:
                     event.ignore()
 
@@ -106,28 +110,63 @@ class QueueUIMixin:
             "",
             "Видео (*.mp4 *.mkv *.avi *.mov *.flv *.wmv)"
         )
-        for file_path in files:
-            self.addFileToQueue(file_path)
+        self._enqueueFiles(files)
 
     def addFileToQueue(self, file_path):
         """Добавляет один файл в очередь"""
-        if not file_path or not os.path.exists(file_path):
+        self._enqueueFiles([file_path])
+
+    def _enqueueFiles(self, paths):
+        """Проверяет файлы и читает их папки в фоне, затем добавляет существующие файлы в очередь."""
+        paths = [p for p in paths if p]
+        if not paths:
+            return
+        directories = [os.path.dirname(os.path.normpath(p)) for p in paths]
+        self._fs.statMany(paths, lambda stats: self._onEnqueueFilesChecked(paths, stats), directories=directories)
+
+    def _onEnqueueFilesChecked(self, paths, stats):
+        added = 0
+        for file_path in paths:
+            if stats.get(file_path) is None:
+                continue
+            if any(item.file_path == file_path for item in self.queue):
+                # Повтор того же файла (например, другой пресет) кодируется одним запуском с первым
+                reply = QMessageBox.question(
+                    self, "Файл уже в очереди",
+                    f"Файл уже в очереди:\n{file_path}\n\nДобавить ещё раз (например, с другим пресетом)?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+                )
+                if reply != QMessageBox.Yes:
+                    continue
+            queue_item = QueueItem(file_path)
+            self.queue.append(queue_item)
+            self._generateOutputFileForItem(queue_item)
+            added += 1
+        if not added:
             return
-        for item in self.queue:
-            if item.file_path == file_path:
-                QMessageBox.information(self, "Информация", f"Файл уже в очереди:\n{file_path}")
-                return
-        queue_item = QueueItem(file_path)
-        self.queue.append(queue_item)
-        self._generateOutputFileForItem(queue_item)
         self.updateQueueTable()
         self.updateTotalQueueProgress()
         self.selectQueueItem(len(self.queue) - 1)
+        # Длительность и разрешение нужны для прогноза времени; выделенный файл уже пробуется при выделении
+        for queue_item in self.queue[-added:-1]:
+            if queue_item.media_info is None:
+                self._probeItemAsync(queue_item, self._onQueueItemProbedForEta)
+
+    def _onSelectedItemProbed(self, item):
+        """ffprobe для выделенного элемента завершён: обновляем длительность и команду (зависит от наличия аудио)."""
+        if not (0 <= self.selectedQueueIndex < len(self.queue)) or self.queue[self.selectedQueueIndex] is not item:
+            return
+        if getattr(item, "video_duration", 0) > 0 and self.videoDuration != item.video_duration:
+            self.videoDuration = item.video_duration
+            self._applyVideoDurationToUI()
+        self.updateCommandFromGUI()
+        self.updateQueueTable()  # метка remux зависит от кодеков входа
 
     def removeSelectedFromQueue(self):
         """Удаляет выделенный файл из очереди"""
         if self.selectedQueueIndex < 0 or self.selectedQueueIndex >= len(self.queue):
             return
+        self._flushPendingPresetEditorUpdates()
         if self.currentQueueIndex >= 0 and not self.isPaused:
             QMessageBox.warning(
                 self,
@@ -146,6 +185,7 @@ class QueueUIMixin:
                 )
                 return
         removed_index = self.selectedQueueIndex
+        self._releaseQueueItemOutputs(self.queue[self.selectedQueueIndex])
         del self.queue[self.selectedQueueIndex]
         if self.currentQueueIndex > self.selectedQueueIndex:
             self.currentQueueIndex -= 1
@@ -171,55 +211,75 @@ class QueueUIMixin:
             self.updateQueueTable()
 
     def updateQueueTable(self):
-        """Обновляет отображение таблицы очереди"""
+        """Обновляет отображение таблицы очереди (существующие ячейки переиспользуются)."""
         if not hasattr(self.ui, 'queueTableWidget'):
             return
         table = self.ui.queueTableWidget
         table.blockSignals(True)
+        table.setUpdatesEnabled(False)
         table.setRowCount(len(self.queue))
         for row, item in enumerate(self.queue):
             full_input_name = os.path.basename(item.file_path) if item.file_path else ""
             input_name = self._truncateNameForDisplay(full_input_name, MAX_DISPLAY_NAME_LENGTH)
-            file_item = QTableWidgetItem(input_name)
-            file_item.setFlags(file_item.flags() & ~Qt.ItemIsEditable)
-            file_item.setToolTip(item.file_path)
-            table.setItem(row, 0, file_item)
+            self._setQueueCell(table, row, 0, input_name, item.file_path)
             output_file_path = item.output_file if item.output_file else ""
             if output_file_path:
                 full_output_name = os.path.basename(output_file_path)
                 display_output = self._truncateNameForDisplay(full_output_name, MAX_DISPLAY_NAME_LENGTH)
             else:
                 display_output = ""
-            output_item = QTableWidgetItem(display_output)
-            output_item.setToolTip(output_file_path)
-            output_item.setFlags(output_item.flags() & ~Qt.ItemIsEditable)
-            table.setItem(row, 1, output_item)
+            output_tooltip = "\n".join(item.outputFiles()) if (item.renditions or item.extra_output_files) else output_file_path
+            self._setQueueCell(table, row, 1, display_output, output_tooltip)
             preset_text = item.preset_name if item.preset_name else "default"
             if isinstance(preset_text, str) and preset_text.startswith("cmd:"):
                 preset_text = f"cmd + {preset_text[4:]}"
-            preset_item = QTableWidgetItem(preset_text)
-            preset_item.setFlags(preset_item.flags() & ~Qt.ItemIsEditable)
-            preset_item.setToolTip(preset_text)
-            table.setItem(row, 2, preset_item)
-            status_item = QTableWidgetItem(item.getStatusText())
-            status_item.setFlags(status_item.flags() & ~Qt.ItemIsEditable)
-            table.setItem(row, 3, status_item)
-            progress_text = f"{item.progress}%"
-            progress_item = QTableWidgetItem(progress_text)
-            progress_item.setFlags(progress_item.flags() & ~Qt.ItemIsEditable)
-            table.setItem(row, 4, progress_item)
-            if item.status == QueueItem.STATUS_SUCCESS and item.output_file:
-                open_btn = QPushButton("Открыть")
-                open_btn.setMaximumHeight(22)
-                open_btn.setStyleSheet("padding: 2px 4px; font-size: 10px; min-height: 0;")
-                open_btn.clicked.connect(lambda _, path=item.output_file: self.openFileLocation(path))
-                table.setCellWidget(row, 5, open_btn)
+            preset_tooltip = preset_text
+            if item.renditions:
+                preset_tooltip = "Лесенка: " + ", ".join([preset_text] + [r.preset_name for r in item.renditions])
+                preset_text = f"{preset_text} + {len(item.renditions)} вар."
+            elif not item.command_manually_edited and self._isRemuxItem(item):
+                preset_tooltip = f"{preset_text}\nRemux: видео копируется без перекодирования, меняется только контейнер"
+                preset_text = f"{preset_text} · remux"
+            self._setQueueCell(table, row, 2, preset_text, preset_tooltip)
+            self._setQueueCell(table, row, 3, item.getStatusText(), item.error_message or item.preflight_error or "")
+            eta_seconds = self._predictedEncodeSeconds(item) if item.status == QueueItem.STATUS_WAITING else None
+            if eta_seconds is not None:
+                self._setQueueCell(
+                    table, row, 4, f"≈ {self._formatTime(eta_seconds)}",
+                    "Прогноз времени кодирования по истории похожих запусков",
+                )
             else:
-                empty_item = QTableWidgetItem("")
-                empty_item.setFlags(empty_item.flags() & ~Qt.ItemIsEditable)
-                table.setItem(row, 5, empty_item)
+                self._setQueueCell(table, row, 4, f"{item.progress}%", "")
+            open_path = item.output_file if item.status == QueueItem.STATUS_SUCCESS else ""
+            open_btn = table.cellWidget(row, 5)
+            if open_path:
+                if open_btn is None:
+                    open_btn = QPushButton("Открыть")
+                    open_btn.setMaximumHeight(22)
+                    open_btn.setStyleSheet("padding: 2px 4px; font-size: 10px; min-height: 0;")
+                    open_btn.clicked.connect(lambda _, b=open_btn: self.openFileLocation(b.property("open_path")))
+                    table.setCellWidget(row, 5, open_btn)
+                open_btn.setProperty("open_path", open_path)
+            else:
+                if open_btn is not None:
+                    table.removeCellWidget(row, 5)
+                self._setQueueCell(table, row, 5, "")
+        table.setUpdatesEnabled(True)
         table.blockSignals(False)
         self._applyQueueTableColumnWidths()
+        self._refreshQueueEtaForecast()
+
+    def _setQueueCell(self, table, row, col, text, tooltip=None):
+        """Записывает текст ячейки таблицы очереди, создавая нередактируемый элемент только при необходимости."""
+        cell = table.item(row, col)
+        if cell is None:
+            cell = QTableWidgetItem(text)
+            cell.setFlags(cell.flags() & ~Qt.ItemIsEditable)
+            table.setItem(row, col, cell)
+        elif cell.text() != text:
+            cell.setText(text)
+        if tooltip is not None and cell.toolTip() != tooltip:
+            cell.setToolTip(tooltip)
 
     def selectQueueItem(self, index):
         """Выделяет элемент очереди по индексу"""
@@ -227,6 +287,7 @@ class QueueUIMixin:
             return
         if self.selectedQueueIndex == index:
             return
+        self._flushPendingPresetEditorUpdates()
         table = self.ui.queueTableWidget
         table.blockSignals(True)
         table.selectRow(index)
@@ -237,7 +298,6 @@ class QueueUIMixin:
         if not item.output_file:
             self._generateOutputFileForItem(item)
         self.videoDuration = 0
-        self._getVideoDurationForItem(item)
         if getattr(item, "video_duration", 0) > 0:
             self.videoDuration = item.video_duration
         self.loadVideoForPreview()
@@ -252,9 +312,12 @@ class QueueUIMixin:
             self.updateCommandFromGUI()
         self.syncPresetEditorWithQueueItem(item)
         self._updateTrimSegmentBar()
+        if item.media_info is None:
+            self._probeItemAsync(item, self._onSelectedItemProbed)
 
     def onQueueItemSelected(self):
         """Обработчик выделения элемента в таблице"""
+        self._flushPendingPresetEditorUpdates()
         table = self.ui.queueTableWidget
         selected_rows = table.selectionModel().selectedRows()
         indices = sorted([r.row() for r in selected_rows])
@@ -286,6 +349,8 @@ class QueueUIMixin:
         """Обработчик двойного клика по ячейке таблицы"""
         if column == 1:
             self.selectOutputFileForQueueItem(row)
+        elif column == 3 and 0 <= row < len(self.queue) and getattr(self.queue[row], "metrics", None):
+            self.showQueueItemStats(self.queue[row])
 
     def selectOutputFileForQueueItem(self, row):
         """Открывает диалог выбора выходного файла для элемента очереди"""
@@ -315,6 +380,8 @@ class QueueUIMixin:
             file_filter
         )
         if file_path:
+            self._outputNames.release(item)
+            self._outputNames.reserve(os.path.normpath(file_path), item)
             item.output_file = file_path
             item.output_chosen_by_user = True
             self.updateQueueTable()
@@ -324,6 +391,102 @@ class QueueUIMixin:
                 else:
                     self.updateCommandFromGUI()
 
+    def _releaseQueueItemOutputs(self, item):
+        """Освобождает выходные имена элемента и его вариантов лесенки."""
+        self._outputNames.release(item)
+        for rendition in item.renditions:
+            self._outputNames.release(rendition)
+
+    def editQueueItemRenditions(self):
+        """Лесенка качеств: дополнительные выходы выделенного файла из других пресетов (одно декодирование)."""
+        item = self.getSelectedQueueItem()
+        if item is None:
+            QMessageBox.information(self, "Лесенка качеств", "Сначала выберите один файл в очереди.")
+            return
+        if item.status == QueueItem.STATUS_PROCESSING:
+            QMessageBox.warning(self, "Лесенка качеств", "Нельзя менять выходы файла во время его кодирования.")
+            return
+        self._flushPendingPresetEditorUpdates()
+        dialog = PresetChecklistDialog(
+            "Лесенка качеств",
+            "Отметьте пресеты дополнительных выходов. Все варианты кодируются одним запуском FFmpeg: "
+            "файл читается и декодируется один раз, а видео масштабируется для каждого варианта отдельно.",
+            self.presetManager.loadAllPresets(),
+            [r.preset_name for r in item.renditions],
+            self,
+        )
+        if not dialog.exec():
+            return
+        existing = {r.preset_name: r for r in item.renditions}
+        renditions = []
+        for name in dialog.selectedNames():
+            rendition = existing.pop(name, None)
+            if rendition is None:
+                preset = self.presetManager.loadPreset(name)
+                if not preset:
+                    continue
+                rendition = QueueItem(item.file_path)
+                rendition.preset_name = name
+                rendition.setPreset(preset)
+            renditions.append(rendition)
+        for rendition in existing.values():
+            self._outputNames.release(rendition)
+        item.renditions = renditions
+        item.command_manually_edited = False
+        self.updateCommandFromGUI()
+        self.updateQueueTable()
+
+    def editQueueItemDestinations(self):
+        """Дополнительные места сохранения выделенного файла: результат кодируется один раз и пишется во все папки (tee)."""
+        item = self.getSelectedQueueItem()
+        if item is None:
+            QMessageBox.information(self, "Места сохранения", "Сначала выберите один файл в очереди.")
+            return
+        if item.status == QueueItem.STATUS_PROCESSING:
+            QMessageBox.warning(self, "Места сохранения", "Нельзя менять выходы файла во время его кодирования.")
+            return
+        self._flushPendingPresetEditorUpdates()
+        dialog = OutputDestinationsDialog(
+            "Дополнительные места сохранения",
+            "Результат кодируется один раз и одновременно записывается в каждую папку (например, локальный кэш "
+            "и сетевой архив) — копировать файл после кодирования не нужно. Контейнер можно выбрать для каждой папки; "
+            "если видео или аудио копируется без перекодирования (copy), все места получают контейнер основного выхода.",
+            item.extra_destinations,
+            self,
+        )
+        if not dialog.exec():
+            return
+        item.extra_destinations = dialog.destinations()
+        if not item.extra_destinations:
+            item.extra_output_files = []
+            for rendition in item.renditions:
+                rendition.extra_output_files = []
+        item.command_manually_edited = False
+        self.updateCommandFromGUI()
+        self.updateQueueTable()
+
+    def showQueueItemStats(self, item=None):
+        """Статистика: метрики последнего запуска выделенного файла и история запусков (с экспортом в CSV)."""
+        item = item or self.getSelectedQueueItem()
+        metrics = getattr(item, "metrics", None) if item is not None else None
+
+        def _show(history):
+            if getattr(self, "_closingApp", False):
+                return
+            title = "Статистика: " + os.path.basename(item.file_path) if metrics else "Статистика запусков"
+            JobStatsDialog(title, metrics, history or [], self._exportMetricsHistory, self).exec()
+
+        self._fs.submit(self._metricsHistory.rows, METRICS_HISTORY_VIEW_LIMIT, callback=_show)
+
+    def _exportMetricsHistory(self, csv_path):
+        def _done(count):
+            if count is None:
+                QMessageBox.warning(self, "Экспорт", f"Не удалось записать файл:\n{csv_path}")
+            else:
+                self.updateStatus(f"История запусков выгружена: {count} строк → {csv_path}")
+
+        self._fs.submit(self._metricsHistory.exportCsv, csv_path, callback=_done)
+
     def onQueueItemChanged(self, item):
         """Обработчик изменения ячейки в таблице очереди."""
         pass
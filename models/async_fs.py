@@ -0,0 +1,212 @@
+"""Фоновые проверки файловой системы: stat/listdir в пуле потоков и короткоживущий кэш результатов.
+
+Медленный или недоступный сетевой диск не должен подвешивать интерфейс, поэтому обращения
+к диску выполняются в рабочих потоках, а результаты (колбэки) доставляются в поток GUI.
+"""
+
+import os
+import stat
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+
+from app.constants import FS_WORKER_COUNT, FS_STAT_CACHE_TTL_SEC
+
+logger = logging.getLogger(__name__)
+
+
+def _safeStat(path):
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _safeListdir(directory):
+    try:
+        return os.listdir(directory or ".")
+    except (OSError, ValueError):
+        return None
+
+
+def _statMany(paths, directories):
+    """Выполняется в рабочем потоке: stat для файлов и listdir для папок одним заданием."""
+    stats = {path: _safeStat(path) for path in paths}
+    listings = {directory: _safeListdir(directory) for directory in directories}
+    return stats, listings
+
+
+class AsyncFsService(QObject):
+    """Асинхронный stat/listdir с кэшем на FS_STAT_CACHE_TTL_SEC.
+
+    Колбэки всегда вызываются в потоке GUI. Если свежий результат уже есть в кэше,
+    колбэк вызывается сразу; одинаковые запросы, пока выполняется первый, не дублируются.
+    """
+
+    directoryListed = Signal(str, object)  # папка, список имён (None — папка недоступна)
+    _taskDone = Signal(object, object)     # внутренний: обработчик результата, результат
+
+    def __init__(self, ttl=FS_STAT_CACHE_TTL_SEC, workers=FS_WORKER_COUNT, parent=None):
+        super().__init__(parent)
+        self._ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fs")
+        self._stats = {}     # ключ пути -> (время, os.stat_result | None)
+        self._listings = {}  # ключ папки -> (время, список имён | None)
+        self._pending = {}   # ("stat"|"list", ключ) -> список колбэков
+        self._closed = False
+        self._taskDone.connect(self._onTaskDone)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.normpath(path or "."))
+
+    def _fresh(self, cache, key):
+        entry = cache.get(key)
+        if entry is None or time.monotonic() - entry[0] > self._ttl:
+            return False, None
+        return True, entry[1]
+
+    # --- Общий запуск заданий ---
+
+    def submit(self, fn, *args, callback=None):
+        """Выполняет fn(*args) в пуле; callback(результат) вызывается в потоке GUI (при исключении — None)."""
+        if self._closed:
+            return None
+
+        def _run():
+            try:
+                result = fn(*args)
+            except Exception:
+                logger.exception("Ошибка фонового задания %r", fn)
+                result = None
+            if callback is not None and not self._closed:
+                try:
+                    self._taskDone.emit(callback, result)
+                except RuntimeError:
+                    pass  # объект уже удалён при закрытии приложения
+            return result
+
+        try:
+            return self._executor.submit(_run)
+        except RuntimeError:
+            return None
+
+    def _onTaskDone(self, callback, result):
+        if self._closed:
+            return
+        try:
+            callback(result)
+        except Exception:
+            logger.exception("Ошибка в обработчике фонового задания")
+
+    def isClosed(self):
+        """Пул остановлен (выход из приложения): долгие задания могут прерваться досрочно."""
+        return self._closed
+
+    def shutdown(self):
+        """Останавливает пул без ожидания: незапущенные задания отменяются, колбэки больше не вызываются."""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Кэш ---
+
+    def invalidate(self, path=None):
+        """Сбрасывает кэш для пути (файла или папки) или целиком."""
+        if path is None:
+            self._stats.clear()
+            self._listings.clear()
+            return
+        key = self._key(path)
+        self._stats.pop(key, None)
+        self._listings.pop(key, None)
+
+    def _storeStat(self, path, st):
+        self._stats[self._key(path)] = (time.monotonic(), st)
+
+    def _storeListing(self, directory, names):
+        self._listings[self._key(directory)] = (time.monotonic(), names)
+        self.directoryListed.emit(directory, names)
+
+    def cachedStat(self, path):
+        """Возвращает (известно, stat_result | None) без обращения к диску."""
+        return self._fresh(self._stats, self._key(path))
+
+    def cachedIsFile(self, path):
+        """True/False по кэшу; None — результат неизвестен (проверка запускается в фоне)."""
+        known, st = self.cachedStat(path)
+        if not known:
+            self.stat(path, None)
+            return None
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+    def cachedListdir(self, directory):
+        """Имена файлов папки по кэшу; None — неизвестно (чтение папки запускается в фоне)."""
+        known, names = self._fresh(self._listings, self._key(directory))
+        if not known:
+            self.listdir(directory, None)
+            return None
+        return names
+
+    # --- Асинхронные запросы ---
+
+    def _request(self, kind, key, fn, arg, store, callback):
+        callbacks = self._pending.get((kind, key))
+        if callbacks is not None:
+            if callback is not None:
+                callbacks.append(callback)
+            return
+        self._pending[(kind, key)] = [callback] if callback is not None else []
+
+        def _done(result):
+            store(arg, result)
+            for cb in self._pending.pop((kind, key), ()):
+                cb(result)
+
+        self.submit(fn, arg, callback=_done)
+
+    def stat(self, path, callback):
+        """callback(os.stat_result | None)."""
+        known, st = self.cachedStat(path)
+        if known:
+            if callback is not None:
+                callback(st)
+            return
+        self._request("stat", self._key(path), _safeStat, path, self._storeStat, callback)
+
+    def isFile(self, path, callback):
+        """callback(bool) — существует ли обычный файл."""
+        self.stat(path, lambda st: callback(st is not None and stat.S_ISREG(st.st_mode)))
+
+    def exists(self, path, callback):
+        """callback(bool)."""
+        self.stat(path, lambda st: callback(st is not None))
+
+    def listdir(self, directory, callback):
+        """callback(список имён | None)."""
+        known, names = self._fresh(self._listings, self._key(directory))
+        if known:
+            if callback is not None:
+                callback(names)
+            return
+        self._request("list", self._key(directory), _safeListdir, directory, self._storeListing, callback)
+
+    def statMany(self, paths, callback, directories=()):
+        """Одним заданием: stat для paths и listdir для directories.
+
+        callback(словарь путь -> os.stat_result | None) вызывается после того, как
+        содержимое папок попало в кэш (и разослано через directoryListed).
+        """
+        paths = list(paths)
+        directories = list(dict.fromkeys(directories))
+
+        def _done(result):
+            stats, listings = result if result else ({}, {})
+            for path in paths:
+                self._storeStat(path, stats.get(path))
+            for directory in directories:
+                self._storeListing(directory, listings.get(directory))
+            callback({path: stats.get(path) for path in paths})
+
+        self.submit(_statMany, paths, directories, callback=_done)
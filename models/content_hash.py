@@ -0,0 +1,57 @@
+"""Хэши содержимого медиафайлов: быстрый выборочный (размер + фрагменты через mmap) и полный SHA-256.
+
+Выборочный хэш читает несколько мегабайт независимо от размера файла — для кэша результатов,
+поиска одинаковых файлов и т. п. Полный хэш читает файл целиком и считается в отдельном пуле потоков.
+"""
+
+import os
+import mmap
+import hashlib
+
+from app.constants import HASH_SAMPLE_BYTES, HASH_SAMPLE_COUNT, HASH_FULL_CHUNK_BYTES
+
+SAMPLED_PREFIX = "s1:"  # версия схемы выборки: при её изменении старые хэши не совпадут с новыми
+
+
+def sampleOffsets(size, chunk=HASH_SAMPLE_BYTES, count=HASH_SAMPLE_COUNT):
+    """Смещения фрагментов: начало, конец и count равномерно между ними (без повторов, по возрастанию)."""
+    if size <= chunk * (count + 2):
+        return [0]  # маленький файл читается целиком одним «фрагментом»
+    last = size - chunk
+    step = last / (count + 1)
+    offsets = [0] + [int(step * (i + 1)) for i in range(count)] + [last]
+    return sorted(set(offsets))
+
+
+def sampledHash(path, chunk=HASH_SAMPLE_BYTES, count=HASH_SAMPLE_COUNT):
+    """Выборочный хэш: SHA-256 от размера и фрагментов по sampleOffsets. Блокирующий вызов; OSError пробрасывается."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(f"{size}:{chunk}:{count}".encode("ascii"))
+    if size > 0:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offsets = sampleOffsets(size, chunk, count)
+            if offsets == [0]:
+                digest.update(mm[:])
+            else:
+                for offset in offsets:
+                    digest.update(mm[offset:offset + chunk])
+    return SAMPLED_PREFIX + digest.hexdigest()
+
+
+def fullHash(path, chunk=HASH_FULL_CHUNK_BYTES, should_stop=None):
+    """SHA-256 всего файла (совпадает с sha256sum). Блокирующий вызов; OSError пробрасывается.
+
+    should_stop() — проверяется между блоками; если вернул True, чтение прерывается и возвращается None.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            if should_stop is not None and should_stop():
+                return None
+            digest.update(view[:read])
+    return digest.hexdigest()
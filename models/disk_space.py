@@ -0,0 +1,133 @@
+"""Свободное место перед запуском: оценка размера выходов и проверка дисков с учётом уже идущих записей.
+
+Оценка размера — по битрейту × длительности или по средней степени сжатия пресета (OutputSizeHistory).
+"""
+
+import os
+import json
+import shutil
+import threading
+import logging
+
+from app.constants import JSON_ENCODING, DISK_ESTIMATE_HISTORY_ALPHA
+
+logger = logging.getLogger(__name__)
+
+
+def existingDirectory(path):
+    """Ближайшая существующая папка пути (сам файл может ещё не существовать)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory and not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return directory
+
+
+def deviceOf(path):
+    """Идентификатор устройства (st_dev) папки пути или None."""
+    try:
+        return os.stat(existingDirectory(path)).st_dev
+    except OSError:
+        return None
+
+
+def admissionShortfalls(targets, reservations, reserve_bytes=0):
+    """Диски, на которых не хватит места для нового запуска. Блокирующий вызов — из рабочего потока.
+
+    targets — [(путь, ожидаемый размер, перенос из)] выходов нового запуска, reservations — то же для уже
+    идущих запусков и ещё не перенесённых результатов: от них учитывается только не записанный остаток.
+    «Перенос из» — путь во временной папке (или None): на том же устройстве перенос места не требует.
+    Возвращает [(папка, нужно байт, свободно байт)]; пустой список — запускать можно.
+    """
+    devices = {}  # st_dev -> [папка, нужно новому запуску, занято другими]
+
+    def _add(path, expected, moved_from, reserved):
+        device = deviceOf(path)
+        if device is None or expected <= 0:
+            return
+        if moved_from and deviceOf(moved_from) == device:
+            return
+        if reserved and not moved_from:
+            try:
+                expected = max(0, expected - os.stat(path).st_size)
+            except OSError:
+                pass
+        entry = devices.setdefault(device, [existingDirectory(path), 0, 0])
+        entry[2 if reserved else 1] += expected
+
+    for path, expected, moved_from in targets:
+        _add(path, expected, moved_from, False)
+    for path, expected, moved_from in reservations:
+        _add(path, expected, moved_from, True)
+    shortfalls = []
+    for directory, needed, reserved in devices.values():
+        if needed <= 0:
+            continue
+        try:
+            free = shutil.disk_usage(directory).free
+        except OSError:
+            continue
+        required = needed + reserved + reserve_bytes
+        if free < required:
+            shortfalls.append((directory, required, free))
+    return shortfalls
+
+
+class OutputSizeHistory:
+    """Средняя степень сжатия по пресетам: размер выхода / размер оставленной части входа.
+
+    {ключ: {"ratio", "count"}} в JSON-файле; ratio — экспоненциальное среднее (DISK_ESTIMATE_HISTORY_ALPHA).
+    record/flush можно вызывать из рабочего потока.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _ensureLoaded(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.path, "r", encoding=JSON_ENCODING) as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def ratio(self, key):
+        """Средняя степень сжатия пресета или None, если таких запусков ещё не было."""
+        with self._lock:
+            self._ensureLoaded()
+            entry = self._entries.get(key)
+            return entry.get("ratio") if isinstance(entry, dict) else None
+
+    def record(self, key, ratio):
+        if ratio <= 0:
+            return
+        with self._lock:
+            self._ensureLoaded()
+            entry = self._entries.get(key)
+            if not isinstance(entry, dict) or not entry.get("ratio"):
+                entry = {"ratio": ratio, "count": 0}
+            else:
+                entry["ratio"] += DISK_ESTIMATE_HISTORY_ALPHA * (ratio - entry["ratio"])
+            entry["count"] = entry.get("count", 0) + 1
+            self._entries[key] = entry
+            self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding=JSON_ENCODING) as f:
+                    json.dump(self._entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError:
+                logger.warning("Не удалось сохранить историю размеров выходов: %s", self.path)
@@ -0,0 +1,241 @@
+"""Возможности сборки ffmpeg (кодеры, декодеры, муксеры, фильтры, pix_fmt) и проверка команды до запуска.
+
+Опрос ffmpeg выполняется один раз на бинарник: результат кэшируется в JSON по ключу из пути,
+размера и mtime файла ffmpeg, поэтому обновлённый ffmpeg опрашивается заново.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import platform
+import threading
+import subprocess
+import logging
+
+from app.constants import JSON_ENCODING, JSON_INDENT, X26X_PRESETS
+
+logger = logging.getLogger(__name__)
+
+CAPABILITY_TIMEOUT_SEC = 10
+CAPABILITY_KINDS = ("encoders", "decoders", "muxers", "filters", "pix_fmts")
+
+_FILTER_LINE_RE = re.compile(r"^\s*[T.][S.][C.]\s+(\S+)\s+\S*->\S*")
+_CODEC_OPTION_RE = re.compile(r"^-(?:c|codec)(?::([vas]))?(?::\d+)?$")
+_FILTER_NAME_RE = re.compile(r"^[A-Za-z0-9_]+$")
+_CODEC_NOTE_RE = re.compile(r"\(codec ([A-Za-z0-9_]+)\)$")
+
+# Расширение выходного файла -> муксер, который ffmpeg выберет по нему
+EXTENSION_MUXERS = {
+    "mp4": "mp4", "m4v": "mp4", "mov": "mov", "mkv": "matroska", "webm": "webm", "avi": "avi",
+    "mp3": "mp3", "wav": "wav", "m4a": "ipod", "flac": "flac", "ogg": "ogg",
+}
+
+
+def _runTool(ffmpeg_exec, *args):
+    kwargs = {}
+    if platform.system() == "Windows":
+        kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    proc = subprocess.run(
+        [ffmpeg_exec, "-hide_banner"] + list(args), capture_output=True, timeout=CAPABILITY_TIMEOUT_SEC, **kwargs
+    )
+    return proc.stdout.decode("utf-8", errors="replace")
+
+
+def parseCapabilityList(kind, text):
+    """Имена из вывода ffmpeg -encoders/-decoders/-muxers/-filters/-pix_fmts."""
+    names = set()
+    if kind == "filters":
+        for line in text.splitlines():
+            match = _FILTER_LINE_RE.match(line)
+            if match:
+                names.add(match.group(1))
+        return names
+    started = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not started:
+            started = bool(stripped) and set(stripped) == {"-"}
+            continue
+        parts = stripped.split()
+        if len(parts) >= 2:
+            names.update(name for name in parts[1].split(",") if name)
+        # Кодер/декодер с собственным именем (libdav1d) указывает кодек: "(codec av1)" — ffmpeg принимает оба
+        codec = _CODEC_NOTE_RE.search(stripped)
+        if codec:
+            names.add(codec.group(1))
+    return names
+
+
+class FFmpegCapabilities:
+    """Наборы имён, которые поддерживает конкретный бинарник ffmpeg."""
+
+    def __init__(self, version="", **lists):
+        self.version = version
+        for kind in CAPABILITY_KINDS:
+            setattr(self, kind, set(lists.get(kind) or ()))
+
+    def toDict(self):
+        data = {"version": self.version}
+        for kind in CAPABILITY_KINDS:
+            data[kind] = sorted(getattr(self, kind))
+        return data
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls(data.get("version", ""), **{kind: data.get(kind) for kind in CAPABILITY_KINDS})
+
+    @classmethod
+    def discover(cls, ffmpeg_exec):
+        """Опрашивает ffmpeg (блокирующий вызов — только из рабочего потока)."""
+        version = _runTool(ffmpeg_exec, "-version").splitlines()
+        lists = {kind: parseCapabilityList(kind, _runTool(ffmpeg_exec, "-" + kind)) for kind in CAPABILITY_KINDS}
+        return cls(version[0] if version else "", **lists)
+
+
+class FFmpegCapabilityCache:
+    """Кэш возможностей ffmpeg в JSON-файле: {ключ бинарника: FFmpegCapabilities.toDict()}."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def binaryKey(ffmpeg_exec):
+        """Ключ бинарника: хэш пути, размера и mtime. None — ffmpeg не найден."""
+        resolved = ffmpeg_exec if os.path.isfile(ffmpeg_exec) else shutil.which(ffmpeg_exec)
+        if not resolved:
+            return None
+        try:
+            st = os.stat(resolved)
+        except OSError:
+            return None
+        ident = f"{os.path.normcase(os.path.realpath(resolved))}|{st.st_size}|{st.st_mtime_ns}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding=JSON_ENCODING) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, ffmpeg_exec):
+        """Возможности ffmpeg из кэша или свежий опрос; None — ffmpeg не найден или не отвечает."""
+        key = self.binaryKey(ffmpeg_exec)
+        if key is None:
+            return None
+        with self._lock:
+            data = self._read()
+            entry = data.get(key)
+            if isinstance(entry, dict):
+                return FFmpegCapabilities.fromDict(entry)
+            try:
+                caps = FFmpegCapabilities.discover(ffmpeg_exec)
+            except (OSError, subprocess.SubprocessError):
+                logger.exception("Не удалось опросить возможности ffmpeg")
+                return None
+            if not caps.encoders:
+                return None
+            data[key] = caps.toDict()
+            try:
+                with open(self.path, "w", encoding=JSON_ENCODING) as f:
+                    json.dump(data, f, ensure_ascii=False, indent=JSON_INDENT)
+            except OSError:
+                logger.warning("Не удалось сохранить кэш возможностей ffmpeg: %s", self.path)
+            return caps
+
+
+def filterNames(graph):
+    """Имена фильтров графа (-vf, -filter_complex): цепочки делятся по "," и ";" вне кавычек и скобок."""
+    names = []
+    segments = []
+    current = []
+    quote = False
+    depth = 0
+    escaped = False
+    for ch in graph:
+        if escaped:
+            current.append(ch)
+            escaped = False
+        elif ch == "\\":
+            current.append(ch)
+            escaped = True
+        elif ch == "'":
+            quote = not quote
+            current.append(ch)
+        elif not quote and ch == "[":
+            depth += 1
+            current.append(ch)
+        elif not quote and ch == "]":
+            depth = max(0, depth - 1)
+            current.append(ch)
+        elif not quote and depth == 0 and ch in ",;":
+            segments.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    segments.append("".join(current))
+    for segment in segments:
+        segment = re.sub(r"^\s*(?:\[[^\]]*\]\s*)*", "", segment)
+        name = re.split(r"[=@\[\s]", segment, 1)[0]
+        if name and _FILTER_NAME_RE.match(name):
+            names.append(name)
+    return names
+
+
+def validateFFmpegArgs(args, caps, output_paths=(), input_streams=()):
+    """Проверяет аргументы ffmpeg по возможностям сборки. Возвращает список проблем (пустой — всё в порядке).
+
+    output_paths — выходные файлы (контейнер по расширению), input_streams — потоки входа из ffprobe:
+    для перекодируемых видео и аудио нужен декодер исходного кодека.
+    """
+    if caps is None:
+        return []
+    problems = []
+    last_input = max((i for i, arg in enumerate(args) if arg == "-i"), default=-1)
+    encoders = {"v": [], "a": []}
+    video_encoder = ""
+    i = 0
+    while i < len(args) - 1:
+        option, value = args[i], args[i + 1]
+        codec_match = _CODEC_OPTION_RE.match(option)
+        if codec_match or option in ("-vcodec", "-acodec"):
+            kind = codec_match.group(1) if codec_match else option[1]
+            for key in ((kind,) if kind in ("v", "a") else ("v", "a") if kind is None else ()):
+                encoders[key].append(value)
+            if kind == "v":
+                video_encoder = value
+            if value != "copy" and value not in caps.encoders:
+                problems.append(f"кодер «{value}» отсутствует в этой сборке ffmpeg")
+        elif option.startswith("-pix_fmt"):
+            if value not in caps.pix_fmts:
+                problems.append(f"формат пикселей «{value}» не поддерживается")
+        elif option == "-preset":
+            if video_encoder in ("libx264", "libx265") and value not in X26X_PRESETS:
+                problems.append(f"preset «{value}» не поддерживается кодером {video_encoder}")
+        elif option == "-f" and i > last_input:
+            if value not in caps.muxers:
+                problems.append(f"формат (муксер) «{value}» отсутствует в этой сборке ffmpeg")
+        elif option in ("-vf", "-af", "-filter_complex", "-lavfi") or option.startswith("-filter:"):
+            for name in filterNames(value):
+                if name not in caps.filters:
+                    problems.append(f"фильтр «{name}» отсутствует в этой сборке ffmpeg")
+        else:
+            i += 1
+            continue
+        i += 2
+    for path in output_paths:
+        muxer = EXTENSION_MUXERS.get(os.path.splitext(path)[1].lstrip(".").lower())
+        if muxer and caps.muxers and muxer not in caps.muxers:
+            problems.append(f"контейнер «{muxer}» для {os.path.basename(path)} отсутствует в этой сборке ffmpeg")
+    for kind, codec_type in (("v", "video"), ("a", "audio")):
+        if encoders[kind] and all(value == "copy" for value in encoders[kind]):
+            continue  # поток только копируется — декодер не нужен
+        stream = next((st for st in input_streams or () if st.get("codec_type") == codec_type), None)
+        codec = (stream or {}).get("codec_name", "")
+        if codec and caps.decoders and codec not in caps.decoders:
+            problems.append(f"нет декодера для исходного кодека «{codec}»")
+    return list(dict.fromkeys(problems))
@@ -0,0 +1,117 @@
+"""Классификация ошибок ffmpeg по stderr (категория, понятное описание, строка-причина)
+и выбор запасной стратегии для повторного запуска."""
+
+import re
+
+ERROR_UNKNOWN = "unknown"
+
+# (категория, описание, шаблоны строк stderr); порядок важен — первая совпавшая категория побеждает
+ERROR_CATEGORIES = (
+    ("not_found", "Файл или папка не найдены", (r"No such file or directory",)),
+    ("permission", "Нет прав доступа", (r"Permission denied", r"Operation not permitted")),
+    ("disk_full", "Нет места на диске", (r"No space left on device", r"Disk quota exceeded")),
+    ("encoder_missing", "Кодер отсутствует в этой сборке ffmpeg", (
+        r"Unknown encoder", r"Encoder \S+ not found", r"Encoder not found",
+    )),
+    ("bad_option", "Неизвестная или неверная опция", (
+        r"Unrecognized option", r"Option \S+ not found", r"Error parsing option", r"Invalid option",
+    )),
+    ("stream_map", "Неверное сопоставление потоков (-map, метки фильтра)", (
+        r"matches no streams", r"Stream specifier .* matches", r"Invalid stream specifier",
+        r"Output with label .* does not exist", r"Cannot find a matching stream", r"Output file .* does not contain any stream",
+        r"Invalid file index",
+    )),
+    ("filter", "Ошибка фильтра", (
+        r"No such filter", r"Error initializing (complex )?filter", r"Error reinitializing filters",
+        r"Failed to configure", r"Filter .* has an unconnected output", r"Error (?:while )?(?:parsing|configuring) .*filter",
+    )),
+    ("container", "Кодек несовместим с контейнером", (
+        r"incompatible with output codec", r"not currently supported in container", r"Could not write header",
+        r"codec not currently supported", r"Could not find tag for codec",
+    )),
+    ("encoder_params", "Кодер не принял параметры", (
+        r"Error (?:while )?opening encoder", r"Error initializing output stream", r"Invalid pixel format",
+        r"Incompatible pixel format", r"not supported by the (?:encoder|bitstream)", r"Specified pixel format .* is invalid",
+        r"Could not open encoder", r"Unsupported (?:pixel format|profile|level)",
+    )),
+    ("hwaccel", "Аппаратный кодер или драйвер недоступен", (
+        r"Cannot load (?:nvcuda|libcuda|amfrt)", r"No NVENC capable devices", r"OpenEncodeSessionEx failed",
+        r"Failed to initialise VAAPI", r"No device available for decoder", r"DLL .* failed to open",
+    )),
+    ("input_corrupt", "Входной файл повреждён или не читается", (
+        r"Invalid data found when processing input", r"moov atom not found", r"corrupt", r"Error while decoding",
+        r"could not find codec parameters", r"End of file",
+    )),
+    ("output_open", "Не удалось открыть выходной файл", (r"Error opening output", r"Could not open file",)),
+)
+
+_COMPILED = tuple(
+    (category, label, tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns))
+    for category, label, patterns in ERROR_CATEGORIES
+)
+_CONTEXT_PREFIX_RE = re.compile(r"^(?:\[[^\]]*@ 0x[0-9a-fA-F]+\]\s*)+")  # "[mov,mp4 @ 0x55d…] "
+_ERROR_LINE_RE = re.compile(r"error|invalid|failed|unable|cannot|could not|not found|no such", re.IGNORECASE)
+
+
+def classifyFFmpegError(stderr_text):
+    """По stderr ffmpeg возвращает (категория, описание, строка-причина).
+
+    Категория — ключ из ERROR_CATEGORIES или ERROR_UNKNOWN; строка-причина — первая строка,
+    совпавшая с шаблоном, или последняя похожая на ошибку строка.
+    """
+    lines = [_CONTEXT_PREFIX_RE.sub("", line.strip()) for line in (stderr_text or "").splitlines() if line.strip()]
+    for category, label, patterns in _COMPILED:
+        for line in lines:
+            if any(pattern.search(line) for pattern in patterns):
+                return category, label, line
+    detail = next((line for line in reversed(lines) if _ERROR_LINE_RE.search(line)), lines[-1] if lines else "")
+    return ERROR_UNKNOWN, "Ошибка ffmpeg", detail
+
+
+# Запасные стратегии повторного запуска в порядке применения:
+# (ключ, описание, категории ошибки — пусто: любая, шаблоны stderr — пусто: не нужны)
+FALLBACK_STRATEGIES = (
+    ("reencode_audio", "аудио перекодируется в AAC вместо копирования", ("container",), ()),
+    ("pix_fmt", "формат пикселей yuv420p", ("encoder_params",), (r"pixel format", r"pix_fmt",)),
+    ("genpts", "пересчёт временных меток (-fflags +genpts)", (), (
+        r"non[- ]?monoton", r"Invalid DTS", r"pts has no value", r"Timestamps are unset",
+    )),
+    ("drop_audio", "без аудио", ("stream_map", "filter"), (
+        r"(?:^|[\s'\[;,])\d*:a\b", r"\[(?:out)?a\d*\]", r"'(?:out)?a\d*'", r"\batrim\b",
+    )),
+)
+FALLBACK_LABELS = {key: label for key, label, _, _ in FALLBACK_STRATEGIES}
+
+_FALLBACK_COMPILED = tuple(
+    (key, categories, tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns))
+    for key, _, categories, patterns in FALLBACK_STRATEGIES
+)
+
+
+def _categoryLines(category, stderr_text):
+    """Строки stderr, по которым ошибка отнесена к category (без дампа входных потоков)."""
+    patterns = next((patterns for key, _, patterns in _COMPILED if key == category), ())
+    lines = (line.strip() for line in (stderr_text or "").splitlines())
+    return [line for line in lines if line and any(pattern.search(line) for pattern in patterns)]
+
+
+def nextFallback(category, stderr_text, applied=(), applicable=None, presumed=()):
+    """Первая ещё не применённая стратегия, подходящая к ошибке; None — повторять бессмысленно.
+
+    applicable — ключи стратегий, которые вообще что-то меняют для этого элемента (None — все);
+    presumed — ключи, для которых шаблоны stderr не нужны (причина известна по самому элементу).
+    Стратегии с категориями проверяются только по строкам ошибки этой категории: дамп
+    «Stream #0:1: Audio: …» есть в любом stderr и ничего не говорит о причине.
+    """
+    text = stderr_text or ""
+    error_text = "\n".join(_categoryLines(category, text))
+    for key, categories, patterns in _FALLBACK_COMPILED:
+        if key in applied or (applicable is not None and key not in applicable):
+            continue
+        if categories and category not in categories:
+            continue
+        if patterns and key not in presumed and not any(
+                pattern.search(error_text if categories else text) for pattern in patterns):
+            continue
+        return key
+    return None
@@ -0,0 +1,155 @@
+"""Упреждающее чтение входов очереди с медленного диска: копия на быстрый локальный диск
+(в пределах бюджета, вытеснение давно использованных) или подсказка ОС прочитать файл заранее."""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_MODE_OFF = ""
+PREFETCH_MODE_COPY = "copy"        # копия во временную папку, ffmpeg читает копию
+PREFETCH_MODE_FADVISE = "fadvise"  # posix_fadvise(WILLNEED): файл подтягивается в кэш ОС, путь не меняется
+PREFETCH_MODES = (PREFETCH_MODE_OFF, PREFETCH_MODE_COPY, PREFETCH_MODE_FADVISE)
+_COPY_NAME_RE = re.compile(r"^[0-9a-f]{12}_.+")
+
+
+def warmFile(path):
+    """Просит ОС заранее прочитать файл в кэш страниц. False — на этой платформе не поддерживается."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+    return True
+
+
+class InputPrefetchCache:
+    """Копии входов в папке directory общим размером не больше budget_bytes.
+
+    Запись действительна, пока у исходника тот же размер и mtime. При нехватке места вытесняются
+    давно использованные копии, кроме помеченных setInUse (их сейчас читает ffmpeg).
+    Методы stage/evict блокирующие — вызываются из рабочего потока.
+    """
+
+    def __init__(self, directory, budget_bytes):
+        self.directory = directory
+        self.budget = max(0, int(budget_bytes))
+        self._lock = threading.Lock()
+        self._entries = {}  # ключ исходника -> {"path", "size", "mtime_ns", "used"}
+        self._inUse = set()
+        self._copying = set()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def _copyPath(self, source):
+        digest = hashlib.sha1(self._key(source).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory, f"{digest}_{os.path.basename(source)}")
+
+    def usedBytes(self):
+        with self._lock:
+            return sum(entry["size"] for entry in self._entries.values())
+
+    def setInUse(self, sources):
+        with self._lock:
+            self._inUse = {self._key(path) for path in sources}
+
+    def stagedPath(self, source, st):
+        """Путь готовой копии исходника или None (копии нет, она устарела или ещё пишется)."""
+        if st is None:
+            return None
+        key = self._key(source)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                return None
+            entry["used"] = time.monotonic()
+            return entry["path"]
+
+    def _evictFor(self, needed):
+        """Освобождает место под needed байт (под блокировкой). False — места не хватит даже после вытеснения."""
+        used = sum(entry["size"] for entry in self._entries.values())
+        candidates = sorted(
+            (key for key in self._entries if key not in self._inUse and key not in self._copying),
+            key=lambda key: self._entries[key]["used"],
+        )
+        while used + needed > self.budget and candidates:
+            key = candidates.pop(0)
+            entry = self._entries.pop(key)
+            used -= entry["size"]
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                pass
+        return used + needed <= self.budget
+
+    def stage(self, source, st):
+        """Копирует исходник во временную папку (если его там ещё нет). Возвращает путь копии или None."""
+        if st is None or st.st_size > self.budget:
+            return None
+        existing = self.stagedPath(source, st)
+        if existing is not None:
+            return existing
+        key = self._key(source)
+        with self._lock:
+            if key in self._copying or not self._evictFor(st.st_size):
+                return None
+            self._copying.add(key)
+        target = self._copyPath(source)
+        partial = target + ".partial"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            shutil.copyfile(source, partial)
+            os.replace(partial, target)
+        except OSError as e:
+            logger.warning("Не удалось скопировать вход во временную папку: %s (%s)", source, e)
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            with self._lock:
+                self._copying.discard(key)
+            return None
+        with self._lock:
+            self._copying.discard(key)
+            self._entries[key] = {
+                "path": target, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "used": time.monotonic(),
+            }
+        return target
+
+    def removeLeftovers(self):
+        """Удаляет копии, оставшиеся в папке от прошлого сеанса (только файлы с именами этого кэша)."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        with self._lock:
+            known = {os.path.basename(entry["path"]) for entry in self._entries.values()}
+        for name in names:
+            if _COPY_NAME_RE.match(name) and name not in known:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Удаляет все копии, кроме используемых и записываемых сейчас."""
+        with self._lock:
+            for key in [key for key in self._entries if key not in self._inUse and key not in self._copying]:
+                try:
+                    os.remove(self._entries.pop(key)["path"])
+                except OSError:
+                    pass
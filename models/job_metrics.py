@@ -0,0 +1,199 @@
+"""Метрики запусков ffmpeg: опрос процесса через /proc во время кодирования и история запусков в SQLite.
+
+На системах без /proc (Windows, macOS) процессорное время, память и ввод-вывод не собираются —
+в истории остаются время, скорость и размеры файлов.
+"""
+
+import os
+import csv
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    _CLK_TCK = os.sysconf("SC_CLK_TCK")  # тиков в секунде для utime/stime из /proc/<pid>/stat
+except (AttributeError, ValueError, OSError):
+    _CLK_TCK = 100
+
+# Колонки истории: (имя, тип SQLite, заголовок для просмотра и CSV)
+HISTORY_COLUMNS = (
+    ("finished_at", "TEXT", "Завершён"),
+    ("host", "TEXT", "Компьютер"),
+    ("preset", "TEXT", "Пресет"),
+    ("codec", "TEXT", "Кодек"),
+    ("preset_speed", "TEXT", "Скорость пресета"),
+    ("resolution", "TEXT", "Разрешение"),
+    ("source_fps", "REAL", "FPS входа"),
+    ("container", "TEXT", "Контейнер"),
+    ("input_path", "TEXT", "Входной файл"),
+    ("status", "TEXT", "Итог"),
+    ("exit_code", "INTEGER", "Код завершения"),
+    ("threads", "INTEGER", "Ядер"),
+    ("media_sec", "REAL", "Длительность, с"),
+    ("wall_sec", "REAL", "Время, с"),
+    ("cpu_sec", "REAL", "Время ЦП, с"),
+    ("avg_fps", "REAL", "Кадров/с"),
+    ("avg_speed", "REAL", "Скорость, x"),
+    ("peak_rss_bytes", "INTEGER", "Пик памяти, байт"),
+    ("read_bytes", "INTEGER", "Прочитано, байт"),
+    ("write_bytes", "INTEGER", "Записано, байт"),
+    ("input_bytes", "INTEGER", "Размер входа, байт"),
+    ("output_bytes", "INTEGER", "Размер выхода, байт"),
+    ("compression_ratio", "REAL", "Выход/вход"),
+    ("ffmpeg_version", "TEXT", "Версия ffmpeg"),
+)
+HISTORY_COLUMN_NAMES = tuple(name for name, _, _ in HISTORY_COLUMNS)
+HISTORY_COLUMN_LABELS = {name: label for name, _, label in HISTORY_COLUMNS}
+
+
+def readProcessSample(pid):
+    """Снимок процесса из /proc: {"cpu_sec", "rss_bytes", "peak_rss_bytes", "read_bytes", "write_bytes"}.
+
+    Отсутствующие значения не попадают в словарь; None — /proc недоступен или процесс уже завершился.
+    """
+    base = f"/proc/{int(pid)}"
+    sample = {}
+    try:
+        with open(base + "/stat", "r") as f:
+            # Имя процесса в скобках может содержать пробелы — поля считаются после последней ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        sample["cpu_sec"] = (int(fields[11]) + int(fields[12])) / _CLK_TCK  # utime + stime
+    except (OSError, IndexError, ValueError):
+        return None
+    try:
+        with open(base + "/status", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    size = int(value.split()[0]) * 1024
+                    sample["rss_bytes" if key == "VmRSS" else "peak_rss_bytes"] = size
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        with open(base + "/io", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("read_bytes", "write_bytes"):
+                    sample[key] = int(value)
+    except (OSError, ValueError):
+        pass  # /proc/<pid>/io может быть закрыт правами доступа
+    return sample
+
+
+class JobMetricsRecorder:
+    """Метрики одного запуска: sample() вызывается по таймеру, пока процесс жив; summary() — итог.
+
+    pid — номер процесса или функция, которая его возвращает (процесс может быть ещё не запущен).
+    """
+
+    def __init__(self, pid):
+        self._pid = pid
+        self.started = time.monotonic()
+        self.finished = None
+        self.cpu_sec = None
+        self.peak_rss_bytes = None
+        self.read_bytes = None
+        self.write_bytes = None
+
+    def sample(self):
+        pid = self._pid() if callable(self._pid) else self._pid
+        if self.finished is not None or not pid:
+            return
+        data = readProcessSample(pid)
+        if not data:
+            return
+        self.cpu_sec = data.get("cpu_sec", self.cpu_sec)
+        peak = max(data.get("peak_rss_bytes", 0), data.get("rss_bytes", 0))
+        if peak:
+            self.peak_rss_bytes = max(self.peak_rss_bytes or 0, peak)
+        self.read_bytes = data.get("read_bytes", self.read_bytes)
+        self.write_bytes = data.get("write_bytes", self.write_bytes)
+
+    def finish(self):
+        if self.finished is None:
+            self.finished = time.monotonic()
+
+    def summary(self, media_sec=0.0, frames=0):
+        """Сводка запуска (часть колонок HISTORY_COLUMNS): время, ЦП, память, ввод-вывод, средние fps и скорость."""
+        wall = max(0.0, (self.finished or time.monotonic()) - self.started)
+        return {
+            "wall_sec": round(wall, 3),
+            "cpu_sec": round(self.cpu_sec, 3) if self.cpu_sec is not None else None,
+            "avg_fps": round(frames / wall, 2) if frames and wall > 0 else None,
+            "avg_speed": round(media_sec / wall, 3) if media_sec and wall > 0 else None,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+        }
+
+
+class MetricsHistory:
+    """История запусков в SQLite (одна строка на запуск). Методы блокирующие — вызываются из рабочего потока."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            columns = ", ".join(f"{name} {kind}" for name, kind, _ in HISTORY_COLUMNS)
+            connection.execute(f"CREATE TABLE IF NOT EXISTS job_metrics (id INTEGER PRIMARY KEY, {columns})")
+            # База от прошлой версии: недостающие колонки добавляются (у старых строк они пустые)
+            existing = {info[1] for info in connection.execute("PRAGMA table_info(job_metrics)")}
+            for name, kind, _ in HISTORY_COLUMNS:
+                if name not in existing:
+                    connection.execute(f"ALTER TABLE job_metrics ADD COLUMN {name} {kind}")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS job_metrics_key ON job_metrics (preset, codec, resolution, host)"
+            )
+            connection.commit()
+            self._ready = True
+        return connection
+
+    def record(self, row):
+        """Добавляет строку; row — словарь с ключами из HISTORY_COLUMN_NAMES (остальные игнорируются)."""
+        values = [row.get(name) for name in HISTORY_COLUMN_NAMES]
+        placeholders = ", ".join("?" for _ in HISTORY_COLUMN_NAMES)
+        with self._lock:
+            try:
+                connection = self._connect()
+                try:
+                    connection.execute(
+                        f"INSERT INTO job_metrics ({', '.join(HISTORY_COLUMN_NAMES)}) VALUES ({placeholders})", values
+                    )
+                    connection.commit()
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                logger.warning("Не удалось записать метрики запуска в %s: %s", self.path, e)
+
+    def rows(self, limit=None):
+        """Последние запуски (новые первыми) — список словарей; [] при ошибке чтения."""
+        query = f"SELECT {', '.join(HISTORY_COLUMN_NAMES)} FROM job_metrics ORDER BY id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            try:
+                connection = self._connect()
+                try:
+                    return [dict(zip(HISTORY_COLUMN_NAMES, values)) for values in connection.execute(query)]
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                logger.warning("Не удалось прочитать историю запусков %s: %s", self.path, e)
+                return []
+
+    def exportCsv(self, csv_path):
+        """Выгружает всю историю в CSV (UTF-8 с BOM — открывается в Excel). Возвращает число строк; OSError пробрасывается."""
+        rows = self.rows()
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(HISTORY_COLUMN_NAMES)
+            for row in reversed(rows):
+                writer.writerow(["" if row[name] is None else row[name] for name in HISTORY_COLUMN_NAMES])
+        return len(rows)
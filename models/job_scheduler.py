@@ -0,0 +1,268 @@
+"""Единый планировщик запусков ffmpeg: общий лимит одновременных процессов, бюджет ядер и полосы приоритета."""
+
+import os
+import re
+import time
+import itertools
+import logging
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+
+from app.constants import SCHEDULER_MAX_JOBS, WATCHDOG_CHECK_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+_TIME_RE = re.compile(r"time=\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_SPEED_RE = re.compile(r"speed=\s*([0-9]*\.?[0-9]+)x")
+
+
+def limitThreads(args, cores):
+    """Добавляет "-threads N" перед выходным файлом, если потоки не заданы явно."""
+    args = list(args)
+    if cores and cores > 0 and "-threads" not in args and args:
+        args[-1:-1] = ["-threads", str(cores)]
+    return args
+
+
+class Job:
+    """Один запуск ffmpeg. Колбэки вызываются в потоке GUI:
+
+    on_started(job), on_output(job, stdout_text, stderr_text),
+    on_finished(job, exit_code, exit_status), on_error(job, QProcess.ProcessError).
+
+    stall_timeout > 0 включает сторож: если out_time_sec не растёт столько секунд, процесс убивается,
+    а job.stalled становится True до вызова on_error/on_finished.
+    """
+
+    LANE_INTERACTIVE = 0  # одиночные конвертации со страниц «Видео в аудио» / «Аудио конвертер»
+    LANE_QUEUE = 1        # основная очередь кодирования
+    LANE_BATCH = 2        # пакетная конвертация аудио (много коротких заданий)
+    LANE_PREFLIGHT = 3    # пробный прогон очереди (несколько секунд каждого элемента в null)
+
+    STATE_PENDING = "pending"
+    STATE_RUNNING = "running"
+    STATE_FINISHED = "finished"
+    STATE_CANCELLED = "cancelled"
+
+    def __init__(self, program, args, lane=LANE_QUEUE, cores=1, label="", output_paths=None):
+        self.program = program
+        self.args = list(args)
+        self.lane = lane
+        self.cores = max(1, int(cores or 1))
+        self.label = label
+        self.output_paths = list(output_paths or [])
+        self.estimated_bytes = {}  # путь выхода -> ожидаемый размер (учитывается при проверке свободного места)
+        self.state = Job.STATE_PENDING
+        self.cancelRequested = False
+        self.process = None
+        self.out_time_sec = 0.0  # позиция по "time=" из вывода ffmpeg
+        self.speed = 0.0
+        self.stall_timeout = 0
+        self.last_progress_ts = 0.0  # time.monotonic() последнего продвижения out_time_sec
+        self.stalled = False
+        self.on_started = None
+        self.on_output = None
+        self.on_finished = None
+        self.on_error = None
+
+    @property
+    def isActive(self):
+        return self.state in (Job.STATE_PENDING, Job.STATE_RUNNING)
+
+
+class JobScheduler(QObject):
+    """Запускает Job по приоритету полос (меньше — раньше), соблюдая общий лимит процессов,
+    лимиты полос и бюджет ядер. Задание, которому не хватает ядер, ждёт освобождения —
+    менее приоритетные задания его не обгоняют.
+    """
+
+    jobsChanged = Signal()        # изменился состав ожидающих/выполняющихся заданий
+    jobProgress = Signal(object)  # Job: обновились out_time_sec/speed
+
+    def __init__(self, max_jobs=SCHEDULER_MAX_JOBS, total_cores=None, lane_limits=None, parent=None):
+        super().__init__(parent)
+        self.totalCores = max(1, int(total_cores or os.cpu_count() or 1))
+        self.maxJobs = max(1, int(max_jobs)) if max_jobs else self.totalCores
+        # Основная очередь последовательна: в её полосе одновременно не больше одного процесса
+        self._laneLimits = {Job.LANE_QUEUE: 1} if lane_limits is None else dict(lane_limits)
+        self._pending = []  # (полоса, порядковый номер, Job)
+        self._running = []
+        self._seq = itertools.count()
+        self._closed = False
+        self._watchdogTimer = QTimer(self)
+        self._watchdogTimer.setInterval(WATCHDOG_CHECK_INTERVAL_MS)
+        self._watchdogTimer.timeout.connect(self._checkStalledJobs)
+
+    # --- Состояние ---
+
+    def runningJobs(self, lane=None):
+        return [j for j in self._running if lane is None or j.lane == lane]
+
+    def pendingJobs(self, lane=None):
+        return [j for _, _, j in self._pending if lane is None or j.lane == lane]
+
+    def activeJobs(self, lane=None):
+        return self.runningJobs(lane) + self.pendingJobs(lane)
+
+    def usedCores(self):
+        return sum(j.cores for j in self._running)
+
+    # --- Постановка и отмена ---
+
+    def submit(self, job):
+        job.state = Job.STATE_PENDING
+        self._pending.append((job.lane, next(self._seq), job))
+        self._pending.sort(key=lambda entry: entry[:2])
+        self._dispatch()
+        self.jobsChanged.emit()
+        return job
+
+    def cancel(self, job):
+        """Снимает ожидающее задание или убивает выполняющийся процесс (колбэк on_finished всё равно придёт)."""
+        if job is None:
+            return
+        job.cancelRequested = True
+        for entry in self._pending:
+            if entry[2] is job:
+                self._pending.remove(entry)
+                job.state = Job.STATE_CANCELLED
+                self.jobsChanged.emit()
+                return
+        if job.state == Job.STATE_RUNNING and job.process is not None:
+            if job.process.state() != QProcess.NotRunning:
+                job.process.kill()
+
+    def cancelAll(self, lane=None):
+        for job in self.pendingJobs(lane) + self.runningJobs(lane):
+            self.cancel(job)
+
+    def shutdown(self):
+        """При выходе из приложения: убивает все процессы, колбэки больше не вызываются."""
+        self._closed = True
+        self._watchdogTimer.stop()
+        self._pending.clear()
+        for job in list(self._running):
+            job.cancelRequested = True
+            try:
+                if job.process is not None and job.process.state() != QProcess.NotRunning:
+                    job.process.kill()
+            except RuntimeError:
+                pass
+
+    # --- Запуск ---
+
+    def _laneAllows(self, lane):
+        limit = self._laneLimits.get(lane)
+        return limit is None or len(self.runningJobs(lane)) < limit
+
+    def _dispatch(self):
+        index = 0
+        while index < len(self._pending) and len(self._running) < self.maxJobs:
+            job = self._pending[index][2]
+            if not self._laneAllows(job.lane):
+                index += 1
+                continue
+            if self._running and self.usedCores() + job.cores > self.totalCores:
+                break
+            del self._pending[index]
+            self._start(job)
+
+    def _start(self, job):
+        proc = QProcess(self)
+        job.process = proc
+        job.state = Job.STATE_RUNNING
+        job.stalled = False
+        job.last_progress_ts = time.monotonic()
+        self._running.append(job)
+        proc.readyReadStandardOutput.connect(lambda: self._onOutput(job))
+        proc.readyReadStandardError.connect(lambda: self._onOutput(job))
+        proc.finished.connect(lambda code, status: self._onFinished(job, code, status))
+        proc.errorOccurred.connect(lambda error: self._onError(job, error))
+        if job.on_started:
+            job.on_started(job)
+        proc.start(job.program, job.args)
+        self._updateWatchdog()
+
+    def _onOutput(self, job):
+        proc = job.process
+        if proc is None or self._closed:
+            return
+        try:
+            out = proc.readAllStandardOutput().data().decode("utf-8", errors="replace")
+            err = proc.readAllStandardError().data().decode("utf-8", errors="replace")
+        except RuntimeError:
+            return  # процесс уже удалён вместе с окном при выходе из приложения
+        text = out + err
+        time_match = _TIME_RE.findall(text)
+        speed_match = _SPEED_RE.findall(text)
+        if time_match:
+            hours, minutes, seconds = time_match[-1]
+            out_time = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            if out_time > job.out_time_sec:
+                job.last_progress_ts = time.monotonic()
+            job.out_time_sec = out_time
+        if speed_match:
+            try:
+                job.speed = float(speed_match[-1])
+            except ValueError:
+                pass
+        if time_match or speed_match:
+            self.jobProgress.emit(job)
+        if job.on_output:
+            job.on_output(job, out, err)
+
+    def _onError(self, job, error):
+        if self._closed:
+            return
+        if job.on_error:
+            job.on_error(job, error)
+        # Если процесс не запустился, finished не придёт — освобождаем слот здесь
+        if error == QProcess.ProcessError.FailedToStart and job.state == Job.STATE_RUNNING:
+            self._release(job)
+
+    def _onFinished(self, job, code, status):
+        if job.state != Job.STATE_RUNNING or self._closed:
+            return
+        self._onOutput(job)
+        if job.on_finished:
+            job.on_finished(job, code, status)
+        self._release(job)
+
+    def _release(self, job):
+        job.state = Job.STATE_CANCELLED if job.cancelRequested else Job.STATE_FINISHED
+        if job in self._running:
+            self._running.remove(job)
+        if job.process is not None:
+            try:
+                job.process.deleteLater()
+            except RuntimeError:
+                pass  # уже удалён вместе с окном
+            job.process = None
+        self._dispatch()
+        self._updateWatchdog()
+        self.jobsChanged.emit()
+
+    # --- Сторож зависаний ---
+
+    def _updateWatchdog(self):
+        watched = any(j.stall_timeout > 0 for j in self._running)
+        if watched and not self._watchdogTimer.isActive() and not self._closed:
+            self._watchdogTimer.start()
+        elif not watched:
+            self._watchdogTimer.stop()
+
+    def _checkStalledJobs(self):
+        now = time.monotonic()
+        for job in list(self._running):
+            if job.stall_timeout <= 0 or job.stalled or job.process is None:
+                continue
+            if now - job.last_progress_ts < job.stall_timeout:
+                continue
+            logger.warning(
+                "ffmpeg (%s) без прогресса %.0f с на позиции %.1f с — процесс убит",
+                job.label, now - job.last_progress_ts, job.out_time_sec,
+            )
+            job.stalled = True
+            if job.process.state() != QProcess.NotRunning:
+                job.process.kill()
+        self._updateWatchdog()
@@ -0,0 +1,162 @@
+"""Выделение имён выходных файлов: кэш содержимого папок и резервирование имён за элементами очереди."""
+
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Символы, недопустимые в имени файла (Windows — самый строгий случай)
+_INVALID_NAME_CHARS = re.compile(r'[\\/:*?"<>|]+')
+
+
+def _listDirectory(directory):
+    """Читает имена файлов папки одним вызовом. Несуществующая/недоступная папка — пустое множество."""
+    try:
+        return set(os.listdir(directory or "."))
+    except OSError:
+        return set()
+
+
+def renderOutputNameTemplate(template, **fields):
+    """Подставляет поля в шаблон имени ({name}, {preset}, {codec}, {container}, {resolution}).
+
+    Неизвестные поля и ошибки формата не роняют генерацию — используется "{name}_converted".
+    Разделители путей и недопустимые символы заменяются на "_".
+    """
+    values = {k: _INVALID_NAME_CHARS.sub("_", str(v if v is not None else "")) for k, v in fields.items()}
+    try:
+        stem = (template or "").format(**values)
+    except (KeyError, IndexError, ValueError):
+        logger.warning("Некорректный шаблон имени выходного файла: %r", template)
+        stem = ""
+    stem = _INVALID_NAME_CHARS.sub("_", stem).strip()
+    if not stem or stem in (".", ".."):
+        stem = values.get("name", "") + "_converted"
+    return stem
+
+
+class OutputNameAllocator:
+    """Выдаёт свободные имена выходных файлов без повторных os.path.exists.
+
+    Каждая папка читается один раз (lister), имена кэшируются; имена, занятые элементами очереди,
+    резервируются за владельцем, поэтому два элемента не получат один и тот же файл.
+    Если lister возвращает None (содержимое ещё читается в фоне), имена в этой папке предварительные:
+    папка в поток GUI не читается, поэтому перед запуском вызывающий дожидается чтения папки
+    (isDirectoryKnown) и выдаёт имя заново.
+    """
+
+    def __init__(self, lister=None):
+        self._lister = lister or _listDirectory
+        self._dirNames = {}      # normcase(папка) -> множество normcase(имён) на диске
+        self._reserved = {}      # normcase(путь) -> владелец
+        self._owned = {}         # id(владельца) -> множество normcase(путей)
+        self._nextCounter = {}   # (папка, основа, суффикс, расширение) -> следующий номер
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def _names(self, directory):
+        key = self._key(directory or ".")
+        names = self._dirNames.get(key)
+        if names is None:
+            listed = self._lister(directory)
+            if listed is None:
+                return set()
+            names = {os.path.normcase(n) for n in listed}
+            self._dirNames[key] = names
+        return names
+
+    def primeDirectory(self, directory, names):
+        """Заполняет кэш папки готовым списком имён (например, прочитанным в фоне)."""
+        self.invalidate(directory)
+        self._dirNames[self._key(directory or ".")] = {os.path.normcase(n) for n in (names or ())}
+
+    def isDirectoryKnown(self, directory):
+        return self._key(directory or ".") in self._dirNames
+
+    def invalidate(self, directory=None):
+        """Сбрасывает кэш содержимого папки (или всех папок). Резервирования сохраняются."""
+        if directory is None:
+            self._dirNames.clear()
+            self._nextCounter.clear()
+            return
+        key = self._key(directory)
+        self._dirNames.pop(key, None)
+        for counter_key in [k for k in self._nextCounter if k[0] == key]:
+            del self._nextCounter[counter_key]
+
+    def markExisting(self, path):
+        """Отмечает, что файл появился на диске (например, после успешного кодирования)."""
+        if not path:
+            return
+        directory, name = os.path.split(os.path.normpath(path))
+        self._names(directory).add(os.path.normcase(name))
+
+    def forgetExisting(self, path):
+        """Отмечает, что файл удалён с диска."""
+        if not path:
+            return
+        directory, name = os.path.split(os.path.normpath(path))
+        names = self._dirNames.get(self._key(directory or "."))
+        if names is not None:
+            names.discard(os.path.normcase(name))
+
+    def existsOnDisk(self, path):
+        directory, name = os.path.split(os.path.normpath(path))
+        return os.path.normcase(name) in self._names(directory)
+
+    def isFree(self, path, owner=None):
+        """Имя свободно: файла нет на диске и оно не зарезервировано другим владельцем."""
+        if not path:
+            return False
+        holder = self._reserved.get(self._key(path))
+        if holder is not None and holder is not owner:
+            return False
+        return not self.existsOnDisk(path)
+
+    def reserve(self, path, owner):
+        if not path or owner is None:
+            return
+        key = self._key(path)
+        self._reserved[key] = owner
+        self._owned.setdefault(id(owner), set()).add(key)
+
+    def release(self, owner):
+        """Снимает все резервирования владельца; освободившиеся номера снова доступны для выдачи."""
+        released_dirs = set()
+        for key in self._owned.pop(id(owner), ()):
+            if self._reserved.get(key) is owner:
+                del self._reserved[key]
+                released_dirs.add(os.path.dirname(key) or self._key("."))
+        if released_dirs:
+            for counter_key in [k for k in self._nextCounter if k[0] in released_dirs]:
+                del self._nextCounter[counter_key]
+
+    def reservedPaths(self, owner):
+        return set(self._owned.get(id(owner), ()))
+
+    def allocate(self, owner, directory, stem, ext, suffix="_{n}", plain_first=True):
+        """Возвращает свободный путь directory/stem[suffix].ext и резервирует его за owner.
+
+        Номер подбирается с места, где остановился предыдущий поиск для той же основы,
+        поэтому выдача имени не требует перебора уже занятых вариантов.
+        """
+        ext = (ext or "").lstrip(".")
+        tail = ("." + ext) if ext else ""
+        directory = directory or ""
+        candidate = os.path.normpath(os.path.join(directory, stem + tail))
+        if plain_first and self.isFree(candidate, owner):
+            self.reserve(candidate, owner)
+            return candidate
+        counter_key = (self._key(directory or "."), os.path.normcase(stem), suffix, os.path.normcase(ext))
+        n = self._nextCounter.get(counter_key, 1)
+        while True:
+            candidate = os.path.normpath(os.path.join(directory, stem + suffix.format(n=n) + tail))
+            n += 1
+            if self.isFree(candidate, owner):
+                break
+        self._nextCounter[counter_key] = n
+        self.reserve(candidate, owner)
+        return candidate
@@ -0,0 +1,53 @@
+"""Промежуточная папка для выходов: ffmpeg пишет на быстрый локальный диск, готовый файл переносится на место целиком."""
+
+import os
+import errno
+import shutil
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX = ".partial"
+
+
+def stagingPathFor(staging_dir, final_path):
+    """Путь во временной папке: имя итогового файла с префиксом от полного пути (разные папки не конфликтуют)."""
+    digest = hashlib.sha1(os.path.normcase(os.path.normpath(final_path)).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(staging_dir, f"{digest}_{os.path.basename(final_path)}")
+
+
+def commitStagedFile(staged_path, final_path):
+    """Переносит готовый файл на место (блокирующий вызов). True — успешно.
+
+    На том же устройстве — os.replace. Иначе файл копируется рядом с целью во временное имя
+    и переименовывается: под итоговым именем никогда не виден недописанный файл.
+    """
+    try:
+        os.replace(staged_path, final_path)
+        return True
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            logger.warning("Не удалось перенести %s -> %s: %s", staged_path, final_path, e)
+            return False
+    partial_path = final_path + PARTIAL_SUFFIX
+    try:
+        shutil.copyfile(staged_path, partial_path)
+        os.replace(partial_path, final_path)
+    except OSError as e:
+        logger.warning("Не удалось скопировать %s -> %s: %s", staged_path, final_path, e)
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+        return False
+    try:
+        os.remove(staged_path)
+    except OSError:
+        pass
+    return True
+
+
+def commitStagedFiles(pairs):
+    """pairs — [(временный путь, итоговый)]. Возвращает итоговые пути, которые перенести не удалось."""
+    return [final_path for staged_path, final_path in pairs if not commitStagedFile(staged_path, final_path)]
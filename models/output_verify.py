@@ -0,0 +1,71 @@
+"""Проверка результата кодирования: файл не пустой, читается ffprobe, длительность и набор потоков ожидаемые."""
+
+import os
+import logging
+
+from app.constants import VERIFY_DURATION_TOLERANCE_SEC, VERIFY_DURATION_TOLERANCE_RATIO, VERIFY_PROBE_TIMEOUT_SEC
+from models.probe_store import runFFprobe, ProbeFailed
+
+logger = logging.getLogger(__name__)
+
+# Контейнеры без видео: видеопоток в них не ожидается
+AUDIO_ONLY_EXTENSIONS = {"mp3", "wav", "m4a", "flac", "ogg", "opus", "aac", "wma"}
+
+
+def verifyOutputFile(ffprobe_exec, path, expected_duration=0.0, expect_video=None, expect_audio=None):
+    """Проблемы выходного файла (пустой список — всё в порядке). Блокирующий вызов — только из рабочего потока.
+
+    expected_duration <= 0 — длительность не проверяется; expect_video/expect_audio: True — поток
+    должен быть, False — не должно быть, None — не проверяется. FileNotFoundError (нет ffprobe) пробрасывается.
+    None — файл проверить не удалось: ffprobe не ответил вовремя; ошибка ffprobe — файл не читается.
+    """
+    name = os.path.basename(path)
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        return [f"{name}: файл не найден"]
+    if size <= 0:
+        return [f"{name}: файл пустой"]
+    try:
+        info = runFFprobe(ffprobe_exec, path, VERIFY_PROBE_TIMEOUT_SEC, raise_errors=True)
+    except ProbeFailed as e:
+        logger.warning("Результат не проверен: %s: %s", path, e)
+        return None
+    if not info:
+        return [f"{name}: файл не читается (ffprobe)"]
+    problems = []
+    duration = info.get("duration") or 0.0
+    if expected_duration > 0 and duration > 0:
+        tolerance = max(VERIFY_DURATION_TOLERANCE_SEC, expected_duration * VERIFY_DURATION_TOLERANCE_RATIO)
+        if abs(duration - expected_duration) > tolerance:
+            problems.append(f"{name}: длительность {duration:.1f} с вместо {expected_duration:.1f} с")
+    streams = info.get("streams") or []
+    for kind, expected, label in (("video", expect_video, "видео"), ("audio", expect_audio, "аудио")):
+        if expected is None:
+            continue
+        present = any(st.get("codec_type") == kind for st in streams)
+        if expected and not present:
+            problems.append(f"{name}: нет потока {label}")
+        elif not expected and present:
+            problems.append(f"{name}: лишний поток {label}")
+    return problems
+
+
+def verifyOutputs(ffprobe_exec, checks):
+    """checks — [(путь, ожидаемая длительность, expect_video, expect_audio)]. Возвращает список проблем
+    или None, если ffprobe не найден или не ответил вовремя по какому-то выходу, а проблем у остальных нет
+    (результат не проверен — это не ошибка кодирования).
+    """
+    problems = []
+    unverified = False
+    for path, expected_duration, expect_video, expect_audio in checks:
+        try:
+            file_problems = verifyOutputFile(ffprobe_exec, path, expected_duration, expect_video, expect_audio)
+        except FileNotFoundError:
+            logger.warning("ffprobe не найден — результат кодирования не проверен")
+            return None
+        if file_problems is None:
+            unverified = True
+        else:
+            problems += file_problems
+    return None if unverified and not problems else problems
@@ -0,0 +1,170 @@
+"""Кэш результатов ffprobe и хэшей содержимого по (путь, размер, mtime): один запуск ffprobe
+и одно чтение файла для хэша, пока файл не изменился."""
+
+import os
+import json
+import platform
+import threading
+import subprocess
+import logging
+
+from models.content_hash import sampledHash, fullHash
+
+logger = logging.getLogger(__name__)
+
+# Поля ffprobe, которых хватает и для прогресса/ETA, и для выбора потоков при построении команды
+PROBE_SHOW_ENTRIES = (
+    "format=duration,bit_rate,format_name"
+    ":stream=index,codec_type,codec_name,avg_frame_rate,nb_frames,width,height,"
+    "pix_fmt,channels,sample_rate,bit_rate"
+    ":stream_tags=language"
+)
+PROBE_TIMEOUT_SEC = 5
+
+
+def _parseFps(value):
+    if not value or value == "0/0":
+        return 0.0
+    try:
+        if "/" in value:
+            num, den = value.split("/", 1)
+            return float(num) / float(den) if float(den) else 0.0
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parseProbeData(data):
+    """Приводит JSON ffprobe к словарю: duration, fps, total_frames, has_audio, streams, format."""
+    data = data or {}
+    fmt = data.get("format") or {}
+    streams = data.get("streams") or []
+    try:
+        duration = float(fmt.get("duration") or 0)
+    except (TypeError, ValueError):
+        duration = 0.0
+    video = next((s for s in streams if s.get("codec_type") == "video"), {}) or {}
+    fps = _parseFps(video.get("avg_frame_rate", "") or "")
+    total_frames = 0
+    nb_frames = str(video.get("nb_frames", "") or "")
+    if nb_frames.isdigit():
+        total_frames = int(nb_frames)
+    elif duration > 0 and fps > 0:
+        total_frames = int(duration * fps)
+    return {
+        "duration": duration,
+        "fps": fps,
+        "total_frames": total_frames,
+        "has_audio": any(s.get("codec_type") == "audio" for s in streams) if streams else None,
+        "streams": streams,
+        "format": fmt,
+    }
+
+
+class ProbeFailed(Exception):
+    """ffprobe не ответил за отведённое время (runFFprobe с raise_errors=True)."""
+
+
+def runFFprobe(ffprobe_exec, path, timeout=PROBE_TIMEOUT_SEC, raise_errors=False):
+    """Запускает ffprobe и возвращает разобранный результат или None.
+
+    FileNotFoundError (ffprobe не найден) пробрасывается вызывающему; при raise_errors=True
+    таймаут — тоже (ProbeFailed), а не None. Ненулевой код завершения — всегда None: файл не читается.
+    """
+    args = [ffprobe_exec, "-v", "error", "-show_entries", PROBE_SHOW_ENTRIES, "-of", "json", path]
+    kwargs = {}
+    if platform.system() == "Windows":
+        kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    try:
+        proc = subprocess.run(args, capture_output=True, timeout=timeout, **kwargs)
+    except subprocess.TimeoutExpired:
+        logger.warning("ffprobe не ответил за %s с: %s", timeout, path)
+        if raise_errors:
+            raise ProbeFailed(f"ffprobe не ответил за {timeout} с")
+        return None
+    if proc.returncode != 0 or not proc.stdout:
+        return None
+    try:
+        data = json.loads(proc.stdout.decode("utf-8", errors="replace"))
+    except ValueError:
+        return None
+    return parseProbeData(data)
+
+
+class ProbeStore:
+    """Потокобезопасный кэш ffprobe и хэшей. Ключ — (путь, размер, mtime), поэтому изменённый файл пробуется заново."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hashes = {}  # ключ -> {"sampled": ..., "full": ...}
+        self.toolMissing = False  # ffprobe не найден при последней попытке
+
+    @staticmethod
+    def key(path, st):
+        return (os.path.normcase(os.path.normpath(path)), st.st_size, st.st_mtime_ns)
+
+    def get(self, path, st):
+        if st is None:
+            return None
+        with self._lock:
+            return self._entries.get(self.key(path, st))
+
+    def put(self, path, st, info):
+        if st is None or info is None:
+            return
+        with self._lock:
+            self._entries[self.key(path, st)] = info
+
+    def probe(self, ffprobe_exec, path, st=None):
+        """Возвращает данные ffprobe из кэша или запускает ffprobe (блокирующий вызов — только из рабочего потока)."""
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+        info = self.get(path, st)
+        if info is not None:
+            return info
+        try:
+            info = runFFprobe(ffprobe_exec, path)
+        except FileNotFoundError:
+            self.toolMissing = True
+            return None
+        except OSError:
+            logger.exception("Не удалось запустить ffprobe")
+            return None
+        self.toolMissing = False
+        self.put(path, st, info)
+        return info
+
+    def _hash(self, kind, fn, path, st):
+        """Хэш kind из кэша или fn(path); None (не читается или прервано) не кэшируется."""
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+        key = self.key(path, st)
+        with self._lock:
+            cached = self._hashes.get(key, {}).get(kind)
+        if cached is not None:
+            return cached
+        try:
+            value = fn(path)
+        except (OSError, ValueError):
+            logger.warning("Не удалось прочитать файл для хэша: %s", path)
+            return None
+        if value is None:
+            return None
+        with self._lock:
+            self._hashes.setdefault(key, {})[kind] = value
+        return value
+
+    def sampledHash(self, path, st=None):
+        """Выборочный хэш содержимого из кэша или вычисленный (блокирующий вызов — только из рабочего потока)."""
+        return self._hash("sampled", sampledHash, path, st)
+
+    def fullHash(self, path, st=None, should_stop=None):
+        """Полный SHA-256 из кэша или вычисленный (долгий блокирующий вызов — только из пула хэшей)."""
+        return self._hash("full", lambda p: fullHash(p, should_stop=should_stop), path, st)
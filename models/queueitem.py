@@ -57,6 +57,22 @@ class QueueItem:
         self.total_frames = 0
         self.processed_frames = 0
         self.has_audio = None
+        self.media_info = None  # Данные ffprobe (ProbeStore); {} — пробовали, но не получили
+        self.input_stat = None  # os.stat входного файла на момент подготовки к запуску
+        self.content_hash = ""  # выборочный хэш содержимого входа (models.content_hash), считается при подготовке
+        self.full_hash = ""  # полный SHA-256 входа, если запрашивался (_requestFullHash)
+        self.prepared = False  # Подготовлен к запуску (stat, ffprobe, выходное имя)
+        self.preflight_error = ""  # Итог пробного прогона: "" — без ошибок или не проверялся
+        self.stall_retries = 0  # сколько раз запуск перезапускался сторожем зависаний
+        self.fallbacks = []  # запасные стратегии после неудачных запусков (ключи FALLBACK_STRATEGIES)
+        self.verify_state = ""  # проверка выхода после кодирования: "" | "pending" | "moving" | "ok" | "failed"
+        self.result_key = None  # ключ кэша результатов текущего запуска (вход + команда + версия ffmpeg)
+        self.from_cache = False  # выход взят из кэша результатов, кодирование не запускалось
+        self.staged_outputs = {}  # итоговый путь -> путь во временной папке, пока выход не перенесён на место
+        self.output_estimate = 0  # ожидаемый размер каждого выхода, байт (проверка свободного места)
+        self.disk_wait = False  # запуск ждёт, пока на диске освободится место
+        self.disk_full_retries = 0  # сколько раз запуск перезапускался после переполнения диска
+        self.metrics = None  # сводка последнего запуска (models.job_metrics), показывается в «Статистике»
         self.no_audio_warning_shown = False
         self.concat_audio_warning_shown = False
 
@@ -64,6 +80,15 @@ class QueueItem:
         self.command_manually_edited = False
         self.last_generated_command = ""
 
+        # Лесенка качеств: дополнительные выходы (QueueItem того же файла со своим пресетом),
+        # которые кодируются тем же запуском ffmpeg из одного декодирования
+        self.renditions = []
+
+        # Дополнительные места сохранения того же закодированного потока (муксер tee):
+        # [{"dir": папка, "container": "" — как основной | расширение}]
+        self.extra_destinations = []
+        self.extra_output_files = []  # итоговые пути дополнительных мест, заполняются при построении команды
+
     def setPreset(self, preset_data):
         """Устанавливает параметры из пресета"""
         if preset_data:
@@ -88,6 +113,13 @@ class QueueItem:
             self.vf_lanczos = (v is True) or (str(v).strip() == "1")
             self.extra_args = preset_data.get('extra_args', '') or ''
 
+    def outputFiles(self):
+        """Все выходные файлы элемента: основной, дополнительные места сохранения и выходы лесенки."""
+        paths = [self.output_file] + list(self.extra_output_files)
+        for rendition in self.renditions:
+            paths += rendition.outputFiles()
+        return [path for path in paths if path]
+
     def getStatusText(self):
         """Возвращает текстовое представление статуса"""
         base = self.STATUS_LABELS.get(self.status, "❓ Неизвестно")
@@ -95,4 +127,12 @@ class QueueItem:
             if self.status == QueueItem.STATUS_SUCCESS:
                 return "✅ Успех (переименован)"
             return "🔄 Переименован"
+        if self.status == QueueItem.STATUS_PROCESSING and getattr(self, "disk_wait", False):
+            return "💾 Ожидание места на диске"
+        if self.status == QueueItem.STATUS_SUCCESS and getattr(self, "verify_state", "") == "pending":
+            return "🔎 Проверка результата"
+        if self.status == QueueItem.STATUS_SUCCESS and getattr(self, "verify_state", "") == "moving":
+            return "📦 Перенос результата"
+        if self.status == QueueItem.STATUS_SUCCESS and getattr(self, "from_cache", False):
+            return "✅ Успех (из кэша)"
         return base
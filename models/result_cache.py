@@ -0,0 +1,147 @@
+"""Кэш результатов кодирования по содержимому: если вход, команда и ffmpeg не менялись, а проверенный
+выход прошлого запуска цел, элемент очереди не перекодируется.
+
+Ключ — хэш из выборочного хэша содержимого входа (models.content_hash), аргументов ffmpeg без путей и версии ffmpeg.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import logging
+
+from app.constants import JSON_ENCODING, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_SAVE_INTERVAL_SEC
+
+logger = logging.getLogger(__name__)
+
+INPUT_PLACEHOLDER = "{input}"
+OUTPUT_PLACEHOLDER = "{output}"
+
+
+def commandTemplate(args, input_path, output_paths):
+    """Аргументы ffmpeg, в которых вход и выходы заменены метками: от имён файлов результат не зависит."""
+    def _norm(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    input_key = _norm(input_path)
+    outputs = {_norm(path): os.path.splitext(path)[1].lower() for path in output_paths}
+    template = []
+    for arg in args:
+        key = _norm(arg) if arg and not arg.startswith("-") else None
+        if key == input_key:
+            template.append(INPUT_PLACEHOLDER)
+        elif key in outputs:
+            template.append(OUTPUT_PLACEHOLDER + outputs[key])
+        elif arg != "-y":
+            template.append(arg)
+    return template
+
+
+class ResultCache:
+    """Манифест {ключ: {"outputs": [{"path", "size", "mtime_ns"}], "stored": time}} в JSON-файле.
+
+    Методы lookup/store/materialize блокирующие — вызываются из рабочего потока. Запись на диск
+    не чаще RESULT_CACHE_SAVE_INTERVAL_SEC; остаток сохраняет flush() при выходе.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+        self._lastSave = 0.0
+
+    def _ensureLoaded(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.path, "r", encoding=JSON_ENCODING) as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def resultKey(fingerprint, template, ffmpeg_version):
+        payload = json.dumps([fingerprint, template, ffmpeg_version], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _outputIntact(output):
+        try:
+            st = os.stat(output.get("path", ""))
+        except OSError:
+            return False
+        return st.st_size == output.get("size") and st.st_mtime_ns == output.get("mtime_ns")
+
+    def lookup(self, fingerprint, template, ffmpeg_version):
+        """(ключ, пути проверенных выходов) — пути None, если результата нет или файлы с тех пор изменились."""
+        if not fingerprint:
+            return None, None
+        key = self.resultKey(fingerprint, template, ffmpeg_version)
+        with self._lock:
+            self._ensureLoaded()
+            entry = self._entries.get(key)
+            if not isinstance(entry, dict):
+                return key, None
+            outputs = entry.get("outputs") or []
+            if not outputs or not all(self._outputIntact(output) for output in outputs):
+                del self._entries[key]
+                self._dirty = True
+                return key, None
+            return key, [output["path"] for output in outputs]
+
+    def store(self, key, paths):
+        """Запоминает проверенные выходы для ключа (размер и mtime — чтобы заметить их изменение)."""
+        outputs = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+            outputs.append({"path": os.path.normpath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+        with self._lock:
+            self._ensureLoaded()
+            self._entries[key] = {"outputs": outputs, "stored": time.time()}
+            if len(self._entries) > RESULT_CACHE_MAX_ENTRIES:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k].get("stored", 0))
+                for stale in oldest[:len(self._entries) - RESULT_CACHE_MAX_ENTRIES]:
+                    del self._entries[stale]
+            self._dirty = True
+            if time.monotonic() - self._lastSave >= RESULT_CACHE_SAVE_INTERVAL_SEC:
+                self._saveLocked()
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._saveLocked()
+
+    def _saveLocked(self):
+        self._lastSave = time.monotonic()
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding=JSON_ENCODING) as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError:
+            logger.warning("Не удалось сохранить кэш результатов: %s", self.path)
+
+    @staticmethod
+    def materialize(source, target):
+        """Кладёт готовый выход по новому пути: жёсткая ссылка, если можно, иначе копия. True — успешно."""
+        if os.path.normcase(os.path.normpath(source)) == os.path.normcase(os.path.normpath(target)):
+            return True
+        try:
+            if os.path.exists(target):
+                os.remove(target)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+        except OSError:
+            logger.warning("Не удалось взять результат из кэша: %s -> %s", source, target)
+            return False
+        return True
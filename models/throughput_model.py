@@ -0,0 +1,101 @@
+"""Модель скорости кодирования по истории запусков (models.job_metrics): прогноз времени элемента до запуска.
+
+Скорость (секунд видео за секунду работы) переводится в «пиксельную скорость» — пикселей выхода в секунду
+работы: speed × пикселей в кадре × fps. Так запуски разных разрешений и частот кадров одного кодека
+сопоставимы. Прогноз — медиана пиксельной скорости самой точной группы запусков, где хватает данных.
+"""
+
+import re
+import statistics
+
+from app.constants import THROUGHPUT_MIN_SAMPLES, THROUGHPUT_MAX_SAMPLES
+
+DEFAULT_FPS = 25.0  # если fps источника неизвестен
+
+
+def resolutionPixels(resolution):
+    """"1280x720" -> 921600; 0 — разрешение неизвестно."""
+    match = re.match(r"^\s*(\d+)\s*[x:]\s*(\d+)\s*$", resolution or "")
+    return int(match.group(1)) * int(match.group(2)) if match else 0
+
+
+def _resolutionClass(pixels):
+    for limit, label in ((640 * 480, "sd"), (1280 * 720, "720"), (1920 * 1080, "1080"), (2560 * 1440, "1440")):
+        if pixels <= limit:
+            return label
+    return "2160"
+
+
+def _fpsClass(fps):
+    if fps <= 0:
+        return "?"
+    return "30" if fps <= 31 else ("60" if fps <= 61 else "hfr")
+
+
+class ThroughputModel:
+    """Пиксельная скорость по группам запусков, от точной к общей:
+
+    (кодек, preset_speed, класс разрешения, класс fps, компьютер) → (кодек, preset_speed, класс разрешения, компьютер)
+    → (кодек, preset_speed, компьютер) → (кодек, компьютер) → те же группы по всем компьютерам.
+    Берётся первая группа, где не меньше THROUGHPUT_MIN_SAMPLES запусков (иначе — первая непустая).
+    """
+
+    def __init__(self, host=""):
+        self.host = host
+        self._samples = {}  # ключ группы -> последние THROUGHPUT_MAX_SAMPLES пиксельных скоростей
+        self._medians = {}
+
+    def _keys(self, codec, preset_speed, pixels, fps, host):
+        res_class, fps_class = _resolutionClass(pixels), _fpsClass(fps)
+        local = [
+            (codec, preset_speed, res_class, fps_class, host),
+            (codec, preset_speed, res_class, host),
+            (codec, preset_speed, host),
+            (codec, host),
+        ]
+        return local + [key[:-1] + ("*",) for key in local]
+
+    def observe(self, codec, preset_speed, pixels, fps, speed, host=None):
+        """Добавляет завершённый запуск: speed — секунд видео за секунду работы."""
+        if not pixels or not speed or speed <= 0:
+            return
+        rate = speed * pixels * (fps if fps > 0 else DEFAULT_FPS)
+        for key in self._keys(codec or "", preset_speed or "", pixels, fps, host if host is not None else self.host):
+            samples = self._samples.setdefault(key, [])
+            samples.append(rate)
+            del samples[:-THROUGHPUT_MAX_SAMPLES]
+            self._medians.pop(key, None)
+
+    def predictSpeed(self, codec, preset_speed, pixels, fps):
+        """(ожидаемая скорость, число запусков в группе прогноза) или (None, 0), если похожих запусков не было."""
+        if not pixels:
+            return None, 0
+        fallback = None
+        for key in self._keys(codec or "", preset_speed or "", pixels, fps, self.host):
+            samples = self._samples.get(key)
+            if not samples:
+                continue
+            if len(samples) >= THROUGHPUT_MIN_SAMPLES:
+                fallback = key
+                break
+            if fallback is None:
+                fallback = key
+        if fallback is None:
+            return None, 0
+        median = self._medians.get(fallback)
+        if median is None:
+            median = self._medians[fallback] = statistics.median(self._samples[fallback])
+        return median / (pixels * (fps if fps > 0 else DEFAULT_FPS)), len(self._samples[fallback])
+
+    @classmethod
+    def fromRows(cls, rows, host=""):
+        """Модель по строкам MetricsHistory.rows() (новые первыми); учитываются только успешные запуски."""
+        model = cls(host)
+        for row in reversed(rows or []):
+            if row.get("status") != "success" or not row.get("avg_speed"):
+                continue
+            model.observe(
+                row.get("codec"), row.get("preset_speed"), resolutionPixels(row.get("resolution")),
+                row.get("source_fps") or 0.0, row.get("avg_speed"), row.get("host") or "",
+            )
+        return model
@@ -2,5 +2,8 @@
 """Переиспользуемые виджеты UI."""
 from .trim_segment_bar import TrimSegmentBar
 from .file_drop_area import FileDropArea
+from .preset_checklist_dialog import PresetChecklistDialog
+from .destinations_dialog import OutputDestinationsDialog
+from .job_stats_dialog import JobStatsDialog
 
-__all__ = ["TrimSegmentBar", "FileDropArea"]
+__all__ = ["TrimSegmentBar", "FileDropArea", "PresetChecklistDialog", "OutputDestinationsDialog", "JobStatsDialog"]
@@ -0,0 +1,85 @@
+"""Диалог дополнительных мест сохранения выхода (папка + контейнер)."""
+
+import os
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QComboBox,
+    QPushButton, QDialogButtonBox, QFileDialog, QHeaderView, QAbstractItemView,
+)
+from PySide6.QtCore import Qt
+
+from app.constants import DESTINATION_CONTAINERS
+
+
+class OutputDestinationsDialog(QDialog):
+    """Таблица «папка — контейнер». destinations() — список {"dir": папка, "container": "" | расширение}."""
+
+    SAME_CONTAINER_TEXT = "как основной"
+
+    def __init__(self, title, hint, destinations=(), parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(560, 300)
+        layout = QVBoxLayout(self)
+        if hint:
+            label = QLabel(hint)
+            label.setWordWrap(True)
+            layout.addWidget(label)
+        self._table = QTableWidget(0, 2, self)
+        self._table.setHorizontalHeaderLabels(["Папка", "Контейнер"])
+        self._table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self._table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._table.verticalHeader().setVisible(False)
+        layout.addWidget(self._table)
+        for destination in destinations or ():
+            self._addRow(destination.get("dir", ""), destination.get("container", ""))
+        row_buttons = QHBoxLayout()
+        add_btn = QPushButton("Добавить папку...")
+        add_btn.clicked.connect(self._browseFolder)
+        remove_btn = QPushButton("Удалить")
+        remove_btn.clicked.connect(self._removeSelected)
+        row_buttons.addWidget(add_btn)
+        row_buttons.addWidget(remove_btn)
+        row_buttons.addStretch(1)
+        layout.addLayout(row_buttons)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, parent=self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _addRow(self, directory, container=""):
+        row = self._table.rowCount()
+        self._table.insertRow(row)
+        cell = QTableWidgetItem(directory)
+        cell.setFlags(cell.flags() & ~Qt.ItemIsEditable)
+        cell.setToolTip(directory)
+        self._table.setItem(row, 0, cell)
+        combo = QComboBox(self._table)
+        combo.addItem(self.SAME_CONTAINER_TEXT, "")
+        for ext in DESTINATION_CONTAINERS:
+            combo.addItem(ext, ext)
+        index = combo.findData(container or "")
+        combo.setCurrentIndex(index if index >= 0 else 0)
+        self._table.setCellWidget(row, 1, combo)
+
+    def _browseFolder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Выберите папку")
+        if folder:
+            self._addRow(os.path.normpath(folder))
+
+    def _removeSelected(self):
+        rows = sorted({index.row() for index in self._table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self._table.removeRow(row)
+
+    def destinations(self):
+        result = []
+        for row in range(self._table.rowCount()):
+            cell = self._table.item(row, 0)
+            combo = self._table.cellWidget(row, 1)
+            directory = cell.text() if cell else ""
+            if not directory:
+                continue
+            result.append({"dir": directory, "container": combo.currentData() if combo else ""})
+        return result
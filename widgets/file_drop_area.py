@@ -15,11 +15,18 @@ from app.constants import (
 
 
 class FileDropArea(QFrame):
-    """Область для перетаскивания файлов; при клике вызывается on_click (например, диалог выбора)."""
-    def __init__(self, on_click, on_drop, allowed_exts, parent=None):
+    """Область для перетаскивания файлов; при клике вызывается on_click (например, диалог выбора).
+
+    Если передан fs (AsyncFsService), во время перетаскивания диск не опрашивается: путь
+    отсеивается по расширению и кэшу, а окончательную проверку делает получатель on_drop.
+    Если передан on_drop_many, несколько файлов или папка передаются в него списком.
+    """
+    def __init__(self, on_click, on_drop, allowed_exts, parent=None, fs=None, on_drop_many=None):
         super().__init__(parent)
         self._on_click = on_click
         self._on_drop = on_drop
+        self._on_drop_many = on_drop_many
+        self._fs = fs
         self._allowed_exts = {ext.lower() for ext in (allowed_exts or set())}
         self.setAcceptDrops(True)
         self.setCursor(Qt.PointingHandCursor)
@@ -38,37 +45,49 @@ class FileDropArea(QFrame):
         label.setStyleSheet(f"color: {COLOR_DROP_LABEL}; font-size: {COLOR_DROP_FONT_SIZE}px; font-weight: bold;")
         layout.addWidget(label)
 
-    def _firstValidPath(self, urls):
+    def _validPaths(self, urls):
+        paths = []
         for url in urls:
             path = url.toLocalFile()
-            if not path or not os.path.isfile(path):
+            if not path:
                 continue
             ext = os.path.splitext(path)[1].lower()
-            if not self._allowed_exts or ext in self._allowed_exts:
-                return path
-        return ""
+            # Путь без расширения (папка) принимается только при пакетном режиме
+            folder_candidate = self._on_drop_many is not None and not ext
+            if self._allowed_exts and ext not in self._allowed_exts and not folder_candidate:
+                continue
+            if self._fs is None:
+                if not (os.path.isfile(path) or (folder_candidate and os.path.isdir(path))):
+                    continue
+            else:
+                known, st = self._fs.cachedStat(path)
+                if not known:
+                    self._fs.stat(path, None)
+                elif st is None:
+                    continue
+            paths.append(path)
+        return paths
 
     def dragEnterEvent(self, event):
-        if event.mimeData().hasUrls():
-            path = self._firstValidPath(event.mimeData().urls())
-            if path:
-                event.acceptProposedAction()
-                return
+        if event.mimeData().hasUrls() and self._validPaths(event.mimeData().urls()):
+            event.acceptProposedAction()
+            return
         event.ignore()
 
     def dragMoveEvent(self, event):
-        if event.mimeData().hasUrls():
-            path = self._firstValidPath(event.mimeData().urls())
-            if path:
-                event.acceptProposedAction()
-                return
+        if event.mimeData().hasUrls() and self._validPaths(event.mimeData().urls()):
+            event.acceptProposedAction()
+            return
         event.ignore()
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            path = self._firstValidPath(event.mimeData().urls())
-            if path:
-                self._on_drop(path)
+            paths = self._validPaths(event.mimeData().urls())
+            if paths:
+                if self._on_drop_many is not None and (len(paths) > 1 or not os.path.splitext(paths[0])[1]):
+                    self._on_drop_many(paths)
+                else:
+                    self._on_drop(paths[0])
                 event.acceptProposedAction()
                 return
         event.ignore()
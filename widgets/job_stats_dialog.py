@@ -0,0 +1,84 @@
+"""Диалог статистики запусков: метрики последнего запуска выделенного файла и история из SQLite."""
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+    QDialogButtonBox, QFileDialog, QHeaderView, QAbstractItemView,
+)
+
+from models.job_metrics import HISTORY_COLUMN_NAMES, HISTORY_COLUMN_LABELS
+
+# Колонки таблицы истории в диалоге (полный набор — в CSV)
+HISTORY_VIEW_COLUMNS = (
+    "finished_at", "preset", "codec", "resolution", "status", "wall_sec", "avg_speed", "avg_fps",
+    "cpu_sec", "peak_rss_bytes", "compression_ratio", "host",
+)
+
+
+def formatMetricValue(name, value):
+    """Значение метрики для показа: байты — в МБ, секунды и доли — с округлением."""
+    if value is None or value == "":
+        return "—"
+    if name.endswith("_bytes"):
+        return f"{value / 1024 ** 2:.1f} МБ"
+    if name in ("wall_sec", "cpu_sec", "media_sec"):
+        return f"{value:.1f}"
+    if name == "avg_speed":
+        return f"{value:.2f}x"
+    if name in ("avg_fps", "compression_ratio"):
+        return f"{value:.2f}"
+    return str(value)
+
+
+class JobStatsDialog(QDialog):
+    """metrics — сводка последнего запуска файла (или None), history — строки MetricsHistory.rows(),
+    on_export(csv_path) — выгрузка истории в CSV.
+    """
+
+    def __init__(self, title, metrics, history, on_export=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(900, 520)
+        self._onExport = on_export
+        layout = QVBoxLayout(self)
+        if metrics:
+            layout.addWidget(QLabel("Последний запуск выделенного файла:"))
+            names = [name for name in HISTORY_COLUMN_NAMES if name in metrics]
+            table = QTableWidget(len(names), 2, self)
+            table.setHorizontalHeaderLabels(["Показатель", "Значение"])
+            table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+            table.verticalHeader().setVisible(False)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            for row, name in enumerate(names):
+                table.setItem(row, 0, QTableWidgetItem(HISTORY_COLUMN_LABELS[name]))
+                table.setItem(row, 1, QTableWidgetItem(formatMetricValue(name, metrics[name])))
+            table.resizeColumnToContents(0)
+            layout.addWidget(table, 1)
+        layout.addWidget(QLabel(f"История запусков (последние {len(history)}):" if history else "История запусков пуста."))
+        history_table = QTableWidget(len(history), len(HISTORY_VIEW_COLUMNS), self)
+        history_table.setHorizontalHeaderLabels([HISTORY_COLUMN_LABELS[name] for name in HISTORY_VIEW_COLUMNS])
+        history_table.verticalHeader().setVisible(False)
+        history_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        history_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        for row, entry in enumerate(history):
+            for col, name in enumerate(HISTORY_VIEW_COLUMNS):
+                cell = QTableWidgetItem(formatMetricValue(name, entry.get(name)))
+                if name == "finished_at":
+                    cell.setToolTip(entry.get("input_path") or "")
+                history_table.setItem(row, col, cell)
+        history_table.resizeColumnsToContents()
+        layout.addWidget(history_table, 2)
+        row_buttons = QHBoxLayout()
+        export_btn = QPushButton("Экспорт в CSV...")
+        export_btn.setEnabled(on_export is not None and bool(history))
+        export_btn.clicked.connect(self._export)
+        row_buttons.addWidget(export_btn)
+        row_buttons.addStretch(1)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, parent=self)
+        buttons.rejected.connect(self.reject)
+        row_buttons.addWidget(buttons)
+        layout.addLayout(row_buttons)
+
+    def _export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт истории запусков", "ffmpeg_history.csv", "CSV (*.csv)")
+        if path:
+            self._onExport(path)
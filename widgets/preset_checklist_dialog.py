@@ -0,0 +1,43 @@
+"""Диалог выбора нескольких пресетов (список с флажками)."""
+
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QListWidget, QListWidgetItem, QDialogButtonBox
+from PySide6.QtCore import Qt
+
+
+class PresetChecklistDialog(QDialog):
+    """Список пресетов с флажками. selectedNames() — отмеченные имена в порядке списка."""
+
+    def __init__(self, title, hint, presets, checked_names=(), parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        layout = QVBoxLayout(self)
+        if hint:
+            label = QLabel(hint)
+            label.setWordWrap(True)
+            layout.addWidget(label)
+        self._list = QListWidget(self)
+        checked = set(checked_names or ())
+        for preset in presets:
+            name = preset.get("name", "")
+            if not name:
+                continue
+            entry = QListWidgetItem(name)
+            entry.setFlags(entry.flags() | Qt.ItemIsUserCheckable)
+            entry.setCheckState(Qt.Checked if name in checked else Qt.Unchecked)
+            description = preset.get("description", "")
+            if description:
+                entry.setToolTip(description)
+            self._list.addItem(entry)
+        layout.addWidget(self._list)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, parent=self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def selectedNames(self):
+        names = []
+        for row in range(self._list.count()):
+            entry = self._list.item(row)
+            if entry.checkState() == Qt.Checked:
+                names.append(entry.text())
+        return names